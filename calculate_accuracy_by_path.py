@@ -4,17 +4,35 @@
 使用 eval_output.py 的逻辑计算每道题是否正确
 """
 import json
+import math
 import os
 import re
+import sys
 import argparse
-from collections import defaultdict
-from typing import Dict, List, Tuple, Optional, Any
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate, compress
+from typing import Dict, List, Set, Tuple, Optional, Any, BinaryIO, Iterator, TextIO
 from eval_output import process_line as eval_process_line
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时回退到标准库 json
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick 为可选依赖，未安装时回退到逐个 key 比较
+    ahocorasick = None
+
 # 路径类型常量
 PATH_TYPE_TOOL = 'tool'
 PATH_TYPE_KNOWLEDGE = 'knowledge'
 PATH_TYPE_UNKNOWN = 'unknown'
+PATH_TYPE_INDEX = {PATH_TYPE_TOOL: 0, PATH_TYPE_KNOWLEDGE: 1, PATH_TYPE_UNKNOWN: 2}  # 已知路径类型在统计表中的固定行号
 
 # 显示格式常量
 SEPARATOR_WIDTH = 100
@@ -22,13 +40,28 @@ PATH_NAME_WIDTH = 20
 NUMBER_WIDTH = 18
 ANSWER_MAX_LENGTH = 50
 
+# 并行计算常量
+PARALLEL_MIN_RECORDS = 1000  # 记录数少于该值时串行计算，避免进程启动开销
+PARALLEL_CHUNK_SIZE = 256  # 每次发送给子进程的记录数
+
+# 子串匹配索引常量
+TRIGRAM_SIZE = 3  # 未安装 pyahocorasick 时，倒排索引使用的 n-gram 长度
+KEY_SEPARATOR = '\x00'  # 拼接全部 key 时使用的分隔符（question 中不会出现）
+
+# 文件读取常量
+READ_BUFFER_SIZE = 1 << 20  # 输入文件读缓冲区大小（1 MiB），减少大文件读取时的系统调用次数
+READ_CHUNK_SIZE = 8 << 20  # 按块读取 JSONL 文件时每块的大小（8 MiB）
+
 # 统计字段名
 FIELD_CORRECT = 'correct'
 FIELD_TOTAL = 'total'
 FIELD_ACCURACY = 'accuracy'
+FIELD_INCORRECT = 'incorrect'
+PERCENTAGE_SUFFIX = '_percentage'
 FIELD_LINE_NUMBERS = 'line_numbers'
 FIELD_CORRECT_LINE_NUMBERS = 'correct_line_numbers'
 FIELD_INCORRECT_LINE_NUMBERS = 'incorrect_line_numbers'
+LINE_NUMBER_FIELDS = frozenset({FIELD_LINE_NUMBERS, FIELD_CORRECT_LINE_NUMBERS, FIELD_INCORRECT_LINE_NUMBERS})
 
 # 题目类型统计字段名
 FIELD_MCQ_CORRECT = 'mcq_correct'
@@ -48,6 +81,23 @@ FIELD_NUMERIC_ACCURACY = 'numeric_accuracy'
 NONMCQ_TYPE_YESNO = 'yesno'
 NONMCQ_TYPE_NUMERIC = 'numeric'
 
+# 填空题类型判断模式（忽略大小写，等价于先 lower() 再做子串判断，但无需复制字符串）
+YESNO_INSTRUCTION_PATTERN = re.compile(r'yes or no', re.IGNORECASE | re.ASCII)
+NUMERIC_INSTRUCTION_PATTERN = re.compile(r'numeric', re.IGNORECASE | re.ASCII)
+
+# test.jsonl 题目类型编码（以行号为下标存放在 array('b') 中）
+TYPE_CODE_MISSING = -1
+NONMCQ_CODE_YESNO = 0
+NONMCQ_CODE_NUMERIC = 1
+NONMCQ_CODE_OTHER = 2
+# 编码到取值的解码表，-1 恰好取到末尾的 None
+IS_MCQ_BY_CODE = (False, True, None)
+NONMCQ_TYPE_BY_CODE = (NONMCQ_TYPE_YESNO, NONMCQ_TYPE_NUMERIC, None, None)
+
+# 行号保存在 array('q') 中，超出该范围的 lineInDataset 无法保存
+LINE_NUMBER_MIN = -(1 << 63)
+LINE_NUMBER_MAX = (1 << 63) - 1
+
 # JSON 字段名
 JSON_FIELD_QUESTION = 'question'
 JSON_FIELD_TOOL = 'tool'
@@ -64,25 +114,210 @@ JSON_FIELD_TOOLS_USED = 'tools_used'
 JSON_FIELD_PATH_TYPE = 'path_type'
 JSON_FIELD_TOOLS = 'tools'
 
+# 计数列：(正确数字段, 总数字段, 正确率字段) 依次占用计数表的第 2i、2i+1 列
+COUNTER_FIELD_GROUPS = (
+    (FIELD_CORRECT, FIELD_TOTAL, FIELD_ACCURACY),
+    (FIELD_MCQ_CORRECT, FIELD_MCQ_TOTAL, FIELD_MCQ_ACCURACY),
+    (FIELD_NONMCQ_CORRECT, FIELD_NONMCQ_TOTAL, FIELD_NONMCQ_ACCURACY),
+    (FIELD_YESNO_CORRECT, FIELD_YESNO_TOTAL, FIELD_YESNO_ACCURACY),
+    (FIELD_NUMERIC_CORRECT, FIELD_NUMERIC_TOTAL, FIELD_NUMERIC_ACCURACY)
+)
+COL_CORRECT = 0
+COL_TOTAL = 1
+COL_MCQ_CORRECT = 2
+COL_MCQ_TOTAL = 3
+COL_NONMCQ_CORRECT = 4
+COL_NONMCQ_TOTAL = 5
+COL_YESNO_CORRECT = 6
+COL_YESNO_TOTAL = 7
+COL_NUMERIC_CORRECT = 8
+COL_NUMERIC_TOTAL = 9
+NUM_COUNTER_COLUMNS = 10
 
-def _create_default_stat_entry() -> Dict[str, Any]:
-    """创建默认的统计条目"""
-    return {
-        FIELD_CORRECT: 0,
-        FIELD_TOTAL: 0,
-        FIELD_ACCURACY: 0.0,
+# 判断 bytes 行中是否有 19 位以上连续数字的转换表：数字映射为 b'0'，其余字节映射为 b'-'
+DIGIT_MASK_TABLE = bytes(0x30 if 0x30 <= b <= 0x39 else 0x2D for b in range(256))
+LONG_DIGIT_RUN = b'0' * 19
+
+
+def _json_loads(line: bytes) -> Any:
+    """
+    解析 JSON 行（可直接解析二进制模式读出的 bytes 行，行尾换行无需 strip）
+    
+    优先使用 orjson；以下两种行改用标准库 json 解析，保证解析结果与未安装 orjson 时相同：
+    orjson 无法解析的行（如含 NaN/Infinity 的行），以及含 19 位以上连续数字、
+    可能有超出 64 位整数的行（orjson 会把这类整数转成 float）
+    
+    Args:
+        line: JSON 行
+        
+    Returns:
+        解析结果
+        
+    Raises:
+        json.JSONDecodeError: 标准库 json 也无法解析时
+    """
+    if orjson is not None and LONG_DIGIT_RUN not in line.translate(DIGIT_MASK_TABLE):
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(line)
+
+
+def _has_non_finite_float(data: Any) -> bool:
+    """
+    检查数据中是否含有 NaN/Infinity
+    
+    Args:
+        data: 待序列化的数据
+        
+    Returns:
+        含有非有限浮点数时返回 True
+    """
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(map(_has_non_finite_float, data.values()))
+    if isinstance(data, (list, tuple)):
+        return any(map(_has_non_finite_float, data))
+    return False
+
+
+def _create_stats_table() -> Dict[str, Any]:
+    """
+    创建按路径累加的统计表（SoA 布局）
+    
+    每条路径占一行：counters[row] 为长度 NUM_COUNTER_COLUMNS 的整数计数列表（列见 COL_* 常量），
+    line_numbers[row] 以 array('q') 按到达顺序保存该路径的行号，correct_mask[row] 以 array('b') 保存对应记录是否正确，
+    正确/错误行号在输出时才由两者拆分得到；
+    lines_sorted[row] 记录该行的行号是否按非递减顺序追加（为 True 时无需再排序）
+    已知路径类型按 PATH_TYPE_INDEX 预先建行，其余路径类型首次出现时追加
+    
+    Returns:
+        统计表字典，格式为：
+        {'path_types': list, 'path_index': dict, 'counters': list, 'lines_sorted': list,
+         'line_numbers': list[array], 'correct_mask': list[array]}
+    """
+    stats_table: Dict[str, Any] = {
+        'path_types': [],
+        'path_index': {},
+        'counters': [],
+        'lines_sorted': [],
         FIELD_LINE_NUMBERS: [],
-        FIELD_CORRECT_LINE_NUMBERS: [],
-        FIELD_INCORRECT_LINE_NUMBERS: [],
-        FIELD_MCQ_CORRECT: 0,
-        FIELD_MCQ_TOTAL: 0,
-        FIELD_NONMCQ_CORRECT: 0,
-        FIELD_NONMCQ_TOTAL: 0,
-        FIELD_YESNO_CORRECT: 0,
-        FIELD_YESNO_TOTAL: 0,
-        FIELD_NUMERIC_CORRECT: 0,
-        FIELD_NUMERIC_TOTAL: 0
+        'correct_mask': []
     }
+    for path_type in PATH_TYPE_INDEX:
+        _get_path_row(stats_table, path_type)
+    return stats_table
+
+
+def _get_path_row(stats_table: Dict[str, Any], path_type: str) -> int:
+    """
+    获取路径类型在统计表中的行号，不存在时追加新行
+    
+    Args:
+        stats_table: 统计表
+        path_type: 增强路径类型
+        
+    Returns:
+        行号
+    """
+    path_index = stats_table['path_index']
+    row = path_index.get(path_type)
+    if row is None:
+        row = len(stats_table['path_types'])
+        path_index[path_type] = row
+        stats_table['path_types'].append(path_type)
+        stats_table['counters'].append([0] * NUM_COUNTER_COLUMNS)
+        stats_table['lines_sorted'].append(True)
+        stats_table[FIELD_LINE_NUMBERS].append(array('q'))
+        stats_table['correct_mask'].append(array('b'))
+    return row
+
+
+def _coerce_line_number(value: Any) -> Optional[int]:
+    """
+    将 lineInDataset 转换为可保存在 array('q') 中的整数行号
+    
+    整数值的浮点数（如 12.0）和布尔值按对应的整数处理；null、字符串、非整数浮点数
+    以及超出 64 位整数范围的值无法作为行号，打印警告后返回 None
+    
+    Args:
+        value: lineInDataset 字段的值
+        
+    Returns:
+        整数行号，无法转换时返回 None
+    """
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, int) and LINE_NUMBER_MIN <= value <= LINE_NUMBER_MAX:
+        return int(value)
+    print(f"警告: lineInDataset 不是有效的整数行号 ({value!r})，跳过该记录")
+    return None
+
+
+def _open_sequential(path: str) -> BinaryIO:
+    """
+    以二进制模式打开待顺序读取的输入文件（使用大缓冲区，并提示内核进行顺序预读）
+    
+    Args:
+        path: 文件路径
+        
+    Returns:
+        二进制文件对象
+    """
+    f = open(path, 'rb', buffering=READ_BUFFER_SIZE)
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass  # 预读提示失败不影响读取
+    return f
+
+
+def _iter_lines(f: BinaryIO) -> Iterator[bytes]:
+    """
+    按块读取二进制文件并按换行符切分，逐行返回（不含换行符，空行也会返回）
+    
+    Args:
+        f: 二进制文件对象
+        
+    Yields:
+        每一行的 bytes
+    """
+    remainder = b''
+    while True:
+        chunk = f.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        lines = (remainder + chunk).split(b'\n')
+        remainder = lines.pop()
+        yield from lines
+    if remainder:
+        yield remainder
+
+
+def _json_dumps_indent(data: Any) -> str:
+    """
+    将数据序列化为缩进2格的JSON字符串（保留非ASCII字符）
+    
+    orjson 无法写出超出 64 位的整数，并会把 NaN/Infinity 写成 null，这些数据改用标准库 json 序列化
+    
+    Args:
+        data: 待序列化的数据
+        
+    Returns:
+        JSON字符串
+    """
+    if orjson is not None:
+        try:
+            dumped = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+        else:
+            if b'null' not in dumped or not _has_non_finite_float(data):
+                return dumped.decode('utf-8')
+    return json.dumps(data, ensure_ascii=False, indent=2)
 
 
 def _extract_tools_from_messages(messages: List[Dict[str, Any]]) -> List[str]:
@@ -96,67 +331,200 @@ def _extract_tools_from_messages(messages: List[Dict[str, Any]]) -> List[str]:
         工具名称列表
     """
     tools = []
+    append_tool = tools.append
     for msg in messages:
-        if msg.get(JSON_FIELD_ROLE) == 'assistant' and JSON_FIELD_TOOL_CALLS in msg:
-            for tool_call in msg.get(JSON_FIELD_TOOL_CALLS, []):
-                func_name = tool_call.get(JSON_FIELD_FUNCTION, {}).get(JSON_FIELD_NAME, '')
-                if func_name:
-                    tools.append(func_name)
+        if msg.get(JSON_FIELD_ROLE) != 'assistant':
+            continue
+        tool_calls = msg.get(JSON_FIELD_TOOL_CALLS)
+        if not tool_calls:
+            continue
+        for tool_call in tool_calls:
+            # 直接取下标，缺少字段（或字段为 null）时跳过，无需构造默认空字典
+            try:
+                func_name = tool_call[JSON_FIELD_FUNCTION][JSON_FIELD_NAME]
+            except (KeyError, TypeError):
+                continue
+            if func_name:
+                append_tool(func_name)
     return tools
 
 
-def load_test_is_mcq_mapping(test_file: str) -> Tuple[Dict[int, bool], Dict[int, Optional[str]]]:
+def load_test_is_mcq_mapping(test_file: str) -> Tuple[array, array]:
     """
     从 test.jsonl 文件加载行号到 is_mcq 和填空题类型的映射
     
+    两个映射均为以行号为下标的 array('b')，下标 0 为占位，-1 (TYPE_CODE_MISSING) 表示该行无记录
+    
     Args:
         test_file: test.jsonl 文件路径
         
     Returns:
-        (行号到 is_mcq 的映射字典, 行号到填空题类型的映射字典)
+        (is_mcq 编码数组, 填空题类型编码数组)
         行号从1开始，对应文件中的行号
-        填空题类型: 'yesno' (Yes/No类型), 'numeric' (数值类型), None (选择题或其他)
+        is_mcq 编码: 1 (选择题), 0 (填空题)
+        填空题类型编码: NONMCQ_CODE_YESNO (Yes/No类型), NONMCQ_CODE_NUMERIC (数值类型),
+        NONMCQ_CODE_OTHER (其他)；选择题为 -1
     """
-    is_mcq_map: Dict[int, bool] = {}
-    nonmcq_type_map: Dict[int, Optional[str]] = {}
+    is_mcq_codes = array('b', [TYPE_CODE_MISSING])
+    nonmcq_codes = array('b', [TYPE_CODE_MISSING])
     
     if not os.path.exists(test_file):
-        return is_mcq_map, nonmcq_type_map
+        return is_mcq_codes, nonmcq_codes
     
     try:
-        with open(test_file, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, start=1):
-                if not line.strip():
+        with _open_sequential(test_file) as f:
+            for line_num, line in enumerate(_iter_lines(f), start=1):
+                is_mcq_codes.append(TYPE_CODE_MISSING)
+                nonmcq_codes.append(TYPE_CODE_MISSING)
+                if not line or line.isspace():
                     continue
                 try:
-                    data = json.loads(line.strip())
+                    data = _json_loads(line)
                     is_mcq = data.get('is_mcq', False)
-                    is_mcq_map[line_num] = bool(is_mcq)
+                    is_mcq_codes[line_num] = 1 if is_mcq else 0
                     
                     # 如果是填空题，判断类型
                     if not is_mcq:
-                        instruction = data.get('instruction', '').lower()
-                        if 'yes or no' in instruction:
-                            nonmcq_type_map[line_num] = NONMCQ_TYPE_YESNO
-                        elif 'numeric' in instruction:
-                            nonmcq_type_map[line_num] = NONMCQ_TYPE_NUMERIC
+                        instruction = data.get('instruction', '')
+                        if YESNO_INSTRUCTION_PATTERN.search(instruction):
+                            nonmcq_codes[line_num] = NONMCQ_CODE_YESNO
+                        elif NUMERIC_INSTRUCTION_PATTERN.search(instruction):
+                            nonmcq_codes[line_num] = NONMCQ_CODE_NUMERIC
                         else:
-                            nonmcq_type_map[line_num] = None
+                            nonmcq_codes[line_num] = NONMCQ_CODE_OTHER
                 except json.JSONDecodeError:
                     continue
     except Exception as e:
         print(f"警告: 加载 test.jsonl 文件失败: {e}")
     
-    return is_mcq_map, nonmcq_type_map
+    return is_mcq_codes, nonmcq_codes
+
 
+def _trigrams(text: str) -> Set[str]:
+    """返回字符串中所有长度为 TRIGRAM_SIZE 的子串集合（字符串较短时为空集）"""
+    return {text[i:i + TRIGRAM_SIZE] for i in range(len(text) - TRIGRAM_SIZE + 1)}
 
-def _find_matching_question(question: str, enhancement_paths: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+
+def _build_question_index(enhancement_paths: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    为 enhancement_paths 的 question 构建子串匹配索引（只需构建一次）
+    
+    安装了 pyahocorasick 时构建 Aho-Corasick 自动机，并把全部 key 用分隔符拼接成一个字符串；
+    否则构建 trigram 倒排索引
+    
+    Args:
+        enhancement_paths: 增强路径映射字典
+        
+    Returns:
+        索引字典，格式为：
+        {'keys': list, 'automaton': Automaton 或 None, 'haystack': str, 'key_starts': list,
+         'trigram_postings': dict 或 None, 'trigram_counts': list, 'short_key_ids': list}
+        keys 按插入顺序排列；automaton 为 Aho-Corasick 自动机，值为 key 在 keys 中的下标；
+        haystack 为按插入顺序拼接的全部 key，key_starts[idx] 为第 idx 个 key 在 haystack 中的起始位置
+        （末尾额外一项为 haystack 长度加 1）；
+        trigram_postings 为 trigram 到包含它的 key 下标列表（升序）的映射，
+        trigram_counts[idx] 为第 idx 个 key 的不同 trigram 数，short_key_ids 为不足 TRIGRAM_SIZE 的 key 下标
+    """
+    keys = list(enhancement_paths)
+    automaton = None
+    haystack = ''
+    key_starts: List[int] = []
+    trigram_postings: Optional[Dict[str, List[int]]] = None
+    trigram_counts: List[int] = []
+    short_key_ids: List[int] = []
+    if ahocorasick is not None and keys:
+        automaton = ahocorasick.Automaton()
+        for idx, key in enumerate(keys):
+            automaton.add_word(key, idx)
+        automaton.make_automaton()
+        haystack = KEY_SEPARATOR.join(keys)
+        key_starts = list(accumulate((len(key) + 1 for key in keys), initial=0))
+    else:
+        trigram_postings = {}
+        for idx, key in enumerate(keys):
+            trigrams = _trigrams(key)
+            trigram_counts.append(len(trigrams))
+            if not trigrams:
+                short_key_ids.append(idx)
+            for trigram in trigrams:
+                trigram_postings.setdefault(trigram, []).append(idx)
+    return {
+        'keys': keys,
+        'automaton': automaton,
+        'haystack': haystack,
+        'key_starts': key_starts,
+        'trigram_postings': trigram_postings,
+        'trigram_counts': trigram_counts,
+        'short_key_ids': short_key_ids
+    }
+
+
+def _find_by_trigram_index(question: str, question_index: Dict[str, Any]) -> Optional[int]:
+    """
+    通过 trigram 倒排索引查找第一个满足 question in key 或 key in question 的 key 下标
+    
+    question 长度需不小于 TRIGRAM_SIZE；候选 key 仍需逐个做子串校验
+    
+    Args:
+        question: 已去除首尾空白的 question 字符串
+        question_index: _build_question_index 构建的索引
+        
+    Returns:
+        插入顺序中第一个匹配的 key 下标，如果未找到则返回 None
+    """
+    keys = question_index['keys']
+    postings = question_index['trigram_postings']
+    trigram_counts = question_index['trigram_counts']
+    question_len = len(question)
+    
+    question_trigrams = _trigrams(question)
+    question_postings = []
+    for trigram in question_trigrams:
+        posting = postings.get(trigram)
+        if posting is not None:
+            question_postings.append(posting)
+    
+    # key in question：key 的所有 trigram 都必须出现在 question 中；过短的 key 直接校验
+    candidates: Set[int] = set(question_index['short_key_ids'])
+    hit_counts: Dict[int, int] = {}
+    for posting in question_postings:
+        for idx in posting:
+            hit_counts[idx] = hit_counts.get(idx, 0) + 1
+    for idx, count in hit_counts.items():
+        if count == trigram_counts[idx]:
+            candidates.add(idx)
+    
+    # question in key：question 的每个 trigram 都必须出现在 key 中，对倒排列表求交集
+    if len(question_postings) == len(question_trigrams):
+        question_postings.sort(key=len)
+        common = set(question_postings[0])
+        for posting in question_postings[1:]:
+            if not common:
+                break
+            common.intersection_update(posting)
+        candidates |= common
+    
+    for idx in sorted(candidates):
+        key = keys[idx]
+        if (question in key) if len(key) > question_len else (key in question):
+            return idx
+    return None
+
+
+def _find_matching_question(
+    question: str,
+    enhancement_paths: Dict[str, Dict[str, Any]],
+    question_index: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
     """
     在 enhancement_paths 中查找匹配的 question（使用子串匹配）
     
+    子串匹配时返回插入顺序中第一个满足 A in B 或 B in A 的 key 对应的路径信息
+    
     Args:
         question: 要匹配的 question 字符串
         enhancement_paths: 增强路径映射字典
+        question_index: _build_question_index 构建的索引（可选，为 None 时逐个比较）
         
     Returns:
         匹配的路径信息，如果未找到则返回 None
@@ -169,11 +537,45 @@ def _find_matching_question(question: str, enhancement_paths: Dict[str, Dict[str
     if question in enhancement_paths:
         return enhancement_paths[question]
     
-    # 尝试子串匹配：A in B 或 B in A
-    for key, path_info in enhancement_paths.items():
-        if question in key or key in question:
-            return path_info
+    question_len = len(question)
+    automaton = question_index['automaton'] if question_index is not None else None
+    if automaton is None:
+        if question_index is not None and question_len >= TRIGRAM_SIZE:
+            idx = _find_by_trigram_index(question, question_index)
+            return enhancement_paths[question_index['keys'][idx]] if idx is not None else None
+        
+        # 尝试子串匹配：A in B 或 B in A
+        # 只有较短的一方可能是较长一方的子串，每个 key 只需判断一个方向
+        for key, path_info in enhancement_paths.items():
+            if (question in key) if len(key) > question_len else (key in question):
+                return path_info
+        return None
     
+    keys = question_index['keys']
+    
+    # key in question：自动机一次扫描找出 question 中出现的所有 key，取插入顺序最靠前者
+    best_idx = len(keys)
+    for _, idx in automaton.iter(question):
+        if idx < best_idx:
+            best_idx = idx
+    
+    # question in key：只需检查排在 best_idx 之前的 key
+    # 在拼接后的 haystack 中做一次查找，第一次出现的位置即落在插入顺序最靠前的包含 question 的 key 中
+    # （与 key 等长的包含即完全相同，已由精确匹配处理）
+    if KEY_SEPARATOR not in question:
+        key_starts = question_index['key_starts']
+        pos = question_index['haystack'].find(question, 0, key_starts[best_idx])
+        if pos >= 0:
+            best_idx = bisect_right(key_starts, pos) - 1
+    else:
+        for idx in range(best_idx):
+            key = keys[idx]
+            if len(key) > question_len and question in key:
+                best_idx = idx
+                break
+    
+    if best_idx < len(keys):
+        return enhancement_paths[keys[best_idx]]
     return None
 
 
@@ -192,14 +594,19 @@ def load_enhancement_paths(dump_file: str) -> Dict[str, Dict[str, Any]]:
     """
     paths: Dict[str, Dict[str, Any]] = {}
     
-    with open(dump_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            if not line.strip():
+    # 循环中频繁使用的全局函数绑定为局部变量
+    json_loads = _json_loads
+    intern = sys.intern
+    
+    with _open_sequential(dump_file) as f:
+        for line in _iter_lines(f):
+            if not line or line.isspace():
                 continue
             
             try:
-                data = json.loads(line.strip())
-                question = data.get(JSON_FIELD_QUESTION, '').strip()
+                data = json_loads(line)
+                # 驻留 question 字符串：同一问题只保留一份，且与查询时驻留的字符串可按身份快速比较
+                question = intern(data.get(JSON_FIELD_QUESTION, '').strip())
                 if not question:
                     continue
                 
@@ -255,107 +662,141 @@ def _calculate_accuracy(record: Dict[str, Any], line_in_dataset: int) -> float:
         return 0.0
 
 
-def _truncate_answer(answer: str, max_length: int = ANSWER_MAX_LENGTH) -> str:
+def _evaluation_key(record: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
     """
-    截断答案字符串（保留最后 N 个字符）
+    返回决定记录正确率的键：正确率只取决于答案和期望答案
     
     Args:
-        answer: 原始答案
-        max_length: 最大长度
+        record: 记录字典
         
     Returns:
-        截断后的答案
+        (答案, 期望答案类型, 期望答案) 元组；字段缺失或类型无法安全比较时返回 None（不参与去重）
     """
-    if len(answer) > max_length:
-        return answer[-max_length:]
-    return answer
+    answer = record.get(JSON_FIELD_ANSWER)
+    expected = record.get(JSON_FIELD_EXPECTED_ANSWER)
+    # 期望答案类型也作为键的一部分：1、1.0、True 相等但 str() 结果不同
+    if type(answer) is str and type(expected) in (str, int, float):
+        return answer, type(expected), expected
+    return None
 
 
-def _create_result_record(
-    record: Dict[str, Any],
-    path_type: str,
-    accuracy: float,
-    tools_used: Optional[List[str]] = None
-) -> Dict[str, Any]:
+def _calculate_accuracies(
+    records: List[Dict[str, Any]],
+    line_numbers: List[int],
+    jobs: Optional[int] = None
+) -> List[float]:
     """
-    创建结果记录
+    批量计算记录的正确率
+    
+    答案与期望答案都相同的记录只计算一次；需要计算的记录数不少于 PARALLEL_MIN_RECORDS 时使用多进程并行计算
     
     Args:
-        record: 原始记录
-        path_type: 增强路径类型
-        accuracy: 正确率
-        tools_used: 使用的工具列表（可选）
+        records: 记录列表
+        line_numbers: 与记录一一对应的数据集行号列表
+        jobs: 并行进程数，为 None 时使用 CPU 核数，为 1 时串行计算
         
     Returns:
-        结果记录字典
-    """
-    result = {
-        JSON_FIELD_LINE_IN_DATASET: record.get(JSON_FIELD_LINE_IN_DATASET, 0),
-        'enhancement_path': path_type,
-        FIELD_ACCURACY: accuracy,
-        'is_correct': accuracy == 1.0,
-        JSON_FIELD_EXPECTED_ANSWER: record.get(JSON_FIELD_EXPECTED_ANSWER, ''),
-        JSON_FIELD_ANSWER: _truncate_answer(record.get(JSON_FIELD_ANSWER, ''))
-    }
+        与记录一一对应的正确率列表
+    """
+    slot_by_key: Dict[Tuple[Any, ...], int] = {}
+    unique_records: List[Dict[str, Any]] = []
+    unique_line_numbers: List[int] = []
+    slots: List[int] = []
+    for record, line_num in zip(records, line_numbers):
+        key = _evaluation_key(record)
+        slot = slot_by_key.get(key) if key is not None else None
+        if slot is None:
+            slot = len(unique_records)
+            if key is not None:
+                slot_by_key[key] = slot
+            unique_records.append(record)
+            unique_line_numbers.append(line_num)
+        slots.append(slot)
     
-    if path_type == PATH_TYPE_TOOL and tools_used:
-        result[JSON_FIELD_TOOLS_USED] = tools_used
+    accuracies: Optional[List[float]] = None
+    workers = jobs if jobs is not None else (os.cpu_count() or 1)
+    if len(unique_records) >= PARALLEL_MIN_RECORDS and workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                accuracies = list(executor.map(
+                    _calculate_accuracy, unique_records, unique_line_numbers, chunksize=PARALLEL_CHUNK_SIZE
+                ))
+        except (OSError, BrokenProcessPool) as e:
+            print(f"警告: 多进程计算正确率失败，改为串行计算: {e}")
     
-    return result
+    if accuracies is None:
+        accuracies = [
+            _calculate_accuracy(record, line_num)
+            for record, line_num in zip(unique_records, unique_line_numbers)
+        ]
+    return [accuracies[slot] for slot in slots]
 
 
-def _update_statistics(
-    stats_by_path: Dict[str, Dict[str, Any]],
-    path_type: str,
-    line_in_dataset: int,
+def _truncate_answer(answer: str, max_length: int = ANSWER_MAX_LENGTH) -> str:
+    """
+    截断答案字符串（保留最后 N 个字符）
+    
+    Args:
+        answer: 原始答案
+        max_length: 最大长度
+        
+    Returns:
+        截断后的答案
+    """
+    # 长度不超过 max_length 时切片返回完整字符串，无需先判断长度
+    return answer[-max_length:]
+
+
+def _outcome_counter_columns(
     is_correct: bool,
-    is_mcq: Optional[bool] = None,
-    nonmcq_type: Optional[str] = None
-) -> None:
+    is_mcq: Optional[bool],
+    nonmcq_type: Optional[str]
+) -> Tuple[int, ...]:
     """
-    更新统计信息
+    计算一条记录需要加 1 的计数列（列见 COL_* 常量）
     
     Args:
-        stats_by_path: 按路径类型的统计字典
-        path_type: 增强路径类型
-        line_in_dataset: 数据集中的行号
         is_correct: 是否正确
         is_mcq: 是否为选择题（True=选择题，False=填空题，None=未知）
         nonmcq_type: 填空题类型（'yesno'=Yes/No类型，'numeric'=数值类型，None=未知或其他）
+        
+    Returns:
+        计数列下标元组
     """
-    if path_type not in stats_by_path:
-        stats_by_path[path_type] = _create_default_stat_entry()
-    
-    stats = stats_by_path[path_type]
-    stats[FIELD_TOTAL] += 1
-    stats[FIELD_LINE_NUMBERS].append(line_in_dataset)
-    
+    columns = [COL_TOTAL]
     if is_correct:
-        stats[FIELD_CORRECT] += 1
-        stats[FIELD_CORRECT_LINE_NUMBERS].append(line_in_dataset)
-    else:
-        stats[FIELD_INCORRECT_LINE_NUMBERS].append(line_in_dataset)
+        columns.append(COL_CORRECT)
     
-    # 更新选择题/填空题统计
+    # 选择题/填空题统计
     if is_mcq is not None:
         if is_mcq:
-            stats[FIELD_MCQ_TOTAL] += 1
+            columns.append(COL_MCQ_TOTAL)
             if is_correct:
-                stats[FIELD_MCQ_CORRECT] += 1
+                columns.append(COL_MCQ_CORRECT)
         else:
-            stats[FIELD_NONMCQ_TOTAL] += 1
+            columns.append(COL_NONMCQ_TOTAL)
             if is_correct:
-                stats[FIELD_NONMCQ_CORRECT] += 1
+                columns.append(COL_NONMCQ_CORRECT)
             
-            # 更新填空题子类型统计
+            # 填空题子类型统计
             if nonmcq_type == NONMCQ_TYPE_YESNO:
-                stats[FIELD_YESNO_TOTAL] += 1
+                columns.append(COL_YESNO_TOTAL)
                 if is_correct:
-                    stats[FIELD_YESNO_CORRECT] += 1
+                    columns.append(COL_YESNO_CORRECT)
             elif nonmcq_type == NONMCQ_TYPE_NUMERIC:
-                stats[FIELD_NUMERIC_TOTAL] += 1
+                columns.append(COL_NUMERIC_TOTAL)
                 if is_correct:
-                    stats[FIELD_NUMERIC_CORRECT] += 1
+                    columns.append(COL_NUMERIC_CORRECT)
+    return tuple(columns)
+
+
+# (是否正确, 是否选择题, 填空题类型) 的全部组合到计数列的查找表，统计时无需逐条分支判断
+COUNTER_COLUMNS_BY_OUTCOME = {
+    (is_correct, is_mcq, nonmcq_type): _outcome_counter_columns(is_correct, is_mcq, nonmcq_type)
+    for is_correct in (False, True)
+    for is_mcq in (True, False, None)
+    for nonmcq_type in (NONMCQ_TYPE_YESNO, NONMCQ_TYPE_NUMERIC, None)
+}
 
 
 def _calculate_accuracy_value(correct: int, total: int) -> float:
@@ -363,19 +804,52 @@ def _calculate_accuracy_value(correct: int, total: int) -> float:
     return correct / total if total > 0 else 0.0
 
 
-def _calculate_path_accuracies(stats_by_path: Dict[str, Dict[str, Any]]) -> None:
+def _build_stats_by_path(stats_table: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
     """
-    计算各路径的正确率
+    由统计表计算各路径的正确率，并展开为按路径类型的统计字典（行号列表按升序排列）
+    
+    没有任何记录的路径类型（预先建好的空行）不会出现在结果中
+    每条路径的字段顺序即输出文件中 statistics_by_path 的字段顺序（含百分比字符串）
     
     Args:
-        stats_by_path: 按路径类型的统计字典
+        stats_table: 按路径累加的统计表（见 _create_stats_table）
+        
+    Returns:
+        按路径类型的统计字典
     """
-    for stats in stats_by_path.values():
-        stats[FIELD_ACCURACY] = _calculate_accuracy_value(stats[FIELD_CORRECT], stats[FIELD_TOTAL])
-        stats[FIELD_MCQ_ACCURACY] = _calculate_accuracy_value(stats[FIELD_MCQ_CORRECT], stats[FIELD_MCQ_TOTAL])
-        stats[FIELD_NONMCQ_ACCURACY] = _calculate_accuracy_value(stats[FIELD_NONMCQ_CORRECT], stats[FIELD_NONMCQ_TOTAL])
-        stats[FIELD_YESNO_ACCURACY] = _calculate_accuracy_value(stats[FIELD_YESNO_CORRECT], stats[FIELD_YESNO_TOTAL])
-        stats[FIELD_NUMERIC_ACCURACY] = _calculate_accuracy_value(stats[FIELD_NUMERIC_CORRECT], stats[FIELD_NUMERIC_TOTAL])
+    stats_by_path: Dict[str, Dict[str, Any]] = {}
+    for row, path_type in enumerate(stats_table['path_types']):
+        counters = stats_table['counters'][row]
+        if not counters[COL_TOTAL]:
+            continue
+        stats: Dict[str, Any] = {}
+        # 正确数与总数成对存放：一次切片即可得到全部 (正确数, 总数) 对
+        for (correct_field, total_field, accuracy_field), correct, total in zip(
+            COUNTER_FIELD_GROUPS, counters[0::2], counters[1::2]
+        ):
+            accuracy = _calculate_accuracy_value(correct, total)
+            stats[correct_field] = correct
+            stats[total_field] = total
+            stats[accuracy_field] = accuracy
+            stats[accuracy_field + PERCENTAGE_SUFFIX] = f"{accuracy*100:.2f}%"
+            if correct_field == FIELD_CORRECT:
+                incorrect = total - correct
+                stats[FIELD_INCORRECT] = incorrect
+                stats[FIELD_INCORRECT + PERCENTAGE_SUFFIX] = f"{incorrect/total*100:.2f}%"
+        # 行号数组在这里才转换为列表（逆序追加过的行需要按行号排序），并按正确标记拆分
+        line_numbers = stats_table[FIELD_LINE_NUMBERS][row].tolist()
+        correct_mask = stats_table['correct_mask'][row].tolist()
+        if not stats_table['lines_sorted'][row]:
+            pairs = sorted(zip(line_numbers, correct_mask))
+            line_numbers = [line_num for line_num, _ in pairs]
+            correct_mask = [ok for _, ok in pairs]
+        stats[FIELD_LINE_NUMBERS] = line_numbers
+        stats[FIELD_CORRECT_LINE_NUMBERS] = list(compress(line_numbers, correct_mask))
+        stats[FIELD_INCORRECT_LINE_NUMBERS] = [
+            line_num for line_num, ok in zip(line_numbers, correct_mask) if not ok
+        ]
+        stats_by_path[path_type] = stats
+    return stats_by_path
 
 
 def _format_stat_string(correct: int, total: int, accuracy: float) -> str:
@@ -467,25 +941,60 @@ def _print_statistics_table(stats_by_path: Dict[str, Dict[str, Any]]) -> Tuple[i
     return totals[FIELD_CORRECT], totals[FIELD_TOTAL]
 
 
-def _compress_line_number_arrays(json_str: str) -> str:
+def _write_json_with_inline_line_numbers(f: TextIO, data: Dict[str, Any], level: int = 0) -> None:
     """
-    将JSON字符串中的行号数组压缩为单行格式
+    将字典以缩进2格的JSON格式逐个字段写入文件，行号数组字段直接输出为单行格式
+    
+    嵌套字典递归展开，列表逐个元素写入；其余值整体序列化后按所在层级补齐缩进
     
     Args:
-        json_str: JSON字符串
-        
-    Returns:
-        压缩后的JSON字符串
+        f: 输出文件对象
+        data: 待写入的字典
+        level: 当前嵌套层级
     """
-    def compress_array(match: re.Match) -> str:
-        field_name = match.group(1)
-        array_content = match.group(2)
-        numbers = re.findall(r'\d+', array_content)
-        compressed = ', '.join(numbers)
-        return f'{field_name}[{compressed}]'
+    if not data:
+        f.write('{}')
+        return
     
-    pattern = r'("(?:line_numbers|correct_line_numbers|incorrect_line_numbers)"\s*:\s*)\[([\s\S]*?)\]'
-    return re.sub(pattern, compress_array, json_str)
+    inner_indent = '\n' + '  ' * (level + 1)
+    separator = '{' + inner_indent
+    for key, value in data.items():
+        f.write(separator)
+        f.write(json.dumps(key, ensure_ascii=False))
+        f.write(': ')
+        if key in LINE_NUMBER_FIELDS:
+            # 默认分隔符即为 ', '，得到 [1, 2, 3] 形式的单行数组
+            f.write(json.dumps(value, ensure_ascii=False))
+        elif isinstance(value, dict):
+            _write_json_with_inline_line_numbers(f, value, level + 1)
+        elif isinstance(value, list):
+            _write_json_list(f, value, level + 1)
+        else:
+            f.write(_json_dumps_indent(value).replace('\n', inner_indent))
+        separator = ',' + inner_indent
+    f.write('\n' + '  ' * level + '}')
+
+
+def _write_json_list(f: TextIO, items: List[Any], level: int = 0) -> None:
+    """
+    将列表逐个元素序列化写入文件（缩进2格），避免先拼接出整个列表的JSON字符串
+    
+    Args:
+        f: 输出文件对象
+        items: 待写入的列表
+        level: 列表所在的嵌套层级
+    """
+    if not items:
+        f.write('[]')
+        return
+    
+    item_indent = '\n' + '  ' * (level + 1)
+    separator = '[' + item_indent
+    for item in items:
+        f.write(separator)
+        f.write(_json_dumps_indent(item).replace('\n', item_indent))
+        separator = ',' + item_indent
+    f.write('\n' + '  ' * level + ']')
 
 
 def _build_statistics_detail(
@@ -495,52 +1004,12 @@ def _build_statistics_detail(
     构建详细的统计信息
     
     Args:
-        stats_by_path: 按路径类型的统计字典
+        stats_by_path: 按路径类型的统计字典（已包含全部输出字段，见 _build_stats_by_path）
         
     Returns:
-        详细的统计信息字典
+        详细的统计信息字典（按路径类型排序）
     """
-    statistics_detail = {}
-    
-    for path_type in sorted(stats_by_path.keys()):
-        stats = stats_by_path[path_type]
-        line_numbers = sorted(stats[FIELD_LINE_NUMBERS])
-        correct_line_numbers = sorted(stats[FIELD_CORRECT_LINE_NUMBERS])
-        incorrect_line_numbers = sorted(stats[FIELD_INCORRECT_LINE_NUMBERS])
-        
-        total = stats[FIELD_TOTAL]
-        correct = stats[FIELD_CORRECT]
-        incorrect = total - correct
-        
-        def _build_accuracy_entry(stats_dict: Dict[str, Any], correct_key: str, total_key: str, accuracy_key: str) -> Dict[str, Any]:
-            """构建正确率统计条目"""
-            correct = stats_dict[correct_key]
-            total = stats_dict[total_key]
-            accuracy = stats_dict.get(accuracy_key, 0.0)
-            return {
-                correct_key: correct,
-                total_key: total,
-                accuracy_key: accuracy,
-                f'{accuracy_key}_percentage': f"{accuracy*100:.2f}%" if total > 0 else "0.00%"
-            }
-        
-        statistics_detail[path_type] = {
-            FIELD_CORRECT: correct,
-            FIELD_TOTAL: total,
-            FIELD_ACCURACY: stats[FIELD_ACCURACY],
-            'accuracy_percentage': f"{stats[FIELD_ACCURACY]*100:.2f}%",
-            'incorrect': incorrect,
-            'incorrect_percentage': f"{incorrect/total*100:.2f}%" if total > 0 else "0.00%",
-            **_build_accuracy_entry(stats, FIELD_MCQ_CORRECT, FIELD_MCQ_TOTAL, FIELD_MCQ_ACCURACY),
-            **_build_accuracy_entry(stats, FIELD_NONMCQ_CORRECT, FIELD_NONMCQ_TOTAL, FIELD_NONMCQ_ACCURACY),
-            **_build_accuracy_entry(stats, FIELD_YESNO_CORRECT, FIELD_YESNO_TOTAL, FIELD_YESNO_ACCURACY),
-            **_build_accuracy_entry(stats, FIELD_NUMERIC_CORRECT, FIELD_NUMERIC_TOTAL, FIELD_NUMERIC_ACCURACY),
-            FIELD_LINE_NUMBERS: line_numbers,
-            FIELD_CORRECT_LINE_NUMBERS: correct_line_numbers,
-            FIELD_INCORRECT_LINE_NUMBERS: incorrect_line_numbers
-        }
-    
-    return statistics_detail
+    return {path_type: stats_by_path[path_type] for path_type in sorted(stats_by_path)}
 
 
 def _save_output_file(
@@ -563,22 +1032,23 @@ def _save_output_file(
     statistics_detail = _build_statistics_detail(stats_by_path)
     overall_accuracy = total_correct / total_count if total_count > 0 else 0.0
     
+    summary = {
+        'total_count': total_count,
+        'total_correct': total_correct,
+        'total_incorrect': total_count - total_correct,
+        'overall_accuracy': overall_accuracy,
+        'overall_accuracy_percentage': f"{overall_accuracy*100:.2f}%" if total_count > 0 else "0.00%"
+    }
+    
     output_data = {
-        'summary': {
-            'total_count': total_count,
-            'total_correct': total_correct,
-            'total_incorrect': total_count - total_correct,
-            'overall_accuracy': overall_accuracy,
-            'overall_accuracy_percentage': f"{overall_accuracy*100:.2f}%" if total_count > 0 else "0.00%"
-        },
+        'summary': summary,
         'statistics_by_path': statistics_detail,
         'results': results
     }
     
+    # 逐个字段写入文件（results 逐条写入），不在内存中拼接整份 JSON 字符串
     with open(output_file, 'w', encoding='utf-8') as f:
-        json_str = json.dumps(output_data, ensure_ascii=False, indent=2)
-        json_str = _compress_line_number_arrays(json_str)
-        f.write(json_str)
+        _write_json_with_inline_line_numbers(f, output_data)
     
     print(f"\n详细结果已保存到: {output_file}")
 
@@ -587,7 +1057,8 @@ def match_and_calculate(
     result_file: str,
     enhancement_paths: Dict[str, Dict[str, Any]],
     output_file: Optional[str] = None,
-    test_file: Optional[str] = None
+    test_file: Optional[str] = None,
+    jobs: Optional[int] = None
 ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
     """
     匹配 result.jsonl 和增强路径，计算正确率
@@ -597,57 +1068,123 @@ def match_and_calculate(
         enhancement_paths: 问题到增强路径信息的映射
         output_file: 输出 JSON 文件路径，如果为 None 则不保存
         test_file: test.jsonl 文件路径（用于获取 is_mcq 信息），如果为 None 则不区分选择题和填空题
+        jobs: 计算正确率的并行进程数，为 None 时使用 CPU 核数，为 1 时串行计算
         
     Returns:
-        (结果列表, 按路径类型的统计字典) 元组
+        (结果列表, 按路径类型的统计字典) 元组；output_file 为 None 时结果列表为空
     """
     results: List[Dict[str, Any]] = []
-    stats_by_path: Dict[str, Dict[str, Any]] = defaultdict(_create_default_stat_entry)
+    stats_table = _create_stats_table()
     
     # 加载 test.jsonl 文件中的 is_mcq 和填空题类型映射（通过行号匹配）
-    is_mcq_map: Dict[int, bool] = {}
-    nonmcq_type_map: Dict[int, Optional[str]] = {}
+    is_mcq_codes = array('b')
+    nonmcq_codes = array('b')
     if test_file and os.path.exists(test_file):
-        is_mcq_map, nonmcq_type_map = load_test_is_mcq_mapping(test_file)
+        is_mcq_codes, nonmcq_codes = load_test_is_mcq_mapping(test_file)
     
-    with open(result_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            if not line.strip():
+    # 构建 question 子串匹配索引（只构建一次）
+    question_index = _build_question_index(enhancement_paths)
+    
+    # 同一 question 可能在多行中重复出现，缓存匹配结果：(路径类型, 工具列表, 统计表行号)
+    @lru_cache(maxsize=None)
+    def lookup_path(question: str) -> Tuple[str, List[str], int]:
+        path_info = _find_matching_question(question, enhancement_paths, question_index)
+        if path_info is None:
+            return PATH_TYPE_UNKNOWN, [], PATH_TYPE_INDEX[PATH_TYPE_UNKNOWN]
+        path_type = path_info.get(JSON_FIELD_PATH_TYPE, PATH_TYPE_UNKNOWN)
+        tools_used = path_info.get(JSON_FIELD_TOOLS, [])
+        return path_type, tools_used, _get_path_row(stats_table, path_type)
+    
+    # 解析所有记录（循环中频繁使用的函数与方法绑定为局部变量）
+    records: List[Dict[str, Any]] = []
+    record_line_numbers: List[int] = []
+    json_loads = _json_loads
+    append_record = records.append
+    append_record_line_number = record_line_numbers.append
+    with _open_sequential(result_file) as f:
+        for line in _iter_lines(f):
+            if not line or line.isspace():
                 continue
             
+            line_in_dataset = 0
             try:
-                record = json.loads(line.strip())
-                question = record.get(JSON_FIELD_QUESTION, '').strip()
+                record = json_loads(line)
                 line_in_dataset = record.get(JSON_FIELD_LINE_IN_DATASET, 0)
-                
-                # 从 test.jsonl 中获取 is_mcq 和填空题类型信息（通过行号匹配）
-                is_mcq = is_mcq_map.get(line_in_dataset) if is_mcq_map else None
-                nonmcq_type = nonmcq_type_map.get(line_in_dataset) if nonmcq_type_map else None
-                
-                # 匹配增强路径（使用子串匹配）
-                path_info = _find_matching_question(question, enhancement_paths)
-                if path_info is None:
-                    path_info = {JSON_FIELD_PATH_TYPE: PATH_TYPE_UNKNOWN, JSON_FIELD_TOOLS: []}
-                path_type = path_info.get(JSON_FIELD_PATH_TYPE, PATH_TYPE_UNKNOWN)
-                tools_used = path_info.get(JSON_FIELD_TOOLS, [])
-                
-                # 计算正确率
-                accuracy = _calculate_accuracy(record, line_in_dataset)
-                is_correct = accuracy == 1.0
-                
-                # 创建结果记录
-                result = _create_result_record(record, path_type, accuracy, tools_used)
-                results.append(result)
-                
-                # 更新统计（传入 is_mcq 和填空题类型信息）
-                _update_statistics(stats_by_path, path_type, line_in_dataset, is_correct, is_mcq, nonmcq_type)
-                
             except json.JSONDecodeError as e:
                 print(f"解析错误 (lineInDataset: {line_in_dataset}): {e}")
                 continue
+            
+            # 行号写入 array('q') 并参与大小比较，非 int 值先转换，无法转换的记录跳过
+            if type(line_in_dataset) is not int or not LINE_NUMBER_MIN <= line_in_dataset <= LINE_NUMBER_MAX:
+                line_in_dataset = _coerce_line_number(line_in_dataset)
+                if line_in_dataset is None:
+                    continue
+            
+            append_record(record)
+            append_record_line_number(line_in_dataset)
+    
+    # 计算正确率（记录之间相互独立，数量较多时使用多进程并行）
+    accuracies = _calculate_accuracies(records, record_line_numbers, jobs)
+    
+    # 逐条汇总：结果记录与统计更新直接在循环内完成（循环中用到的全局对象绑定为局部变量）
+    intern = sys.intern
+    append_result = results.append
+    truncate_answer = _truncate_answer
+    is_mcq_by_code = IS_MCQ_BY_CODE
+    nonmcq_type_by_code = NONMCQ_TYPE_BY_CODE
+    counter_columns_by_outcome = COUNTER_COLUMNS_BY_OUTCOME
+    num_type_codes = len(is_mcq_codes)
+    counter_rows = stats_table['counters']
+    lines_sorted = stats_table['lines_sorted']
+    line_number_rows = stats_table[FIELD_LINE_NUMBERS]
+    correct_mask_rows = stats_table['correct_mask']
+    
+    for record, line_in_dataset, accuracy in zip(records, record_line_numbers, accuracies):
+        question = intern(record.get(JSON_FIELD_QUESTION, '').strip())
+        
+        # 从 test.jsonl 中获取 is_mcq 和填空题类型信息（通过行号匹配）
+        if 0 <= line_in_dataset < num_type_codes:
+            is_mcq = is_mcq_by_code[is_mcq_codes[line_in_dataset]]
+            nonmcq_type = nonmcq_type_by_code[nonmcq_codes[line_in_dataset]]
+        else:
+            is_mcq = None
+            nonmcq_type = None
+        
+        # 匹配增强路径（使用子串匹配）
+        path_type, tools_used, row = lookup_path(question)
+        
+        is_correct = accuracy == 1.0
+        
+        # 创建结果记录（结果记录只用于写入输出文件，不保存时跳过）
+        if output_file:
+            result = {
+                JSON_FIELD_LINE_IN_DATASET: line_in_dataset,
+                'enhancement_path': path_type,
+                FIELD_ACCURACY: accuracy,
+                'is_correct': is_correct,
+                JSON_FIELD_EXPECTED_ANSWER: record.get(JSON_FIELD_EXPECTED_ANSWER, ''),
+                JSON_FIELD_ANSWER: truncate_answer(record.get(JSON_FIELD_ANSWER, ''))
+            }
+            if path_type == PATH_TYPE_TOOL and tools_used:
+                result[JSON_FIELD_TOOLS_USED] = tools_used
+            append_result(result)
+        
+        # 更新统计：需要加 1 的计数列由 (是否正确, 是否选择题, 填空题类型) 查表得到
+        counters = counter_rows[row]
+        for column in counter_columns_by_outcome[is_correct, is_mcq, nonmcq_type]:
+            counters[column] += 1
+        
+        # 结果通常按行号顺序到达；只有出现逆序时才需要在最后排序
+        row_line_numbers = line_number_rows[row]
+        if row_line_numbers and line_in_dataset < row_line_numbers[-1]:
+            lines_sorted[row] = False
+        row_line_numbers.append(line_in_dataset)
+        correct_mask_rows[row].append(is_correct)
+    
+    lookup_path.cache_clear()
     
     # 计算各路径的正确率
-    _calculate_path_accuracies(stats_by_path)
+    stats_by_path = _build_stats_by_path(stats_table)
     
     # 打印统计信息
     total_correct, total_count = _print_statistics_table(stats_by_path)
@@ -675,8 +1212,13 @@ def _generate_output_file_path(result_file: str) -> str:
     return os.path.join(result_dir, f"{result_basename}_accuracy_by_path.json")
 
 
-def main() -> None:
-    """主函数：解析命令行参数并执行计算"""
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    主函数：解析命令行参数并执行计算
+    
+    Args:
+        argv: 命令行参数列表（不含程序名），为 None 时使用 sys.argv
+    """
     parser = argparse.ArgumentParser(
         description="根据 thirdgen_dump.jsonl 获取每个问题的增强路径类型，匹配 result.jsonl 中的答案，计算正确率"
     )
@@ -698,7 +1240,15 @@ def main() -> None:
         default="Reason_Knowledge_Dataset/test.jsonl",
         help="test.jsonl 文件路径（用于获取 is_mcq 信息，默认: Reason_Knowledge_Dataset/test.jsonl）"
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="计算正确率的并行进程数（默认: CPU 核数；1 表示串行计算）"
+    )
+    args = parser.parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs 必须为正整数")
     
     # 生成输出文件路径
     output_file = _generate_output_file_path(args.result_file)
@@ -711,13 +1261,13 @@ def main() -> None:
     # 加载题目类型信息（如果文件存在）
     if args.test_file and os.path.exists(args.test_file):
         print(f"正在加载 test.jsonl 文件（用于区分选择题和填空题类型）...")
-        is_mcq_map, nonmcq_type_map = load_test_is_mcq_mapping(args.test_file)
-        print(f"已加载 {len(is_mcq_map)} 条记录的 is_mcq 信息")
-        print(f"已加载 {len(nonmcq_type_map)} 条填空题的类型信息")
+        is_mcq_codes, nonmcq_codes = load_test_is_mcq_mapping(args.test_file)
+        print(f"已加载 {len(is_mcq_codes) - is_mcq_codes.count(TYPE_CODE_MISSING)} 条记录的 is_mcq 信息")
+        print(f"已加载 {is_mcq_codes.count(0)} 条填空题的类型信息")
     
     # 匹配并计算正确率
     print("\n正在匹配并计算正确率...")
-    match_and_calculate(args.result_file, enhancement_paths, output_file, args.test_file)
+    match_and_calculate(args.result_file, enhancement_paths, output_file, args.test_file, args.jobs)
 
 
 if __name__ == "__main__":
@@ -6,12 +6,33 @@
 
 import argparse
 import json
+import math
+import mmap
 import os
 import re
-from typing import Any
+import shutil
+import stat
+import sys
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Any, BinaryIO, Iterator
 
 from loguru import logger
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时回退到标准库 json
+    orjson = None
+
+try:
+    import re2
+except ImportError:  # google-re2 为可选依赖，未安装时使用标准库 re
+    re2 = None
+
 # 常量定义
 DEFAULT_ANSWER_LENGTH = 26  # 默认答案选项数量（A-Z）
 ALPHABET_SIZE = 26  # 字母表大小
@@ -23,102 +44,249 @@ ZERO_THRESHOLD = 1e-10  # 零值判断阈值
 ZERO_ABS_ERROR_THRESHOLD = 1e-6  # 零值绝对误差阈值
 SMALL_VALUE_THRESHOLD = 10  # 小数值阈值
 SMALL_VALUE_ABS_ERROR = 0.01  # 小数值绝对误差阈值
+QUESTION_CLASS_CACHE_SIZE = 4096  # 题目类型判断的 LRU 缓存大小（按期望答案缓存，期望答案短且重复率高）
+PARALLEL_MIN_RECORDS = 1000  # 行数少于该值时串行评估，避免进程启动开销
+PARALLEL_CHUNK_SIZE = 256  # 每次发送给子进程的行数
+PARALLEL_PENDING_CHUNKS_PER_WORKER = 2  # 每个子进程最多排队的行块数（限制已读入但尚未写出的行数）
 
 # 题目类型常量
 QUESTION_CLASS_YES_NO = 1  # Yes/No 题目类型
 QUESTION_CLASS_NUMERIC = 2  # 数值题目类型
 QUESTION_CLASS_UNKNOWN = 0  # 未知题目类型
 
+# 选项字符查找表：下标 0-25 对应 'A'-'Z'，之后依次对应 '1'-'36'（与 answer_character 的换算规则一致）
+MAX_NUMERIC_OPTION = 36  # 查找表覆盖的最大数字选项
+_ANSWER_CHARS = tuple(chr(ord("A") + i) for i in range(ALPHABET_SIZE)) + tuple(
+    str(i) for i in range(1, MAX_NUMERIC_OPTION + 1)
+)
+_ANSWER_INDEX = {char: index for index, char in enumerate(_ANSWER_CHARS)}
+_ANSWER_INDEX.update({char.lower(): index for index, char in enumerate(_ANSWER_CHARS[:ALPHABET_SIZE])})
+# 允许的选项集合缓存：length -> frozenset（实际几乎总是默认的 26）
+_ALLOWED_OPTIONS_CACHE: dict[int, frozenset[str]] = {}
 
-def _fallback_parse_answer(completion: str) -> set[str] | None:
+# 设置环境变量 EVAL_OUTPUT_USE_RE2=1 且已安装 google-re2 时，答案提取正则改用 RE2（DFA 实现，线性时间）编译。
+# RE2 的 \d、\w、\b 只匹配 ASCII 字符，含非 ASCII 数字/字母的文本可能与标准库 re 结果不同，因此默认关闭
+USE_RE2 = re2 is not None and os.environ.get("EVAL_OUTPUT_USE_RE2") == "1"
+_regex = re2 if USE_RE2 else re
+
+# 预编译的正则表达式（模块加载时编译一次，避免每次调用都查找 re 的内部缓存）
+# 标志统一写成内联形式（(?i)、(?m)），以便 re 与 re2 共用同一组模式
+# 选择题答案：严格格式（单独一行的 "ANSWER: <answers>"）与宽松格式
+_ANSWER_STRICT_RE = _regex.compile(r"(?im)^ANSWER\s*:\s*([A-Za-z\d ,]+)\s*(?:$|\n|\.)")
+_ANSWER_LOOSE_RE = _regex.compile(r"(?i)ANSWER\s*:\s*([A-Za-z\d ,]+)(?:[^\w]|\n|$|\.)")
+# 填空题答案：严格格式与宽松格式（答案内容不限于选项字符）
+_TEXT_ANSWER_STRICT_RE = _regex.compile(r"(?im)^ANSWER\s*:\s*(.+?)\s*(?:$|\n|\.)")
+_TEXT_ANSWER_LOOSE_RE = _regex.compile(r"(?i)ANSWER\s*:\s*(.+?)(?:[^\w]|\n|$|\.)")
+_FINAL_TAG_RE = _regex.compile(r"<final>(.*?)</final>")
+_YES_NO_RE = _regex.compile(r"(?i)\b(yes|no)\b")
+_NUM_RE = _regex.compile(r"-?\d+\.?\d*(?:[eE][+-]?\d+)?")
+_ASCII_UPPER_RE = re.compile("[A-Z]")
+
+# 连续 19 位以上的数字可能是超出 64 位范围的整数，orjson 会把它解析成 float。
+# bytes 行先用转换表把数字映射为 b"0"、其余字节映射为 b"-"，再查找连续的 b"0"（比正则扫描快得多）
+_LONG_DIGITS_RE = re.compile("[0-9]{19}")
+_DIGIT_MASK_TABLE = bytes(0x30 if 0x30 <= b <= 0x39 else 0x2D for b in range(256))
+_LONG_DIGIT_RUN = b"0" * 19
+
+
+def _json_loads(line: str | bytes) -> Any:
+    """解析 JSONL 中的一行，结果始终与标准库 json.loads 相同。
+    
+    orjson 不接受 NaN/Infinity（json.dumps 默认会写出这些值），并且会把超出 64 位的整数转成 float，
+    因此 orjson 解析失败或行中含有超长数字串时改用标准库 json 解析，评估结果不依赖是否安装 orjson。
+    
+    Args:
+        line: JSONL 中的一行（bytes 或 str）
+        
+    Returns:
+        解析得到的对象
+        
+    Raises:
+        json.JSONDecodeError: 该行不是合法的 JSON
+    """
+    if orjson is not None:
+        if isinstance(line, bytes):
+            has_long_digits = _LONG_DIGIT_RUN in line.translate(_DIGIT_MASK_TABLE)
+        else:
+            has_long_digits = _LONG_DIGITS_RE.search(line) is not None
+        if not has_long_digits:
+            try:
+                return orjson.loads(line)
+            except orjson.JSONDecodeError:
+                pass
+    return json.loads(line)
+
+
+def _has_non_finite_float(data: Any) -> bool:
+    """检查数据中是否含有 NaN/Infinity（orjson 会把它们写成 null，标准库 json 写出 NaN/Infinity）。
+    
+    Args:
+        data: 待序列化的数据
+        
+    Returns:
+        含有非有限浮点数时返回 True
+    """
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(map(_has_non_finite_float, data.values()))
+    if isinstance(data, (list, tuple)):
+        return any(map(_has_non_finite_float, data))
+    return False
+
+
+def _last_uppercase_letter(completion: str) -> str | None:
     """回退方法：从文本中查找最后一个大写字母作为答案。
     
     Args:
         completion: 模型输出的文本
         
     Returns:
-        包含单个大写字母的集合，如果未找到则返回 None
+        最后一个大写字母，如果未找到则返回 None
     """
+    if completion.isascii():
+        # ASCII 文本中 isupper() 等价于 [A-Z]：在反转后的字符串上用正则查找第一个大写字母，
+        # 整个扫描在 C 层完成，避免逐字符的 Python 循环
+        match = _ASCII_UPPER_RE.search(completion[::-1])
+        return match.group() if match else None
     for letter in reversed(completion):
         if letter.isupper():
-            return {letter}
+            return letter
     return None
 
 
-def parse_answers(
-    text: str, length: int = DEFAULT_ANSWER_LENGTH, multiple_correct: bool = False
-) -> set[str]:
-    """从模型输出中提取选择题答案。
+def _fallback_parse_answer(completion: str) -> set[str] | None:
+    """回退方法：以集合形式返回文本中的最后一个大写字母（见 _last_uppercase_letter）。
     
-    生成的响应必须符合 'ANSWER: <answers>' 格式，否则无法提取模型认为的"正确答案"。
-    可以灵活处理 "AB"、"A,B"、"A B" 等格式。
+    Args:
+        completion: 模型输出的文本
+        
+    Returns:
+        包含单个大写字母的集合，如果未找到则返回 None
+    """
+    letter = _last_uppercase_letter(completion)
+    return {letter} if letter is not None else None
+
+
+def _allowed_options(length: int) -> frozenset[str]:
+    """返回前 length 个选项字符组成的集合（按 length 缓存，实际几乎总是默认的 26）。
     
-    如果答案不符合预期格式，模型任务失败，最终会被标记为不正确。
+    Args:
+        length: 答案选项数量
+        
+    Returns:
+        允许的选项字符集合
+    """
+    allowed_options = _ALLOWED_OPTIONS_CACHE.get(length)
+    if allowed_options is None:
+        allowed_options = frozenset(answer_character(i) for i in range(length))
+        _ALLOWED_OPTIONS_CACHE[length] = allowed_options
+    return allowed_options
+
+
+def _find_answer_token(text: str) -> int:
+    """查找第一个 "answer"（忽略大小写）出现的位置，用于预筛选并缩小 ANSWER 正则的扫描范围。
+    
+    ANSWER 正则的任何匹配都必须从某个 "answer" 出现处开始，因此从第一次出现处开始搜索与从头搜索结果相同。
+    使用 casefold() 是因为 (?i) 还会把长 s 'ſ' 等字符当作 'S' 匹配；casefold 可能改变非 ASCII 文本的长度，
+    此时下标无法对应回原文本，返回 0（从头搜索）。
     
     Args:
         text: 模型输出的文本
-        length: 答案选项数量（默认26，即A-Z）
-        multiple_correct: 是否为多选题
         
     Returns:
-        提取的答案集合（字母集合，如 {'A', 'B'}）
+        可以开始搜索的位置，文本中不含 "answer" 时返回 -1
     """
-    # First check whether the string strictly ends with the expected answer
-    # In this case, we're looking for a single line which contains the expected
-    # ANSWER: <answer> string with only whitespace or a period/full stop at the end.
-    match = re.search(
-        r"(?i)^ANSWER\s*:\s*([A-Za-z\d ,]+)\s*(?:$|\n|\.)",
-        text,
-        flags=re.MULTILINE,
-    )
+    pos = text.casefold().find("answer")
+    if pos > 0 and not text.isascii():
+        return 0
+    return pos
 
-    # If we couldn't match the strict version, we can try the less strict
-    # version for backward compatibility
-    if match is None:
-        match = re.search(
-            r"(?i)ANSWER\s*:\s*([A-Za-z\d ,]+)(?:[^\w]|\n|$|\.)",
-            text,
-        )
 
-    if match is None:
-        match = re.search(
-            r"<final>(.*?)</final>",
-            text,
-        )
+def _match_choice_answer(text: str) -> str | None:
+    """在模型输出中查找 'ANSWER: <answers>' 或 <final> 标签中的选择题答案文本。
+    
+    Args:
+        text: 模型输出的文本
+        
+    Returns:
+        匹配到的答案文本（已去除首尾空白和末尾句号），未匹配时返回 None
+    """
+    # Cheap literal prefilter: both ANSWER patterns need "answer" and the <final>
+    # pattern needs "<final>", so skip the regex scans when neither occurs.
+    answer_pos = _find_answer_token(text)
+    if answer_pos < 0 and "<final>" not in text:
+        return None
 
-    if match is None:
-        fallback_answer = _fallback_parse_answer(text)
-        if fallback_answer:
-            return fallback_answer
+    match = None
+    if answer_pos >= 0:
+        # Every strict match is also a loose match at the same position, so a
+        # single loose scan decides whether either can match, and the first
+        # strict match cannot start before the first loose one.
+        loose_match = _ANSWER_LOOSE_RE.search(text, answer_pos)
+        if loose_match is not None:
+            # First check whether the string strictly ends with the expected answer
+            # In this case, we're looking for a single line which contains the expected
+            # ANSWER: <answer> string with only whitespace or a period/full stop at the end.
+            # If we couldn't match the strict version, we use the less strict
+            # version for backward compatibility
+            match = _ANSWER_STRICT_RE.search(text, loose_match.start()) or loose_match
+
+    if match is None and "<final>" in text:
+        match = _FINAL_TAG_RE.search(text)
 
     if match is None:
-        return set()
+        return None
 
     matched = match.group(1)
 
     # Strip trailing period / full stop
     matched = matched.strip()
-    matched = matched.rstrip(".")
+    return matched.rstrip(".")
+
+
+def parse_answers(
+    text: str, length: int = DEFAULT_ANSWER_LENGTH, multiple_correct: bool = False
+) -> set[str]:
+    """从模型输出中提取选择题答案。
+    
+    生成的响应必须符合 'ANSWER: <answers>' 格式，否则无法提取模型认为的"正确答案"。
+    可以灵活处理 "AB"、"A,B"、"A B" 等格式。
+    
+    如果答案不符合预期格式，模型任务失败，最终会被标记为不正确。
+    
+    Args:
+        text: 模型输出的文本
+        length: 答案选项数量（默认26，即A-Z）
+        multiple_correct: 是否为多选题
+        
+    Returns:
+        提取的答案集合（字母集合，如 {'A', 'B'}）
+    """
+    matched = _match_choice_answer(text)
+    if matched is None:
+        return _fallback_parse_answer(text) or set()
 
-    allowed_options = set(answer_character(i) for i in range(length))
+    allowed_options = _allowed_options(length)
 
     if multiple_correct:
         # Match must contain only the allowed choices
         # (may be separated by commas, spaces, the word 'and', or nothing at all)
 
-        matched = matched.replace(" and ", "")
-
-        matched = matched.replace(" ", "")
+        matched = matched.replace(" and ", "").replace(" ", "")
 
         split_comma = set(matched.split(","))
         if split_comma.issubset(allowed_options):
             answers = split_comma
             return answers
 
-        split_nothing = set(matched)
-        if split_nothing.issubset(allowed_options):
-            answers = split_nothing
-            return answers
+        # A comma is never an allowed option, so splitting into single
+        # characters can only succeed when there is none
+        if "," not in matched:
+            split_nothing = set(matched)
+            if split_nothing.issubset(allowed_options):
+                answers = split_nothing
+                return answers
 
     else:
         # Match must contain a single letter in the allowed choices
@@ -129,6 +297,22 @@ def parse_answers(
     return set()
 
 
+def _parse_single_answer(text: str, length: int = DEFAULT_ANSWER_LENGTH) -> str | None:
+    """单选题的答案提取：与 parse_answers(text, length) 规则相同，但直接返回单个选项而不构造集合。
+    
+    Args:
+        text: 模型输出的文本
+        length: 答案选项数量（默认26，即A-Z）
+        
+    Returns:
+        提取的选项字符，无法提取时返回 None
+    """
+    matched = _match_choice_answer(text)
+    if matched is None:
+        return _last_uppercase_letter(text)
+    return matched if matched in _allowed_options(length) else None
+
+
 def answer_character(index: int) -> str:
     """将数组索引转换为字符。
     
@@ -146,6 +330,9 @@ def answer_character(index: int) -> str:
         >>> answer_character(26)
         '1'
     """
+    if 0 <= index < len(_ANSWER_CHARS):
+        return _ANSWER_CHARS[index]
+    # 超出查找表范围时按原规则换算
     if index < ALPHABET_SIZE:
         return chr(ord("A") + index)
     return str(index - ALPHABET_SIZE + 1)
@@ -171,6 +358,10 @@ def answer_index(char: str) -> int:
         >>> answer_index('1')
         26
     """
+    index = _ANSWER_INDEX.get(char)
+    if index is not None:
+        return index
+    # 查找表之外的字符按原规则换算
     if char.isalpha():
         return ord(char.upper()) - ord("A")
     if char.isnumeric():
@@ -207,23 +398,20 @@ def extract_text_answer(
             return text
     
     # 尝试匹配 ANSWER: 后面的内容（不限制为选择题格式）
-    match = re.search(
-        r"(?i)^ANSWER\s*:\s*(.+?)\s*(?:$|\n|\.)",
-        text,
-        flags=re.MULTILINE,
-    )
-    
-    if match is None:
-        match = re.search(
-            r"(?i)ANSWER\s*:\s*(.+?)(?:[^\w]|\n|$|\.)",
-            text,
-        )
+    # 先用子串检查做预筛选：文本中不含 "answer"（忽略大小写）时不可能匹配 ANSWER 正则，
+    # 不含 "<final>" 时不可能匹配 final 标签，直接跳过对应的正则扫描；
+    # 否则从第一个 "answer" 处开始搜索，跳过前面不可能匹配的长文本。
+    # 严格格式的每个匹配位置同时也是宽松格式的匹配位置，因此先做一次宽松搜索：
+    # 未命中时严格格式也不可能命中；命中时严格格式只需从该位置起搜索（仍优先采用严格格式的结果）
+    match = None
+    answer_pos = _find_answer_token(text)
+    if answer_pos >= 0:
+        loose_match = _TEXT_ANSWER_LOOSE_RE.search(text, answer_pos)
+        if loose_match is not None:
+            match = _TEXT_ANSWER_STRICT_RE.search(text, loose_match.start()) or loose_match
     
-    if match is None:
-        match = re.search(
-            r"<final>(.*?)</final>",
-            text,
-        )
+    if match is None and "<final>" in text:
+        match = _FINAL_TAG_RE.search(text)
     
     # 如果找到了匹配的答案，先提取出来，但要根据题目类型进行验证
     answer_from_match = None
@@ -237,8 +425,7 @@ def extract_text_answer(
         # Yes/No 题目：优先使用匹配的答案，但需要验证是否为 yes/no
         if answer_from_match:
             # 检查匹配的答案是否包含 yes/no（严格匹配，不处理 true/false）
-            yes_no_pattern = r'\b(yes|no)\b'
-            match_in_answer = re.search(yes_no_pattern, answer_from_match, re.IGNORECASE)
+            match_in_answer = _YES_NO_RE.search(answer_from_match)
             if match_in_answer:
                 matched = match_in_answer.group(1).lower()
                 return matched
@@ -246,8 +433,7 @@ def extract_text_answer(
             return answer_from_match
         
         # 如果没有 ANSWER: 格式，尝试在整个文本中匹配（严格匹配 yes/no）
-        yes_no_pattern = r'\b(yes|no)\b'
-        match = re.search(yes_no_pattern, text, re.IGNORECASE)
+        match = _YES_NO_RE.search(text)
         if match:
             matched = match.group(1).lower()
             return matched
@@ -258,15 +444,14 @@ def extract_text_answer(
         # 数值题目：优先使用 ANSWER: 中的内容，但需要验证是否为数值
         if answer_from_match:
             # 检查匹配的答案是否包含数值
-            num_match_in_answer = re.search(r'-?\d+\.?\d*(?:[eE][+-]?\d+)?', answer_from_match)
+            num_match_in_answer = _NUM_RE.search(answer_from_match)
             if num_match_in_answer:
                 return num_match_in_answer.group()
             # 如果匹配的答案中没有数值，返回匹配的答案本身（不继续搜索）
             return answer_from_match
         
-        # 如果没有匹配到答案，从最后50个字符中提取数值
-        last_50_chars = text[-50:] if len(text) > 50 else text
-        num_match = re.search(r'-?\d+\.?\d*(?:[eE][+-]?\d+)?', last_50_chars)
+        # 如果没有匹配到答案，从最后50个字符中提取数值（通过 pos 参数限定搜索范围，无需切片复制）
+        num_match = _NUM_RE.search(text, max(0, len(text) - 50))
         if num_match:
             return num_match.group()
         # 如果没找到匹配，返回空字符串（不继续 fallback）
@@ -304,23 +489,36 @@ def parse_digits(num: str | int | float) -> float | None:
     Returns:
         解析后的浮点数，如果无法解析则返回 None
     """
-    num_str = re.sub(',', '', str(num))
+    # 快速路径：浮点数本身无需经过字符串转换；不含逗号和百分号的常见情况一次 float() 即可
+    if type(num) is float:
+        return num
+    num_str = str(num)
     try:
         return float(num_str)
-    except (ValueError, TypeError):
-        if num_str.endswith('%'):
+    except ValueError:
+        pass
+    
+    # 逗号不可能出现在合法的 float 字面量中，只有上面解析失败时才需要去除
+    if ',' in num_str:
+        num_str = num_str.replace(',', '')
+        try:
+            return float(num_str)
+        except ValueError:
+            pass
+    
+    if num_str.endswith('%'):
+        num_str = num_str[:-1]
+        if num_str.endswith('\\'):
             num_str = num_str[:-1]
-            if num_str.endswith('\\'):
-                num_str = num_str[:-1]
-            try:
-                return float(num_str) / 100
-            except (ValueError, TypeError):
-                pass
+        try:
+            return float(num_str) / 100
+        except ValueError:
+            pass
     return None
 
 
 def is_digit(num: str | int | float) -> bool:
-    """检查字符串是否可以解析为数字（与 parse_digits 配对使用）。
+    """检查字符串是否可以解析为数字（parse_digits 的简单封装，需要数值时直接调用 parse_digits 避免重复解析）。
     
     Args:
         num: 待检查的字符串或数字
@@ -331,6 +529,55 @@ def is_digit(num: str | int | float) -> bool:
     return parse_digits(num) is not None
 
 
+def _within_tolerance(pred_num: float, item: float, rel_tol: float) -> bool:
+    """判断预测值与单个参考值是否在容差范围内相等。
+    
+    Args:
+        pred_num: 预测数值
+        item: 参考数值（ref_num 或其百分比换算形式）
+        rel_tol: 相对误差容差
+        
+    Returns:
+        在容差范围内则返回 True（浮点运算不会抛出异常：inf/nan 参与比较时结果均为 False）
+    """
+    abs_item = abs(item)
+    abs_error = abs(pred_num - item)
+    
+    # 如果参考值为0，只使用绝对误差
+    if abs_item < ZERO_THRESHOLD:
+        return abs_error < ZERO_ABS_ERROR_THRESHOLD
+    
+    # 使用相对误差容差进行比较；对于小数值，也考虑绝对误差
+    return abs_error / abs_item < rel_tol or (
+        abs_item < SMALL_VALUE_THRESHOLD and abs_error < SMALL_VALUE_ABS_ERROR
+    )
+
+
+def _numeric_values_match(
+    pred_num: float,
+    ref_num: float,
+    include_percentage: bool = True,
+    rel_tol: float = DEFAULT_REL_TOL
+) -> bool:
+    """判断两个已解析的数值是否在容差范围内相等（纯数值计算，不涉及字符串处理）。
+    
+    Args:
+        pred_num: 预测数值
+        ref_num: 参考数值
+        include_percentage: 是否考虑 ref_num/100, ref_num, ref_num*100 三种形式
+        rel_tol: 相对误差容差
+        
+    Returns:
+        任一形式的参考值与预测值匹配则返回 True
+    """
+    # 结果与比较顺序无关，因此先比较最常命中的原值，命中后不再构造百分比换算形式
+    if _within_tolerance(pred_num, ref_num, rel_tol):
+        return True
+    if not include_percentage:
+        return False
+    return _within_tolerance(pred_num, ref_num / 100, rel_tol) or _within_tolerance(pred_num, ref_num * 100, rel_tol)
+
+
 def internal_numeric_acc(
     prediction: str,
     reference: str,
@@ -361,47 +608,15 @@ def internal_numeric_acc(
         return 1.0
     
     try:
-        # 检查是否都是数字格式
-        if is_digit(prediction) and is_digit(reference):
-            pred_num = parse_digits(prediction)
-            ref_num = parse_digits(reference)
-            
-            if pred_num is None or ref_num is None:
-                return 0.0
-            
-            # 如果 include_percentage=True，考虑 reference 的多种形式
-            if include_percentage:
-                # 考虑 reference/100, reference, reference*100 三种形式
-                gt_results = [ref_num / 100, ref_num, ref_num * 100]
-            else:
-                gt_results = [ref_num]
-            
-            # 对每种可能的参考值进行比较
-            for item in gt_results:
-                try:
-                    abs_error = abs(pred_num - item)
-                    
-                    # 如果参考值为0，只使用绝对误差
-                    if abs(item) < ZERO_THRESHOLD:
-                        if abs_error < ZERO_ABS_ERROR_THRESHOLD:
-                            return 1.0
-                        continue
-                    
-                    # 计算相对误差
-                    rel_error = abs_error / abs(item)
-                    
-                    # 使用相对误差容差进行比较
-                    if rel_error < rel_tol:
-                        return 1.0
-                    
-                    # 对于小数值，也考虑绝对误差
-                    if abs(item) < SMALL_VALUE_THRESHOLD and abs_error < SMALL_VALUE_ABS_ERROR:
-                        return 1.0
-                        
-                except (ZeroDivisionError, ValueError, TypeError):
-                    continue
-            
+        # 每个值只解析一次：无法解析（返回 None）即不是数字格式
+        pred_num = parse_digits(prediction)
+        if pred_num is None:
             return 0.0
+        ref_num = parse_digits(reference)
+        if ref_num is None:
+            return 0.0
+        
+        return 1.0 if _numeric_values_match(pred_num, ref_num, include_percentage, rel_tol) else 0.0
     except (ValueError, TypeError):
         pass
     
@@ -424,7 +639,21 @@ def determine_question_class(_record: dict[str, Any], expected_answer: str) -> i
         题目类型：QUESTION_CLASS_YES_NO (1), QUESTION_CLASS_NUMERIC (2), 
         QUESTION_CLASS_UNKNOWN (0)
     """
-    expected_str = str(expected_answer).strip()
+    return _determine_question_class(str(expected_answer))
+
+
+@lru_cache(maxsize=QUESTION_CLASS_CACHE_SIZE)
+def _determine_question_class(expected_answer: str) -> int:
+    """determine_question_class 的实现，结果按期望答案字符串缓存（不依赖记录字典）。
+    
+    Args:
+        expected_answer: 期望答案的字符串形式
+        
+    Returns:
+        题目类型：QUESTION_CLASS_YES_NO (1), QUESTION_CLASS_NUMERIC (2), 
+        QUESTION_CLASS_UNKNOWN (0)
+    """
+    expected_str = expected_answer.strip()
     expected_lower = expected_str.lower()
     
     # 检查是否是 yes/no 类型（严格判断：只识别 "Yes" 或 "No"）
@@ -447,10 +676,9 @@ def _print_mismatch_info(
     expected: str,
     predicted: str | set[str],
     text_snippet: str,
-    metric_name: str | None = None,
-    verbose: bool = False
+    metric_name: str | None = None
 ) -> None:
-    """打印答案不匹配的信息。
+    """打印答案不匹配的信息（调用方仅在 verbose 模式下调用）。
     
     Args:
         line_num: 行号
@@ -458,19 +686,16 @@ def _print_mismatch_info(
         predicted: 预测答案
         text_snippet: 答案文本片段（最后50字符）
         metric_name: 评估指标名称（可选）
-        verbose: 是否输出打印信息（默认 False）
     """
-    if not verbose:
-        return
-    
-    if metric_name:
-        print(f"[行 {line_num}] 答案不匹配 ({metric_name}):")
-    else:
-        print(f"[行 {line_num}] 答案不匹配:")
-    print(f"  期望答案: {expected}")
-    print(f"  预测答案: {predicted}")
-    print(f"  答案文本 (最后50字符): {text_snippet}")
-    print("")
+    header = f"[行 {line_num}] 答案不匹配 ({metric_name}):" if metric_name else f"[行 {line_num}] 答案不匹配:"
+    # 拼接成一个字符串后一次写出，避免多次 print 调用
+    sys.stdout.write(
+        f"{header}\n"
+        f"  期望答案: {expected}\n"
+        f"  预测答案: {predicted}\n"
+        f"  答案文本 (最后50字符): {text_snippet}\n"
+        "\n"
+    )
 
 
 def process_line(record: dict[str, Any], verbose: bool = False) -> tuple[float, dict[str, Any]]:
@@ -502,6 +727,8 @@ def process_line(record: dict[str, Any], verbose: bool = False) -> tuple[float,
         }
     
     line_num = record.get("lineInDataset", "未知")
+    # 答案文本片段（最后50字符）只计算一次，供详细信息和不匹配输出复用
+    snippet = text[-50:] if len(text) > 50 else text
     
     target_str = str(target)
     is_mcq = False
@@ -516,32 +743,32 @@ def process_line(record: dict[str, Any], verbose: bool = False) -> tuple[float,
     if is_mcq:
         if len(target_str) == 1:
             # Single choice question
-            prediction = parse_answers(text)
-            is_correct = target_str in prediction
+            prediction = _parse_single_answer(text)
+            is_correct = prediction == target_str
             accuracy = 1.0 if is_correct else 0.0
             
             detail = {
                 "lineInDataset": line_num,
                 "expectedAnswer": target,
-                "prediction": list(prediction),
+                "prediction": [prediction] if prediction is not None else [],
                 "accuracy": accuracy,
                 "is_correct": is_correct,
                 "question_type": "single_choice",
-                "answer_text_last50": text[-50:] if len(text) > 50 else text
+                "answer_text_last50": snippet
             }
             
-            if not is_correct:
+            if verbose and not is_correct:
                 _print_mismatch_info(
-                    line_num, target_str, prediction, text[-50:] if len(text) > 50 else text, verbose=verbose
+                    line_num, target_str, {prediction} if prediction is not None else set(), snippet
                 )
             
             return accuracy, detail
         else:
             # Multiple choice question
             prediction = parse_answers(text, DEFAULT_ANSWER_LENGTH, multiple_correct=True)
-            den = len(
-                parse_answers(f"ANSWER: {target_str}", DEFAULT_ANSWER_LENGTH, multiple_correct=True)
-            )
+            # 多选题目标已校验为逗号分隔的单个大写字母，直接拆分即可得到期望选项集合，无需再走一遍答案解析
+            target_options = frozenset(target_str.split(","))
+            den = len(target_options)
             if den == 0:
                 msg = f"Target contains no options. target: {target_str}. This answer will be viewed as incorrect. (lineInDataset: {line_num})"
                 logger.warning(msg)
@@ -554,10 +781,7 @@ def process_line(record: dict[str, Any], verbose: bool = False) -> tuple[float,
                     "question_type": "multiple_choice",
                     "error": msg
                 }
-            num = 0
-            for candidate in prediction:
-                if candidate in target_str:
-                    num += 1
+            num = len(prediction & target_options)
             accuracy = num / den
             
             detail = {
@@ -569,7 +793,7 @@ def process_line(record: dict[str, Any], verbose: bool = False) -> tuple[float,
                 "question_type": "multiple_choice",
                 "partial_correct": num,
                 "total_expected": den,
-                "answer_text_last50": text[-50:] if len(text) > 50 else text
+                "answer_text_last50": snippet
             }
             
             return accuracy, detail
@@ -602,32 +826,181 @@ def process_line(record: dict[str, Any], verbose: bool = False) -> tuple[float,
             "is_correct": is_correct,
             "question_class": question_class,
             "metric_used": metric_name,
-            "answer_text_last50": text[-50:] if len(text) > 50 else text
+            "answer_text_last50": snippet
         }
         
-        if not is_correct:
+        if verbose and not is_correct:
             _print_mismatch_info(
                 line_num,
                 target,
                 prediction_text,
-                text[-50:] if len(text) > 50 else text,
-                metric_name,
-                verbose=verbose
+                snippet,
+                metric_name
             )
         
         return accuracy, detail
 
 
-def main() -> None:
+def _iter_file_lines(f: BinaryIO) -> Iterator[bytes]:
+    """通过 mmap 逐行读取二进制文件（保留行尾 b'\\n'），每行只在交给 JSON 解析时才解码。
+    
+    mmap 不支持空文件以及管道等非普通文件，这些情况下退回到按文件对象逐行读取。
+    
+    Args:
+        f: 以二进制模式打开的文件对象
+        
+    Yields:
+        文件中的每一行（bytes）
+    """
+    file_stat = os.fstat(f.fileno())
+    if file_stat.st_size == 0 or not stat.S_ISREG(file_stat.st_mode):
+        yield from f
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield from iter(mm.readline, b"")
+
+
+def _process_json_line(line: str | bytes, verbose: bool = False) -> tuple[float, dict[str, Any]] | None:
+    """解析并评估 JSONL 中的一行（定义在模块顶层，以便多进程评估时传给子进程）。
+    
+    Args:
+        line: JSONL 中的一行（bytes 或 str）
+        verbose: 是否输出打印信息（默认 False）
+        
+    Returns:
+        (正确率, 详细信息字典)；JSON 解析失败时记录错误并返回 None
+    """
+    try:
+        record = _json_loads(line)
+    except json.JSONDecodeError as e:
+        logger.error(f"解析 JSON 行失败: {e}")
+        return None
+    return process_line(record, verbose=verbose)
+
+
+def _process_json_chunk(lines: list[bytes]) -> list[tuple[float, dict[str, Any]] | None]:
+    """在子进程中依次评估一块行。
+    
+    Args:
+        lines: JSONL 中连续的若干行
+        
+    Returns:
+        与行一一对应的评估结果列表
+    """
+    return [_process_json_line(line) for line in lines]
+
+
+def _process_lines_parallel(
+    lines: Iterator[bytes], workers: int
+) -> Iterator[tuple[float, dict[str, Any]] | None]:
+    """使用多进程按原顺序评估所有行，边读入边产出结果。
+    
+    行按 PARALLEL_CHUNK_SIZE 分块提交，同时处理中的块不超过 workers * PARALLEL_PENDING_CHUNKS_PER_WORKER，
+    最早提交的块完成后才继续读入，因此内存占用与文件大小无关。
+    子进程无法启动或中途异常退出时，尚未产出结果的行改为串行评估。
+    
+    Args:
+        lines: JSONL 文件的行迭代器
+        workers: 并行进程数
+        
+    Yields:
+        与行一一对应的评估结果
+    """
+    max_pending = workers * PARALLEL_PENDING_CHUNKS_PER_WORKER
+    pending_chunks: deque[list[bytes]] = deque()
+    futures: deque[Future[list[tuple[float, dict[str, Any]] | None]]] = deque()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk in iter(lambda: list(islice(lines, PARALLEL_CHUNK_SIZE)), []):
+                # 先登记再提交：提交失败时该块也会在下面改为串行评估
+                pending_chunks.append(chunk)
+                futures.append(executor.submit(_process_json_chunk, chunk))
+                if len(futures) >= max_pending:
+                    results = futures[0].result()
+                    futures.popleft()
+                    pending_chunks.popleft()
+                    yield from results
+            while futures:
+                results = futures[0].result()
+                futures.popleft()
+                pending_chunks.popleft()
+                yield from results
+    except (OSError, BrokenProcessPool) as e:
+        logger.warning(f"多进程评估失败，改为串行评估: {e}")
+        for chunk in pending_chunks:
+            yield from map(_process_json_line, chunk)
+        yield from map(_process_json_line, lines)
+
+
+def _dumps_indented(data: Any, level: int) -> bytes:
+    """将数据序列化为缩进2格的 JSON（UTF-8，保留非 ASCII 字符），并把换行后的内容整体缩进 level 层。
+    
+    JSON 字符串中的换行都会被转义，因此替换换行符只影响格式缩进，用于把片段拼接到外层 JSON 中。
+    
+    Args:
+        data: 待序列化的数据
+        level: 额外缩进的层数（每层2个空格）
+        
+    Returns:
+        JSON 片段（bytes）
+    """
+    dumped = None
+    if orjson is not None:
+        try:
+            dumped = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # 超出 64 位的整数、含孤立代理项的字符串等 orjson 无法写出的值
+            pass
+        else:
+            # NaN/Infinity 被 orjson 写成 null，只有输出中出现 null 时才需要检查
+            if b"null" in dumped and _has_non_finite_float(data):
+                dumped = None
+    if dumped is None:
+        dumped = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    return dumped.replace(b"\n", b"\n" + b"  " * level)
+
+
+def _write_eval_result(
+    f: BinaryIO, summary: dict[str, Any], results_file: BinaryIO, result_count: int
+) -> None:
+    """写出评估结果文件，格式与 json.dump({"summary": ..., "results": [...]}, indent=2) 相同。
+    
+    Args:
+        f: 以二进制模式打开的输出文件
+        summary: 统计信息字典
+        results_file: 已逐条写入各结果 JSON 片段（以逗号分隔）的临时文件
+        result_count: 结果条数
+    """
+    f.write(b'{\n  "summary": ' + _dumps_indented(summary, 1) + b',\n  "results": ')
+    if result_count:
+        f.write(b"[")
+        results_file.seek(0)
+        shutil.copyfileobj(results_file, f)
+        f.write(b"\n  ]")
+    else:
+        f.write(b"[]")
+    f.write(b"\n}")
+
+
+def main(argv: list[str] | None = None) -> None:
     """主函数：处理评估文件并生成评估结果。
     
     从输入的 JSONL 文件中读取记录，评估每条记录的正确率，
     并生成包含统计信息和详细结果的 JSON 文件。
+    
+    Args:
+        argv: 命令行参数列表（不含程序名），为 None 时使用 sys.argv
     """
     parser = argparse.ArgumentParser(description="评估模型输出结果")
     parser.add_argument("file_path", type=str, help="输入 JSONL 文件路径")
     parser.add_argument("--verbose", "-v", action="store_true", default=False, help="是否输出打印信息（默认不输出）")
-    args = parser.parse_args()
+    parser.add_argument(
+        "--jobs", type=int, default=1,
+        help="并行评估的进程数（默认: 1，即串行评估；指定 --verbose 时始终串行以保持输出顺序）"
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs 必须为正整数")
 
     file = args.file_path
     # 输出文件默认在输入文件同目录
@@ -637,50 +1010,61 @@ def main() -> None:
     base_name = os.path.splitext(input_basename)[0]
     output_file = os.path.join(input_dir, f"{base_name}_eval_result.json")
     
-    results: list[dict[str, Any]] = []
     total_count = 0
     correct_count = 0
     total_accuracy = 0.0
     
+    # 详细结果评估完一条就序列化写入临时文件，最后再拼接到输出文件中；
+    # 串行评估逐行读入，并行评估同时处理中的行数有上限，两种方式的内存占用都与记录数无关
+    results_file = tempfile.TemporaryFile()
     try:
-        with open(file, "r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    record = json.loads(line)
-                    total_count += 1
-                    acc, detail = process_line(record, verbose=args.verbose)
-                    results.append(detail)
-                    total_accuracy += acc
-                    if acc == 1.0:
-                        correct_count += 1
-                except json.JSONDecodeError as e:
-                    logger.error(f"解析 JSON 行失败: {e}")
+        with open(file, "rb") as f:
+            lines = _iter_file_lines(f)
+            if args.jobs > 1 and not args.verbose:
+                # 先读入至多 PARALLEL_MIN_RECORDS 行：行数较少时串行评估，避免进程启动开销
+                head = list(islice(lines, PARALLEL_MIN_RECORDS))
+                lines = chain(head, lines)
+                if len(head) >= PARALLEL_MIN_RECORDS:
+                    evaluations = _process_lines_parallel(lines, args.jobs)
+                else:
+                    evaluations = map(_process_json_line, lines)
+            else:
+                evaluations = (_process_json_line(line, args.verbose) for line in lines)
+            
+            for evaluation in evaluations:
+                if evaluation is None:
                     continue
+                acc, detail = evaluation
+                results_file.write(b",\n    " if total_count else b"\n    ")
+                results_file.write(_dumps_indented(detail, 2))
+                total_count += 1
+                total_accuracy += acc
+                if acc == 1.0:
+                    correct_count += 1
     except FileNotFoundError:
+        results_file.close()
         logger.error(f"文件未找到: {file}")
         return
     except IOError as e:
+        results_file.close()
         logger.error(f"读取文件失败: {e}")
         return
     
     overall_accuracy = total_accuracy / total_count if total_count > 0 else 0.0
     
-    # 构建输出数据
-    output_data: dict[str, Any] = {
-        "summary": {
-            "total_count": total_count,
-            "correct_count": correct_count,
-            "incorrect_count": total_count - correct_count,
-            "overall_accuracy": overall_accuracy,
-            "overall_accuracy_percentage": f"{overall_accuracy * 100:.2f}%"
-        },
-        "results": results
+    # 构建统计信息
+    summary: dict[str, Any] = {
+        "total_count": total_count,
+        "correct_count": correct_count,
+        "incorrect_count": total_count - correct_count,
+        "overall_accuracy": overall_accuracy,
+        "overall_accuracy_percentage": f"{overall_accuracy * 100:.2f}%"
     }
     
     # 保存到 JSON 文件
     try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        with results_file, open(output_file, "wb") as f:
+            _write_eval_result(f, summary, results_file, total_count)
     except IOError as e:
         logger.error(f"保存文件失败: {e}")
         return
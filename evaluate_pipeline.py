@@ -2,15 +2,137 @@
 Evaluation pipeline: Automatically run all evaluation scripts.
 """
 import os
+import io
 import sys
-import subprocess
+import json
+import hashlib
+import stat
+import codecs
+import locale
+import asyncio
+import inspect
+import importlib
 import argparse
-from typing import Dict, List, Optional, Tuple
+import threading
+import contextlib
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Set, TextIO, Tuple
+
+# Upper bound on pipeline steps running at the same time
+PIPELINE_MAX_WORKERS = 4
+
+# Evaluation scripts run by the pipeline steps, relative to the script directory
+EVAL_OUTPUT_SCRIPT = 'eval_output.py'
+EXTRACT_ENHANCEMENT_TIME_SCRIPT = 'extract_enhancement_time.py'
+CALCULATE_ACCURACY_BY_PATH_SCRIPT = 'calculate_accuracy_by_path.py'
+STATISTICS_BY_TOOL_SCRIPT = 'statistics_by_tool.py'
+FIND_MISSING_SCRIPT = 'find_missing_simple.py'
+SORTED_BY_THRESHOLD_SCRIPT = 'sorted_by_threshold.py'
+PIPELINE_SCRIPTS = (
+    EVAL_OUTPUT_SCRIPT,
+    EXTRACT_ENHANCEMENT_TIME_SCRIPT,
+    CALCULATE_ACCURACY_BY_PATH_SCRIPT,
+    STATISTICS_BY_TOOL_SCRIPT,
+    FIND_MISSING_SCRIPT,
+    SORTED_BY_THRESHOLD_SCRIPT
+)
+
+# Dataset file read by calculate_accuracy_by_path.py (and find_missing_simple.py
+# by default), relative to the script directory
+TEST_FILE = os.path.join('Reason_Knowledge_Dataset', 'test.jsonl')
+
+# Read size when streaming subprocess output
+PIPE_CHUNK_SIZE = 65536
+
+# Section rule for console output, and the same rule preceded by a blank line
+_RULE = '=' * 80
+_HEADER = '\n' + _RULE
+
+# Directory (under the user cache directory) holding the step results caches
+STEP_CACHE_DIR_NAME = 'evaluate_pipeline'
+
+# Step table entry: (step function, input file arguments, names of steps it
+# depends on, output files it writes, other files it reads: its scripts and
+# data files it opens without taking them as arguments)
+PipelineStep = Tuple[
+    Callable[..., bool], Tuple[str, ...], List[str], List[str], Tuple[str, ...]
+]
+
+# Queue of (step name, output line) items, set in worker processes by _init_worker
+_output_queue: Optional[Any] = None
+
+# Start method for the pipeline pool. The parent's printer thread is running
+# while workers start, and forking a process that has other threads can leave
+# the child stuck on a lock one of them held; forkserver forks from a separate
+# single-threaded server instead (spawn where forkserver is unavailable)
+PIPELINE_START_METHOD = (
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+# Start method for pools the step scripts create inside a pipeline worker, where
+# the output forwarder thread is running. Spawned children also inherit the
+# step's redirected output and exit with their pool; a forkserver started there
+# would keep the step's output pipe open after the step finishes
+STEP_START_METHOD = 'spawn'
+
+# --jobs value passed to scripts with their own process pools, set in worker
+# processes by _init_worker so concurrent steps share the CPUs (serial otherwise)
+_step_jobs = 1
+
+# Directory containing this script and the evaluation scripts it runs
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 def _get_script_dir() -> str:
     """Get the directory where this script is located."""
-    return os.path.dirname(os.path.abspath(__file__))
+    return _SCRIPT_DIR
+
+
+def _script_dir_files(*names: str) -> Tuple[str, ...]:
+    """
+    Get the paths of files in the script directory.
+    
+    Args:
+        *names: File names relative to the script directory
+    
+    Returns:
+        File paths, in the order given
+    """
+    return tuple(os.path.join(_SCRIPT_DIR, name) for name in names)
+
+
+@lru_cache(maxsize=256)
+def _exists(path: str) -> bool:
+    """
+    Check whether a pipeline file exists, memoizing the result.
+    
+    The same input files are checked by several steps; the cache is cleared
+    at the start of each pipeline run.
+    
+    Args:
+        path: File path
+    
+    Returns:
+        True if the path exists, False otherwise
+    """
+    return os.path.exists(path)
+
+
+def _list_dir_names(path: str) -> Set[str]:
+    """
+    List the entry names of a directory in a single scandir pass.
+    
+    Args:
+        path: Directory path
+    
+    Returns:
+        Set of entry names in the directory
+    """
+    with os.scandir(path) as entries:
+        return {entry.name for entry in entries}
 
 
 def _normalize_path(input_dir: str) -> str:
@@ -35,17 +157,166 @@ def _normalize_path(input_dir: str) -> str:
             base_dir = _get_script_dir()
             input_path = os.path.join(base_dir, input_dir)
     
-    input_path = os.path.normpath(os.path.abspath(input_path))
+    # abspath already normalizes the path
+    input_path = os.path.abspath(input_path)
     
-    if not os.path.exists(input_path):
+    # One stat call answers both checks
+    try:
+        st = os.stat(input_path)
+    except OSError:
         raise ValueError(f'Input directory does not exist: {input_path}')
     
-    if not os.path.isdir(input_path):
+    if not stat.S_ISDIR(st.st_mode):
         raise ValueError(f'Input path is not a directory: {input_path}')
     
     return input_path
 
 
+def _load_main(script: str) -> Optional[Callable[[List[str]], Any]]:
+    """
+    Import an evaluation script and return its main(argv) entry point.
+    
+    Args:
+        script: Script file name in the script directory (e.g. 'eval_output.py')
+    
+    Returns:
+        The script's main function, or None if the script cannot be imported
+        or its main does not accept an argument list
+    """
+    script_dir = _get_script_dir()
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    try:
+        module = importlib.import_module(os.path.splitext(script)[0])
+    except Exception:
+        return None
+    
+    entry = getattr(module, 'main', None)
+    try:
+        inspect.signature(entry).bind([])
+    except (TypeError, ValueError):
+        return None
+    return entry
+
+
+def _run_in_process(
+    entry: Callable[[List[str]], Any],
+    args: List[str],
+    stdout: Optional[TextIO] = None
+) -> bool:
+    """
+    Call a script's main(argv) in this process with the script directory as cwd.
+    
+    Args:
+        entry: The script's main function
+        args: Command-line arguments for the script
+        stdout: Stream to capture the script's standard output into (None to inherit)
+    
+    Returns:
+        True if main returned normally or exited with status 0, False otherwise
+    """
+    previous_cwd = os.getcwd()
+    os.chdir(_get_script_dir())
+    try:
+        with contextlib.redirect_stdout(stdout) if stdout is not None else contextlib.nullcontext():
+            entry(args)
+        return True
+    except SystemExit as e:
+        # argparse errors and sys.exit() calls; mirror the interpreter's exit handling
+        if e.code is None or e.code == 0:
+            return True
+        if not isinstance(e.code, int):
+            print(e.code, file=sys.stderr)
+        return False
+    except Exception:
+        traceback.print_exc()
+        return False
+    finally:
+        os.chdir(previous_cwd)
+
+
+async def _pump(stream: asyncio.StreamReader, target: TextIO) -> None:
+    """
+    Copy a subprocess pipe to a text stream as output arrives.
+    
+    Args:
+        stream: Subprocess stdout or stderr pipe
+        target: Text stream to write decoded output to
+    """
+    decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))(errors='replace')
+    while True:
+        chunk = await stream.read(PIPE_CHUNK_SIZE)
+        if not chunk:
+            break
+        target.write(decoder.decode(chunk))
+        target.flush()
+    target.write(decoder.decode(b'', final=True))
+
+
+async def _run_subprocess_async(cmd: List[str], cwd: str, stdout: TextIO) -> int:
+    """
+    Run a command with piped output, streaming stdout and stderr while it runs.
+    
+    Args:
+        cmd: Command and arguments
+        cwd: Working directory for the command
+        stdout: Text stream to write the command's standard output to
+    
+    Returns:
+        Exit status of the command
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    await asyncio.gather(_pump(proc.stdout, stdout), _pump(proc.stderr, sys.stderr))
+    return await proc.wait()
+
+
+def _run_subprocess(script: str, args: List[str], stdout: Optional[TextIO] = None) -> bool:
+    """
+    Run a script in a separate Python interpreter with the script directory as cwd.
+    
+    Args:
+        script: Script file name in the script directory
+        args: Command-line arguments for the script
+        stdout: Stream to write the script's standard output to (None for sys.stdout)
+    
+    Returns:
+        True if the script exited with status 0, False otherwise
+    """
+    returncode = asyncio.run(_run_subprocess_async(
+        [sys.executable, script] + args,
+        _get_script_dir(),
+        stdout if stdout is not None else sys.stdout
+    ))
+    return returncode == 0
+
+
+def _run_script(script: str, args: List[str], stdout: Optional[TextIO] = None) -> bool:
+    """
+    Run an evaluation script, calling its main(argv) in-process when possible.
+    
+    Importing the script once and calling its entry point avoids starting a new
+    interpreter (and re-importing its dependencies) for every step. Scripts that
+    cannot be imported or have no main(argv) entry point run in a subprocess.
+    
+    Args:
+        script: Script file name in the script directory
+        args: Command-line arguments for the script
+        stdout: Stream to capture the script's standard output into (None to inherit)
+    
+    Returns:
+        True if successful, False otherwise
+    """
+    entry = _load_main(script)
+    if entry is None:
+        return _run_subprocess(script, args, stdout)
+    return _run_in_process(entry, args, stdout)
+
+
 def run_eval_output(result_file: str) -> bool:
     """
     Run eval_output.py to evaluate result file.
@@ -56,22 +327,16 @@ def run_eval_output(result_file: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    print('\n' + '=' * 80)
-    print('Step 1/4: Running eval_output.py')
-    print('=' * 80)
+    print(_HEADER)
+    print(f'Step 1/4: Running {EVAL_OUTPUT_SCRIPT}')
+    print(_RULE)
     
-    if not os.path.exists(result_file):
+    if not _exists(result_file):
         print(f'Skipped: File does not exist {result_file}')
         return False
     
     try:
-        result = subprocess.run(
-            [sys.executable, 'eval_output.py', result_file],
-            cwd=_get_script_dir(),
-            capture_output=False,
-            text=True
-        )
-        return result.returncode == 0
+        return _run_script(EVAL_OUTPUT_SCRIPT, [result_file, '--jobs', str(_step_jobs)])
     except Exception as e:
         print(f'Error: {e}')
         return False
@@ -87,22 +352,16 @@ def run_extract_enhancement_time(log_file: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    print('\n' + '=' * 80)
-    print('Step 2/4: Running extract_enhancement_time.py')
-    print('=' * 80)
+    print(_HEADER)
+    print(f'Step 2/4: Running {EXTRACT_ENHANCEMENT_TIME_SCRIPT}')
+    print(_RULE)
     
-    if not os.path.exists(log_file):
+    if not _exists(log_file):
         print(f'Skipped: File does not exist {log_file}')
         return False
     
     try:
-        result = subprocess.run(
-            [sys.executable, 'extract_enhancement_time.py', log_file],
-            cwd=_get_script_dir(),
-            capture_output=False,
-            text=True
-        )
-        return result.returncode == 0
+        return _run_script(EXTRACT_ENHANCEMENT_TIME_SCRIPT, [log_file])
     except Exception as e:
         print(f'Error: {e}')
         return False
@@ -119,30 +378,25 @@ def run_calculate_accuracy_by_path(dump_file: str, result_file: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    print('\n' + '=' * 80)
-    print('Step 3/4: Running calculate_accuracy_by_path.py')
-    print('=' * 80)
+    print(_HEADER)
+    print(f'Step 3/4: Running {CALCULATE_ACCURACY_BY_PATH_SCRIPT}')
+    print(_RULE)
     
-    if not os.path.exists(dump_file):
+    if not _exists(dump_file):
         print(f'Skipped: File does not exist {dump_file}')
         return False
-    if not os.path.exists(result_file):
+    if not _exists(result_file):
         print(f'Skipped: File does not exist {result_file}')
         return False
     
     try:
-        result = subprocess.run(
+        return _run_script(
+            CALCULATE_ACCURACY_BY_PATH_SCRIPT,
             [
-                sys.executable,
-                'calculate_accuracy_by_path.py',
-                '--dump_file', dump_file,
-                '--result_file', result_file
-            ],
-            cwd=_get_script_dir(),
-            capture_output=False,
-            text=True
+                '--dump_file', dump_file, '--result_file', result_file,
+                '--jobs', str(_step_jobs)
+            ]
         )
-        return result.returncode == 0
     except Exception as e:
         print(f'Error: {e}')
         return False
@@ -158,23 +412,17 @@ def run_statistics_by_tool(accuracy_file: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    print('\n' + '=' * 80)
-    print('Step 4/4: Running statistics_by_tool.py')
-    print('=' * 80)
+    print(_HEADER)
+    print(f'Step 4/4: Running {STATISTICS_BY_TOOL_SCRIPT}')
+    print(_RULE)
     
-    if not os.path.exists(accuracy_file):
+    if not _exists(accuracy_file):
         print(f'Skipped: File does not exist {accuracy_file} '
               f'(need to run calculate_accuracy_by_path.py first)')
         return False
     
     try:
-        result = subprocess.run(
-            [sys.executable, 'statistics_by_tool.py', accuracy_file],
-            cwd=_get_script_dir(),
-            capture_output=False,
-            text=True
-        )
-        return result.returncode == 0
+        return _run_script(STATISTICS_BY_TOOL_SCRIPT, [accuracy_file])
     except Exception as e:
         print(f'Error: {e}')
         return False
@@ -191,24 +439,24 @@ def run_find_missing(test_file: str, result_file: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    print('\n' + '=' * 80)
-    print('Optional Step: Running find_missing_simple.py')
-    print('=' * 80)
+    print(_HEADER)
+    print(f'Optional Step: Running {FIND_MISSING_SCRIPT}')
+    print(_RULE)
     
-    if not os.path.exists(result_file):
+    if not _exists(result_file):
         print(f'Skipped: File does not exist {result_file}')
         return False
     
     try:
-        result = subprocess.run(
-            [sys.executable, 'find_missing_simple.py', '--test-file', test_file, result_file],
-            cwd=_get_script_dir(),
-            capture_output=True,
-            text=True
+        output = io.StringIO()
+        success = _run_script(
+            FIND_MISSING_SCRIPT,
+            ['--test-file', test_file, '--jobs', str(_step_jobs), result_file],
+            stdout=output
         )
-        if result.returncode == 0 and result.stdout:
-            print(f'Output file: {result.stdout.strip()}')
-        return result.returncode == 0
+        if success and output.getvalue():
+            print(f'Output file: {output.getvalue().strip()}')
+        return success
     except Exception as e:
         print(f'Error: {e}')
         return False
@@ -224,32 +472,403 @@ def run_sorted_by_threshold(enhancement_file: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    print('\n' + '=' * 80)
-    print('Optional Step: Running sorted_by_threshold.py')
-    print('=' * 80)
+    print(_HEADER)
+    print(f'Optional Step: Running {SORTED_BY_THRESHOLD_SCRIPT}')
+    print(_RULE)
     
-    if not os.path.exists(enhancement_file):
+    if not _exists(enhancement_file):
         print(f'Skipped: File does not exist {enhancement_file}')
         return False
     
     try:
-        result = subprocess.run(
-            [sys.executable, 'sorted_by_threshold.py', enhancement_file],
-            cwd=_get_script_dir(),
-            capture_output=False,
-            text=True
-        )
-        return result.returncode == 0
+        return _run_script(SORTED_BY_THRESHOLD_SCRIPT, [enhancement_file])
     except Exception as e:
         print(f'Error: {e}')
         return False
 
 
+def _preload_scripts() -> None:
+    """Import every pipeline script so steps do not pay their import cost."""
+    for script in PIPELINE_SCRIPTS:
+        _load_main(script)
+
+
+def _init_worker(output_queue: Any, step_jobs: int) -> None:
+    """
+    Initialize a pipeline worker process.
+    
+    Args:
+        output_queue: Queue that step output lines are sent to
+        step_jobs: Number of processes each step may use for its own pool
+    """
+    global _output_queue, _step_jobs
+    _output_queue = output_queue
+    _step_jobs = step_jobs
+    multiprocessing.set_start_method(STEP_START_METHOD, force=True)
+    # Already imported when the forkserver preloaded them
+    _preload_scripts()
+
+
+def _forward_output(name: str, read_fd: int) -> None:
+    """
+    Send each line read from a pipe to the output queue, tagged with the step name.
+    
+    Args:
+        name: Step name
+        read_fd: Read end of the pipe the step's output is written to
+    """
+    with open(read_fd, 'rb') as pipe:
+        for line in pipe:
+            _output_queue.put((name, line))
+
+
+def _run_streamed(name: str, func: Callable[..., bool], *args: Any) -> bool:
+    """
+    Run a pipeline step in a worker process, streaming everything it prints.
+    
+    Standard output and standard error are redirected at the file descriptor
+    level into a pipe, so output from logging handlers and subprocesses is
+    forwarded as well, line by line and in the order it was written.
+    
+    Args:
+        name: Step name
+        func: Step function (one of the run_* helpers)
+        *args: Arguments for the step function
+    
+    Returns:
+        Step result
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    read_fd, write_fd = os.pipe()
+    forwarder = threading.Thread(target=_forward_output, args=(name, read_fd), daemon=True)
+    forwarder.start()
+    
+    saved_fds = (os.dup(1), os.dup(2))
+    os.dup2(write_fd, 1)
+    os.dup2(write_fd, 2)
+    os.close(write_fd)
+    try:
+        return func(*args)
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        os.close(saved_fds[0])
+        os.close(saved_fds[1])
+        # The pipe reaches EOF once the redirected descriptors are restored
+        forwarder.join()
+
+
+def _print_output(output_queue: Any) -> None:
+    """
+    Print step output lines from the queue, prefixed with their step name.
+    
+    Args:
+        output_queue: Queue of (step name, output line) items; None stops printing
+    """
+    encoding = sys.stdout.encoding or 'utf-8'
+    for name, line in iter(output_queue.get, None):
+        text = line.decode(encoding, errors='replace')
+        if not text.endswith('\n'):
+            text += '\n'
+        sys.stdout.write(f'[{name}] {text}')
+        sys.stdout.flush()
+
+
+def _stat_mtimes(paths: Tuple[str, ...]) -> Dict[str, Optional[int]]:
+    """
+    Get the modification times of a set of files.
+    
+    Args:
+        paths: File paths
+    
+    Returns:
+        Dict mapping path to mtime in nanoseconds (None if the file is missing)
+    """
+    mtimes: Dict[str, Optional[int]] = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            mtimes[path] = None
+    return mtimes
+
+
+def _step_cache_file(input_path: str) -> str:
+    """
+    Get the step results cache file for an input directory.
+    
+    Caches live in the user cache directory (XDG_CACHE_HOME, or ~/.cache),
+    one file per input directory, so nothing is written next to the data.
+    
+    Args:
+        input_path: Normalized input directory path
+    
+    Returns:
+        Path of the cache file
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    digest = hashlib.sha1(input_path.encode('utf-8')).hexdigest()
+    return os.path.join(cache_home, STEP_CACHE_DIR_NAME, f'{digest}.json')
+
+
+def _load_step_cache(input_path: str) -> Dict[str, Any]:
+    """
+    Load the step results cache for an input directory.
+    
+    Args:
+        input_path: Normalized input directory path
+    
+    Returns:
+        Dict mapping step name to its cache entry (empty if there is no usable cache)
+    """
+    try:
+        with open(_step_cache_file(input_path), 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _save_step_cache(input_path: str, cache: Dict[str, Any]) -> None:
+    """
+    Save the step results cache for an input directory.
+    
+    Args:
+        input_path: Normalized input directory path
+        cache: Dict mapping step name to its cache entry
+    """
+    cache_file = _step_cache_file(input_path)
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        print(f'Warning: Could not save step cache: {e}')
+
+
+def _is_up_to_date(entry: Any, inputs: Dict[str, Optional[int]], outputs: List[str]) -> bool:
+    """
+    Check whether a step's previous successful run is still valid.
+    
+    Args:
+        entry: The step's cache entry (None if it has none)
+        inputs: Current modification times of every file the step reads
+            (including its scripts), None for files that are missing
+        outputs: Output files the step writes
+    
+    Returns:
+        True if the files the step reads are unchanged since the cached run and
+        every output file exists and is not older than the newest of them
+    """
+    if not isinstance(entry, dict) or entry.get('inputs') != inputs:
+        return False
+    output_mtimes = _stat_mtimes(tuple(outputs))
+    if None in output_mtimes.values():
+        return False
+    newest_input = max((mtime for mtime in inputs.values() if mtime is not None), default=0)
+    return min(output_mtimes.values(), default=0) >= newest_input
+
+
+async def _run_step(
+    name: str,
+    step: PipelineStep,
+    dependencies: List['asyncio.Task[Optional[bool]]'],
+    executor: ProcessPoolExecutor,
+    output_queue: Any,
+    cache: Optional[Dict[str, Any]]
+) -> Optional[bool]:
+    """
+    Run one pipeline step on the worker pool once its dependencies have finished.
+    
+    Args:
+        name: Step name
+        step: Step table entry (function, input files, dependencies, output files,
+            other files read)
+        dependencies: Tasks of the steps this step depends on
+        executor: Worker pool to run the step on
+        output_queue: Queue that step output lines are sent to
+        cache: Step results cache, updated in place (None to always run the step)
+    
+    Returns:
+        Step result, or None if the step was skipped because a dependency did not succeed
+    """
+    func, args, _, outputs, reads = step
+    if not all(await asyncio.gather(*dependencies)):
+        # Its input comes from a step that did not succeed
+        return None
+    
+    input_mtimes = _stat_mtimes(args + reads) if cache is not None else {}
+    if cache is not None and _is_up_to_date(cache.get(name), input_mtimes, outputs):
+        output_queue.put((name, b'Up to date, not rerun (run without --cache to rerun)\n'))
+        return True
+    
+    loop = asyncio.get_running_loop()
+    try:
+        success = await loop.run_in_executor(executor, _run_streamed, name, func, *args)
+    except Exception as e:
+        success = False
+        output_queue.put((name, f'Error: {e}\n'.encode(sys.stdout.encoding or 'utf-8')))
+    
+    if cache is not None:
+        if success:
+            cache[name] = {'inputs': input_mtimes}
+        else:
+            cache.pop(name, None)
+    return success
+
+
+def _check_dependencies(steps: Dict[str, PipelineStep]) -> None:
+    """
+    Check that every step dependency is a real data dependency.
+    
+    A step is skipped when a dependency does not succeed, so each dependency
+    must write at least one of the step's input files.
+    
+    Args:
+        steps: Ordered mapping of step name to (function, input files, dependencies,
+            output files, other files read), with every step listed after its
+            dependencies
+    
+    Raises:
+        ValueError: If a dependency is unknown, listed after the step, or writes
+            none of the step's input files
+    """
+    seen: Set[str] = set()
+    for name, (_, args, deps, _, _) in steps.items():
+        for dep in deps:
+            if dep not in seen:
+                raise ValueError(f'Step {name} depends on {dep}, which is not listed before it')
+            if not set(args).intersection(steps[dep][3]):
+                raise ValueError(f'Step {name} depends on {dep}, which writes none of its input files')
+        seen.add(name)
+
+
+async def _run_steps_async(
+    steps: Dict[str, PipelineStep],
+    executor: ProcessPoolExecutor,
+    output_queue: Any,
+    cache: Optional[Dict[str, Any]]
+) -> Dict[str, Optional[bool]]:
+    """
+    Start a task for every pipeline step and wait for all of them.
+    
+    Args:
+        steps: Ordered mapping of step name to (function, input files, dependencies,
+            output files, other files read), with every step listed after its
+            dependencies
+        executor: Worker pool to run the steps on
+        output_queue: Queue that step output lines are sent to
+        cache: Step results cache, updated in place (None to always run every step)
+    
+    Returns:
+        Dict mapping step name to result (None if skipped), in step table order
+    """
+    tasks: Dict[str, 'asyncio.Task[Optional[bool]]'] = {}
+    for name, step in steps.items():
+        dependencies = [tasks[dep] for dep in step[2]]
+        tasks[name] = asyncio.ensure_future(
+            _run_step(name, step, dependencies, executor, output_queue, cache)
+        )
+    results = await asyncio.gather(*tasks.values())
+    return dict(zip(tasks, results))
+
+
+def _run_steps(
+    steps: Dict[str, PipelineStep],
+    cache: Optional[Dict[str, Any]] = None
+) -> Dict[str, Optional[bool]]:
+    """
+    Run pipeline steps concurrently, starting each step once its dependencies finish.
+    
+    Output of running steps is streamed as it is produced, each line prefixed
+    with its step name so concurrent steps stay readable. A step whose
+    dependency failed or was skipped is not run, and neither is a step whose
+    cached run is still up to date.
+    
+    Args:
+        steps: Ordered mapping of step name to (function, input files, dependencies,
+            output files, other files read), with every step listed after its
+            dependencies
+        cache: Step results cache, updated in place (None to always run every step)
+    
+    Returns:
+        Dict mapping step name to result (None if skipped), in step table order
+    
+    Raises:
+        ValueError: If a step dependency writes none of the step's input files
+    """
+    _check_dependencies(steps)
+    
+    # Workers write to the same terminal; flush so earlier output comes first
+    sys.stdout.flush()
+    sys.stderr.flush()
+    
+    # The forkserver imports the scripts once and every worker forked from it
+    # inherits the loaded modules
+    context = multiprocessing.get_context(PIPELINE_START_METHOD)
+    if PIPELINE_START_METHOD == 'forkserver':
+        script_dir = _get_script_dir()
+        if script_dir not in sys.path:
+            sys.path.insert(0, script_dir)
+        context.set_forkserver_preload([os.path.splitext(script)[0] for script in PIPELINE_SCRIPTS])
+    
+    output_queue = context.Queue()
+    printer = threading.Thread(target=_print_output, args=(output_queue,), daemon=True)
+    printer.start()
+    
+    # Steps run concurrently, so each gets an equal share of the CPUs for its
+    # own pool instead of every script defaulting to os.cpu_count() processes
+    cpu_count = os.cpu_count() or 1
+    max_workers = min(PIPELINE_MAX_WORKERS, cpu_count)
+    step_jobs = max(1, cpu_count // max_workers)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(output_queue, step_jobs)
+    ) as executor:
+        results = asyncio.run(_run_steps_async(steps, executor, output_queue, cache))
+    
+    # Workers have exited and flushed their queue feeders; stop after the last line
+    output_queue.put(None)
+    printer.join()
+    return results
+
+
+def _plan_steps(steps: Dict[str, PipelineStep]) -> Dict[str, List[str]]:
+    """
+    Resolve which pipeline steps would run, without running any of them.
+    
+    A step without dependencies would run if all its input files exist; a step
+    with dependencies would run if all of them would (they produce its inputs).
+    
+    Args:
+        steps: Ordered mapping of step name to (function, input files, dependencies,
+            output files, other files read), with every step listed after its
+            dependencies
+    
+    Returns:
+        Dict mapping step name to reasons it would be skipped (empty if it would run)
+    """
+    plan: Dict[str, List[str]] = {}
+    for name, (_, args, deps, _, _) in steps.items():
+        if deps:
+            plan[name] = [f'depends on {dep}' for dep in deps if plan[dep]]
+        else:
+            plan[name] = [f'missing {path}' for path in args if not _exists(path)]
+    return plan
+
+
 def evaluate_pipeline(
     input_dir: str,
     test_file: Optional[str] = None,
     run_missing_check: bool = False,
-    run_threshold_filter: bool = False
+    run_threshold_filter: bool = False,
+    dry_run: bool = False,
+    use_cache: bool = False
 ) -> None:
     """
     Run the complete evaluation pipeline.
@@ -259,7 +878,11 @@ def evaluate_pipeline(
         test_file: Path to test.jsonl file (for missing check)
         run_missing_check: Whether to run find_missing_simple.py
         run_threshold_filter: Whether to run sorted_by_threshold.py
+        dry_run: Only check prerequisites and print which steps would run
+        use_cache: Skip steps whose files are unchanged since their last successful run
     """
+    _exists.cache_clear()
+    
     try:
         input_path = _normalize_path(input_dir)
     except ValueError as e:
@@ -267,21 +890,23 @@ def evaluate_pipeline(
         return
     
     dir_name = os.path.basename(input_path.rstrip(os.sep))
+    present = _list_dir_names(input_path)
     
-    # Build file paths
-    result_file = os.path.join(input_path, f'{dir_name}_result.jsonl')
-    log_file = os.path.join(input_path, f'{dir_name}_agent.log')
-    dump_file = os.path.join(input_path, f'{dir_name}_thirdgen_dump.jsonl')
-    accuracy_file = os.path.join(input_path, f'{dir_name}_accuracy_by_path.json')
+    # Build file paths; every pipeline file is named <dir_name><suffix>
+    prefix = os.path.join(input_path, dir_name)
+    result_file = f'{prefix}_result.jsonl'
+    log_file = f'{prefix}_agent.log'
+    dump_file = f'{prefix}_thirdgen_dump.jsonl'
+    accuracy_file = f'{prefix}_accuracy_by_path.json'
     
-    print('=' * 80)
+    print(_RULE)
     print(f'Starting evaluation pipeline: {input_dir}')
-    print('=' * 80)
+    print(_RULE)
     print(f'Input directory: {input_path}')
     print(f'Result file: {result_file}')
     print(f'Log file: {log_file}')
     print(f'Dump file: {dump_file}')
-    print('=' * 80)
+    print(_RULE)
     
     # Check required files
     required_files = {
@@ -292,78 +917,130 @@ def evaluate_pipeline(
     
     print('\nChecking required files...')
     for name, path in required_files.items():
-        if os.path.exists(path):
+        if os.path.basename(path) in present:
             print(f'  [OK] {name}: {path}')
         else:
             print(f'  [X] {name}: {path} (not found)')
     
-    results: Dict[str, bool] = {}
+    # Steps and their data dependencies; independent steps run concurrently
+    steps: Dict[str, PipelineStep] = {}
     
     # Step 1: eval_output.py
-    results['eval_output'] = run_eval_output(result_file)
+    steps['eval_output'] = (
+        run_eval_output, (result_file,), [], [f'{prefix}_result_eval_result.json'],
+        _script_dir_files(EVAL_OUTPUT_SCRIPT)
+    )
     
     # Step 2: extract_enhancement_time.py
-    results['extract_enhancement_time'] = run_extract_enhancement_time(log_file)
+    steps['extract_enhancement_time'] = (
+        run_extract_enhancement_time, (log_file,), [],
+        [
+            f'{prefix}_agent_enhancement_statistics.json',
+            f'{prefix}_agent_enhancement_times_method2.json'
+        ],
+        _script_dir_files(EXTRACT_ENHANCEMENT_TIME_SCRIPT)
+    )
     
-    # Step 3: calculate_accuracy_by_path.py
-    results['calculate_accuracy_by_path'] = run_calculate_accuracy_by_path(
-        dump_file, result_file
+    # Step 3: calculate_accuracy_by_path.py (also reads test.jsonl and imports eval_output.py)
+    steps['calculate_accuracy_by_path'] = (
+        run_calculate_accuracy_by_path, (dump_file, result_file), [],
+        [f'{prefix}_result_accuracy_by_path.json'],
+        _script_dir_files(CALCULATE_ACCURACY_BY_PATH_SCRIPT, EVAL_OUTPUT_SCRIPT, TEST_FILE)
     )
     
-    # Step 4: statistics_by_tool.py
-    results['statistics_by_tool'] = run_statistics_by_tool(accuracy_file)
+    # Step 4: statistics_by_tool.py (reads <dir_name>_accuracy_by_path.json, which
+    # step 3 does not write, so it runs whenever that file exists)
+    steps['statistics_by_tool'] = (
+        run_statistics_by_tool, (accuracy_file,), [],
+        [
+            f'{prefix}_accuracy_by_path_statistics_by_tool.json',
+            f'{prefix}_accuracy_by_path_knowledge_questions.json'
+        ],
+        _script_dir_files(STATISTICS_BY_TOOL_SCRIPT)
+    )
     
     # Optional: find_missing_simple.py
     if run_missing_check:
-        if test_file:
-            results['find_missing'] = run_find_missing(test_file, result_file)
-        else:
-            default_test_file = os.path.join(_get_script_dir(), 'Reason_Knowledge_Dataset', 'test.jsonl')
-            results['find_missing'] = run_find_missing(default_test_file, result_file)
+        if not test_file:
+            test_file = os.path.join(_get_script_dir(), TEST_FILE)
+        steps['find_missing'] = (
+            run_find_missing, (test_file, result_file), [], [f'{prefix}_result_missing.json'],
+            _script_dir_files(FIND_MISSING_SCRIPT)
+        )
     
-    # Optional: sorted_by_threshold.py
+    # Optional: sorted_by_threshold.py (reads the method2 file written by step 2)
     if run_threshold_filter:
-        enhancement_file = os.path.join(
-            input_path, f'{dir_name}_agent_enhancement_times_method2.json'
+        enhancement_file = f'{prefix}_agent_enhancement_times_method2.json'
+        steps['sorted_by_threshold'] = (
+            run_sorted_by_threshold, (enhancement_file,), ['extract_enhancement_time'],
+            [f'{prefix}_agent_enhancement_times_method2_sorted_by_threshold.json'],
+            _script_dir_files(SORTED_BY_THRESHOLD_SCRIPT)
         )
-        results['sorted_by_threshold'] = run_sorted_by_threshold(enhancement_file)
+    
+    if dry_run:
+        print(_HEADER)
+        print('Evaluation Pipeline Plan (dry run, no steps were run)')
+        print(_RULE)
+        for step, reasons in _plan_steps(steps).items():
+            status = f'[-] Would skip ({"; ".join(reasons)})' if reasons else '[OK] Would run'
+            print(f'  {step}: {status}')
+        print(_RULE)
+        return
+    
+    cache = _load_step_cache(input_path) if use_cache else None
+    results = _run_steps(steps, cache)
+    if cache is not None:
+        _save_step_cache(input_path, cache)
     
     # Print summary
-    print('\n' + '=' * 80)
+    print(_HEADER)
     print('Evaluation Pipeline Summary')
-    print('=' * 80)
+    print(_RULE)
     for step, success in results.items():
-        status = '[OK] Success' if success else '[X] Failed/Skipped'
+        if success:
+            status = '[OK] Success'
+        elif success is None:
+            failed_deps = ', '.join(dep for dep in steps[step][2] if not results[dep])
+            status = f'[-] Skipped (depends on {failed_deps})'
+        else:
+            status = '[X] Failed'
         print(f'  {step}: {status}')
-    print('=' * 80)
+    print(_RULE)
     
     # Output file locations
     print(f'\nOutput directory: {input_path}')
     print('\nGenerated files:')
-    output_files = [
-        f'{dir_name}_result_eval_result.json',
-        f'{dir_name}_agent_enhancement_statistics.json',
-        f'{dir_name}_accuracy_by_path.json',
-        f'{dir_name}_accuracy_by_path_statistics_by_tool.json',
-        f'{dir_name}_accuracy_by_path_knowledge_questions.json'
+    output_suffixes = [
+        '_result_eval_result.json',
+        '_agent_enhancement_statistics.json',
+        '_accuracy_by_path.json',
+        '_accuracy_by_path_statistics_by_tool.json',
+        '_accuracy_by_path_knowledge_questions.json'
     ]
     
     if run_missing_check:
-        output_files.append(f'{dir_name}_result_missing.json')
+        output_suffixes.append('_result_missing.json')
     
     if run_threshold_filter:
-        output_files.append(f'{dir_name}_agent_enhancement_times_method2_sorted_by_threshold.json')
+        output_suffixes.append('_agent_enhancement_times_method2_sorted_by_threshold.json')
     
-    for filename in output_files:
-        filepath = os.path.join(input_path, filename)
-        if os.path.exists(filepath):
+    # Steps have written new files since the directory was listed
+    present = _list_dir_names(input_path)
+    for suffix in output_suffixes:
+        filename = dir_name + suffix
+        if filename in present:
             print(f'  [OK] {filename}')
         else:
             print(f'  - {filename} (not generated)')
 
 
-def main() -> None:
-    """Main function."""
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Main function.
+    
+    Args:
+        argv: Command-line arguments (without program name); defaults to sys.argv
+    """
     parser = argparse.ArgumentParser(
         description='Evaluation pipeline: Automatically run all evaluation scripts',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -379,6 +1056,12 @@ Examples:
   # Run with optional steps
   python evaluate_pipeline.py ninth --missing-check --threshold-filter
   
+  # Only check that the expected files are in place
+  python evaluate_pipeline.py ninth --dry-run
+  
+  # Skip steps whose inputs and scripts are unchanged since their last run
+  python evaluate_pipeline.py ninth --cache
+  
   # Use current directory
   cd ninth
   python ../evaluate_pipeline.py .
@@ -405,14 +1088,27 @@ Examples:
         action='store_true',
         help='Run sorted_by_threshold.py to filter records by duration thresholds'
     )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Only check required files and print which steps would run'
+    )
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='Skip steps whose input files and scripts are unchanged since their last '
+             'successful run (cache kept in the user cache directory)'
+    )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     evaluate_pipeline(
         args.input_dir,
         test_file=args.test_file,
         run_missing_check=args.missing_check,
-        run_threshold_filter=args.threshold_filter
+        run_threshold_filter=args.threshold_filter,
+        dry_run=args.dry_run,
+        use_cache=args.cache
     )
 
 
@@ -3,10 +3,22 @@
 """
 import re
 import json
+import mmap
 import os
+import stat
+import sys
 import argparse
-from datetime import datetime
-from typing import List, Dict, Optional, Any
+import functools
+import operator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import BinaryIO, Iterator, List, Dict, Optional, Any, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时回退到标准库 json
+    orjson = None
 
 # 正则表达式模式常量
 UUID_PATTERN = r'\[([a-f0-9-]{36})\]'
@@ -22,6 +34,40 @@ DISCARD_PATTERN = r'Discarding method2 \[([a-f0-9-]{36})\].*?result due to'
 TIMESTAMP_WITH_MS_PATTERN = r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d+)'
 TIMESTAMP_WITHOUT_MS_PATTERN = r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})'
 
+# 事件模式中的 ".*?" 在含大量方括号的长行上会反复回溯（最坏为平方复杂度），因此不直接用 *_PATTERN 搜索：
+# 先定位开头的字面量，再找其后第一个 [uuid]，最后检查后缀，结果与原正则一致且为线性时间。
+# 若第一个开头位置之后的第一个 [uuid] 后面没有后缀，更靠后的位置也不可能匹配。
+_BRACKETED_ID_RE = re.compile(UUID_PATTERN)
+_TOOL_START_LEAD = 'tool_enhancement_node'
+# \d 保持 Unicode 语义（与 KNOWLEDGE_*_PATTERN 一致），不加 re.ASCII
+_KNOWLEDGE_LEAD_RE = re.compile(r'knowledge_enhancement_method(\d+)_node')
+_TIMESTAMP_WITH_MS_RE = re.compile(TIMESTAMP_WITH_MS_PATTERN)
+_TIMESTAMP_WITHOUT_MS_RE = re.compile(TIMESTAMP_WITHOUT_MS_PATTERN)
+# 行首带毫秒的时间戳（日志的常见格式），只匹配 ASCII 数字；其他情况走通用的搜索 + strptime 路径
+_LEADING_TIMESTAMP_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})\.(\d+)', re.ASCII)
+
+# 形如 "<字面量> [<uuid>] ... <后缀>" 的事件：用 str.find + 切片代替正则（与对应的 *_PATTERN 匹配结果一致）
+_LLM_CALL_PREFIX = 'LLM call with tool messages ['
+_IN_PREFIX = 'In ['
+_NO_TOOLS_SUFFIX = 'No tools has been called'
+_TOOL_FINISHED_PREFIX = 'Tool calls in ['
+_DISCARD_PREFIX = 'Discarding method2 ['
+_DISCARD_SUFFIX = 'result due to'
+_TOOL_ERROR_SUFFIXES = ('Tool ', 'failed')
+# 捕获到的 UUID 都经过 sys.intern：同一 UUID 在各状态字典和记录中共享一个字符串对象，
+# 字典查找时键可以直接按对象身份比较
+_UUID_LENGTH = 36
+_UUID_CHARS = '0123456789abcdef-'
+
+# 事件模式必须包含的字面量：不含其中任何一个的行不可能匹配任何事件（DISCARD 只在下一行检查，不需要）
+EVENT_TRIGGERS = (
+    'tool_enhancement_node',
+    'knowledge_enhancement_method',
+    'LLM call with tool messages [',
+    'Tool calls in [',
+    'In ['
+)
+
 # Enhancement 类型常量
 TYPE_TOOL_FINISHED = 'tool_enhancement_finished'
 TYPE_TOOL_FAILED = 'tool_enhancement_failed'
@@ -35,6 +81,15 @@ TYPE_KNOWLEDGE_METHOD2 = 'knowledge_enhancement_method2'
 TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
 TIMESTAMP_FORMAT_SIMPLE = '%Y-%m-%d %H:%M:%S'
 
+# 时间戳以整数微秒表示，起点为 datetime.min（0001-01-01 00:00:00，不涉及时区）
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+# 不使用 mmap 时读取日志的缓冲区大小
+LOG_READ_BUFFER_SIZE = 1 << 20
+
+# 并发写出结果文件的线程数上限
+OUTPUT_WRITER_THREADS = 8
+
 # 显示格式常量
 SEPARATOR_WIDTH = 80
 PREVIEW_COUNT = 20
@@ -49,6 +104,28 @@ FIELD_MAX_TIME = 'max_time'
 FIELD_FAILED_COUNT = 'failed_count'
 
 
+@dataclass(slots=True)
+class EnhancementRecord:
+    """
+    一条 enhancement 记录（使用 __slots__，比字典更省内存，属性访问也更快）
+    
+    可选字段是否写入 JSON 由类型决定：llm_call 带 tool_id，tool_enhancement_complete 带
+    tool_id/llm_id/tool_duration/llm_duration，其余类型带 has_error
+    """
+    type: str
+    start_time: int
+    end_time: int
+    duration_seconds: float
+    start_line: int
+    end_line: int
+    node_id: str
+    has_error: bool = False
+    tool_id: Optional[str] = None
+    llm_id: Optional[str] = None
+    tool_duration: float = 0.0
+    llm_duration: float = 0.0
+
+
 def _create_default_stat_entry() -> Dict[str, Any]:
     """创建默认的统计条目"""
     return {
@@ -61,7 +138,26 @@ def _create_default_stat_entry() -> Dict[str, Any]:
     }
 
 
-def parse_timestamp(line: str) -> Optional[datetime]:
+def _datetime_to_micros(dt: datetime) -> int:
+    """将 datetime 转换为整数微秒时间戳"""
+    return (dt - datetime.min) // _ONE_MICROSECOND
+
+
+def format_timestamp(timestamp: int, fmt: str = TIMESTAMP_FORMAT) -> str:
+    """
+    将整数微秒时间戳格式化为字符串
+    
+    Args:
+        timestamp: 整数微秒时间戳
+        fmt: strftime 格式
+        
+    Returns:
+        格式化后的时间字符串
+    """
+    return (datetime.min + timedelta(microseconds=timestamp)).strftime(fmt)
+
+
+def parse_timestamp(line: str) -> Optional[int]:
     """
     从日志行中解析时间戳
     
@@ -69,13 +165,27 @@ def parse_timestamp(line: str) -> Optional[datetime]:
         line: 日志行文本
         
     Returns:
-        解析成功返回 datetime 对象，否则返回 None
+        解析成功返回整数微秒时间戳，否则返回 None
     """
+    # 快速路径：直接用整数构造 datetime，结果与下面的 strptime 路径一致
+    leading_match = _LEADING_TIMESTAMP_RE.match(line)
+    if leading_match:
+        year, month, day, hour, minute, second, fraction = leading_match.groups()
+        # strptime 的 %f 最多接受 6 位小数，超过时退回到不带毫秒的格式
+        microsecond = int(fraction.ljust(6, '0')) if len(fraction) <= 6 else 0
+        try:
+            return _datetime_to_micros(datetime(
+                int(year), int(month), int(day),
+                int(hour), int(minute), int(second), microsecond
+            ))
+        except ValueError:
+            return None
+    
     # 尝试匹配带毫秒的时间戳
-    time_match = re.search(TIMESTAMP_WITH_MS_PATTERN, line)
+    time_match = _TIMESTAMP_WITH_MS_RE.search(line)
     if not time_match:
         # 尝试不带毫秒的时间戳
-        time_match = re.search(TIMESTAMP_WITHOUT_MS_PATTERN, line)
+        time_match = _TIMESTAMP_WITHOUT_MS_RE.search(line)
         if time_match:
             timestamp_str = time_match.group(1) + '.0'
         else:
@@ -84,53 +194,234 @@ def parse_timestamp(line: str) -> Optional[datetime]:
         timestamp_str = time_match.group(1)
     
     try:
-        return datetime.strptime(timestamp_str, TIMESTAMP_FORMAT)
+        return _datetime_to_micros(datetime.strptime(timestamp_str, TIMESTAMP_FORMAT))
     except ValueError:
         try:
-            return datetime.strptime(timestamp_str.split('.')[0], TIMESTAMP_FORMAT_SIMPLE)
+            return _datetime_to_micros(
+                datetime.strptime(timestamp_str.split('.')[0], TIMESTAMP_FORMAT_SIMPLE)
+            )
         except (ValueError, IndexError):
             return None
 
 
 def _create_enhancement_record(
     enh_type: str,
-    start_time: datetime,
-    end_time: datetime,
+    start_time: int,
+    end_time: int,
     start_line: int,
     end_line: int,
     node_id: str,
     **kwargs
-) -> Dict[str, Any]:
+) -> EnhancementRecord:
     """
     创建 enhancement 记录
     
     Args:
         enh_type: enhancement 类型
-        start_time: 开始时间
-        end_time: 结束时间
+        start_time: 开始时间（整数微秒时间戳）
+        end_time: 结束时间（整数微秒时间戳）
         start_line: 开始行号
         end_line: 结束行号
         node_id: 节点ID
         **kwargs: 其他可选字段
         
     Returns:
-        enhancement 记录字典
+        enhancement 记录
     """
-    duration = (end_time - start_time).total_seconds()
-    record = {
-        'type': enh_type,
-        'start_time': start_time,
-        'end_time': end_time,
-        'duration_seconds': duration,
-        'start_line': start_line,
-        'end_line': end_line,
-        'node_id': node_id
-    }
-    record.update(kwargs)
-    return record
+    duration = (end_time - start_time) / 1_000_000
+    return EnhancementRecord(enh_type, start_time, end_time, duration, start_line, end_line, node_id, **kwargs)
+
+
+def _find_bracketed_id(line: str, prefix: str, *suffixes: str) -> Optional[str]:
+    """
+    查找 "<prefix><uuid>] ... <suffix> ..." 形式的事件并返回其中的 UUID
+    
+    与正则 re.escape(prefix) + r'([a-f0-9-]{36})\].*?' + '.*?'.join(map(re.escape, suffixes)) 的 search 结果一致：
+    依次尝试 prefix 的每个出现位置，取第一个后面紧跟合法 UUID 和 ']'、且之后依次出现各个后缀的位置。
+    
+    Args:
+        line: 日志行（不含内部换行符）
+        prefix: 以 '[' 结尾的固定前缀
+        suffixes: UUID 之后需要依次出现的字面量
+        
+    Returns:
+        匹配到的 UUID，未匹配则返回 None
+    """
+    # 后缀只能出现在第一个合法位置之后；若之后没有后缀，更靠后的出现位置也不会有
+    return _id_with_suffixes(line, _find_prefixed_id(line, prefix), *suffixes)
+
+
+def _find_prefixed_id(line: str, prefix: str) -> Optional[Tuple[str, int]]:
+    """
+    查找第一个后面紧跟合法 UUID 和 ']' 的 prefix，直接按固定偏移切片取出 UUID
+    
+    Args:
+        line: 日志行
+        prefix: 以 '[' 结尾的固定前缀
+        
+    Returns:
+        (UUID, ']' 之后的位置) 元组，未找到则返回 None
+    """
+    pos = line.find(prefix)
+    while pos != -1:
+        id_start = pos + len(prefix)
+        id_end = id_start + _UUID_LENGTH
+        candidate = line[id_start:id_end]
+        if (len(candidate) == _UUID_LENGTH and not candidate.strip(_UUID_CHARS)
+                and line.startswith(']', id_end)):
+            return sys.intern(candidate), id_end + 1
+        pos = line.find(prefix, pos + 1)
+    return None
+
+
+def _id_with_suffixes(line: str, found: Optional[Tuple[str, int]], *suffixes: str) -> Optional[str]:
+    """
+    若已找到的 UUID 之后依次出现各个后缀，返回该 UUID
+    
+    Args:
+        line: 日志行
+        found: _find_prefixed_id / _find_id_after 的结果
+        suffixes: UUID 之后需要依次出现的字面量
+        
+    Returns:
+        UUID，不满足条件时返回 None
+    """
+    if found is None or not _has_suffixes(line, found[1], suffixes):
+        return None
+    return found[0]
+
+
+def _has_suffixes(line: str, pos: int, suffixes: Tuple[str, ...]) -> bool:
+    """检查 line 从 pos 开始是否依次出现各个后缀"""
+    for suffix in suffixes:
+        pos = line.find(suffix, pos)
+        if pos == -1:
+            return False
+        pos += len(suffix)
+    return True
 
 
-def extract_enhancement_times(log_file: str) -> List[Dict[str, Any]]:
+def _find_id_after(line: str, pos: int) -> Optional[Tuple[str, int]]:
+    """
+    查找 pos 之后第一个 [uuid]
+    
+    Args:
+        line: 日志行
+        pos: 开始查找的位置
+        
+    Returns:
+        (UUID, ']' 之后的位置) 元组，未找到则返回 None
+    """
+    id_match = _BRACKETED_ID_RE.search(line, pos)
+    if id_match is None:
+        return None
+    return sys.intern(id_match.group(1)), id_match.end()
+
+
+def _find_tool_start_id(line: str) -> Optional[str]:
+    """
+    查找 tool_enhancement 开始事件，结果与 TOOL_START_PATTERN 的 search 一致
+    
+    Args:
+        line: 日志行
+        
+    Returns:
+        tool 的 UUID，未匹配则返回 None
+    """
+    lead_pos = line.find(_TOOL_START_LEAD)
+    if lead_pos == -1:
+        return None
+    return _id_with_suffixes(line, _find_id_after(line, lead_pos + len(_TOOL_START_LEAD)), 'started')
+
+
+def _find_knowledge_event(line: str) -> Optional[Tuple[str, str, int]]:
+    """
+    查找 knowledge_enhancement 事件的方法编号和 UUID（开始/结束由调用方按后缀判断），
+    与 KNOWLEDGE_START_PATTERN / KNOWLEDGE_END_PATTERN 的 search 结果一致
+    
+    Args:
+        line: 日志行
+        
+    Returns:
+        (方法编号, UUID, ']' 之后的位置) 元组，未匹配则返回 None
+    """
+    lead_match = _KNOWLEDGE_LEAD_RE.search(line)
+    if lead_match is None:
+        return None
+    found = _find_id_after(line, lead_match.end())
+    if found is None:
+        return None
+    return lead_match.group(1), found[0], found[1]
+
+
+def _iter_raw_lines(f: BinaryIO) -> Iterator[bytes]:
+    """
+    通过 mmap 逐行读取二进制文件（按 b'\\n' 切分并保留行尾）
+    
+    mmap 不支持空文件以及管道等非普通文件，映射也可能因平台或权限失败，这些情况下退回到按文件对象逐行读取
+    （文件对象以 LOG_READ_BUFFER_SIZE 的缓冲区打开，逐行迭代同样只占用常数内存）。
+    
+    Args:
+        f: 以二进制模式打开的文件对象
+        
+    Yields:
+        文件中的每一行（bytes）
+    """
+    file_stat = os.fstat(f.fileno())
+    if file_stat.st_size == 0 or not stat.S_ISREG(file_stat.st_mode):
+        yield from f
+        return
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        yield from f
+        return
+    with mm:
+        if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        yield from iter(mm.readline, b'')
+
+
+def _iter_log_lines(f: BinaryIO) -> Iterator[str]:
+    """
+    逐行读取日志文件并解码，切分结果与文本模式（通用换行符）打开时一致
+    
+    Args:
+        f: 以二进制模式打开的日志文件对象
+        
+    Yields:
+        日志中的每一行（行尾统一为 '\\n'）
+    """
+    for raw_line in _iter_raw_lines(f):
+        line = raw_line.decode('utf-8')
+        if '\r' not in line:
+            yield line
+            continue
+        # 文本模式会把 \r\n 和单独的 \r 都当作换行符并转换为 \n
+        pieces = line.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+        for piece in pieces[:-1]:
+            yield piece + '\n'
+        if pieces[-1]:
+            yield pieces[-1]
+
+
+def _iter_with_previous(lines: Iterator[str]) -> Iterator[Tuple[Optional[str], str]]:
+    """
+    逐行迭代，同时给出前一行
+    
+    Args:
+        lines: 行迭代器
+        
+    Yields:
+        (前一行, 当前行) 元组，第一行的前一行为 None
+    """
+    prev_line = None
+    for line in lines:
+        yield prev_line, line
+        prev_line = line
+
+
+def extract_enhancement_times(log_file: str) -> List[EnhancementRecord]:
     """
     从日志文件中提取每个 enhancement 的使用时间
     
@@ -140,9 +431,20 @@ def extract_enhancement_times(log_file: str) -> List[Dict[str, Any]]:
     Returns:
         每个 enhancement 的信息列表，包含类型、开始时间、结束时间、持续时间等
     """
-    with open(log_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    with open(log_file, 'rb', buffering=LOG_READ_BUFFER_SIZE) as f:
+        return _extract_from_lines(_iter_log_lines(f))
+
+
+def _extract_from_lines(lines: Iterator[str]) -> List[EnhancementRecord]:
+    """
+    从日志行迭代器中提取每个 enhancement 的使用时间
     
+    Args:
+        lines: 日志行迭代器
+        
+    Returns:
+        每个 enhancement 的信息列表
+    """
     enhancements = []
     
     # 用于跟踪当前活动的 enhancement
@@ -150,49 +452,76 @@ def extract_enhancement_times(log_file: str) -> List[Dict[str, Any]]:
     active_knowledge: Dict[str, Dict[str, Dict[str, Any]]] = {}
     active_llm_calls: Dict[str, Dict[str, Any]] = {}
     last_finished_tool_id: Optional[str] = None
-    finished_tool_map: Dict[str, Dict[str, Any]] = {}
+    finished_tool_map: Dict[str, EnhancementRecord] = {}
     tool_skipped_ids: set = set()
-    
-    for i, line in enumerate(lines):
+    # 上一行结束的 method2 记录（已按原顺序加入结果），等待下一行确认是否被 discard：(knowledge_id, 记录)
+    pending_method2: Optional[Tuple[str, EnhancementRecord]] = None
+    # 触发字面量展开为局部变量，逐个用 in 检查（比 any() 生成器、正则多选或 Aho-Corasick 自动机都快）
+    trigger_tool, trigger_knowledge, trigger_llm_call, trigger_tool_calls, trigger_in = EVENT_TRIGGERS
+    
+    for i, (prev_line, line) in enumerate(_iter_with_previous(lines)):
+        # method2 的 discard 只可能出现在结束行的下一行，在处理本行的其他事件之前先确认
+        if pending_method2 is not None:
+            pending_id, pending_record = pending_method2
+            if _find_bracketed_id(line, _DISCARD_PREFIX, _DISCARD_SUFFIX) == pending_id:
+                pending_record.has_error = True
+            pending_method2 = None
+        
+        # 先用子串检查过滤掉不含任何事件的行，避免解析时间戳和正则匹配
+        if not (trigger_in in line or trigger_tool in line or trigger_knowledge in line
+                or trigger_llm_call in line or trigger_tool_calls in line):
+            continue
+        
+        # 先识别本行包含的事件，只有确实命中事件时才解析时间戳
+        # 同一前缀的开始/结束等事件共享一次 UUID 定位，只分别检查后缀
+        in_event = _find_prefixed_id(line, _IN_PREFIX)
+        llm_call_event = _find_prefixed_id(line, _LLM_CALL_PREFIX)
+        tool_start_id = _find_tool_start_id(line)
+        no_tools_id = _id_with_suffixes(line, in_event, _NO_TOOLS_SUFFIX)
+        tool_end_id = _find_bracketed_id(line, _TOOL_FINISHED_PREFIX, 'finished')
+        tool_error_id = _id_with_suffixes(line, in_event, *_TOOL_ERROR_SUFFIXES)
+        knowledge_event = _find_knowledge_event(line)
+        knowledge_started = knowledge_ended = False
+        if knowledge_event is not None:
+            method_num, knowledge_id, knowledge_id_end = knowledge_event
+            knowledge_started = line.find('started', knowledge_id_end) != -1
+            knowledge_ended = line.find('ended', knowledge_id_end) != -1
+        llm_call_start_id = _id_with_suffixes(line, llm_call_event, 'started')
+        llm_call_end_id = _id_with_suffixes(line, llm_call_event, 'ended')
+        
+        if not (tool_start_id or no_tools_id or tool_end_id or tool_error_id
+                or knowledge_started or knowledge_ended
+                or llm_call_start_id or llm_call_end_id):
+            continue
+        
         timestamp = parse_timestamp(line)
         if timestamp is None:
             continue
         
-        timestamp_str = timestamp.strftime(TIMESTAMP_FORMAT)
-        
         # 检测 tool_enhancement 开始
-        tool_start_match = re.search(TOOL_START_PATTERN, line)
-        if tool_start_match:
-            tool_id = tool_start_match.group(1)
+        if tool_start_id:
+            tool_id = tool_start_id
             active_tools[tool_id] = {
                 'line_num': i + 1,
-                'timestamp_str': timestamp_str,
-                'start_time': timestamp,
-                'type': 'tool_enhancement',
-                'id': tool_id
+                'start_time': timestamp
             }
         
         # 检测 "No tools has been called" 消息
-        no_tools_match = re.search(NO_TOOLS_PATTERN, line)
-        if no_tools_match:
-            tool_id = no_tools_match.group(1)
-            tool_skipped_ids.add(tool_id)
+        if no_tools_id:
+            tool_skipped_ids.add(no_tools_id)
         
         # 匹配 finished 和 failed
-        tool_end_id_match = re.search(TOOL_FINISHED_PATTERN, line)
-        tool_error_match = re.search(TOOL_ERROR_PATTERN, line)
-        
         matched_tool_id = None
         has_error = False
         is_skipped = False
         
-        if tool_end_id_match:
-            matched_tool_id = tool_end_id_match.group(1)
+        if tool_end_id:
+            matched_tool_id = tool_end_id
             if matched_tool_id in tool_skipped_ids:
                 is_skipped = True
             has_error = False
-        elif tool_error_match:
-            matched_tool_id = tool_error_match.group(1)
+        elif tool_error_id:
+            matched_tool_id = tool_error_id
             has_error = True
         
         if matched_tool_id and matched_tool_id in active_tools:
@@ -233,86 +562,65 @@ def extract_enhancement_times(log_file: str) -> List[Dict[str, Any]]:
                 finished_tool_map[matched_tool_id] = tool_record
         
         # 检测 knowledge_enhancement 开始
-        knowledge_start_match = re.search(KNOWLEDGE_START_PATTERN, line)
-        if knowledge_start_match:
-            method_num = knowledge_start_match.group(1)
-            knowledge_id = knowledge_start_match.group(2)
+        if knowledge_started:
             key = f'knowledge_enhancement_method{method_num}'
             if key not in active_knowledge:
                 active_knowledge[key] = {}
             active_knowledge[key][knowledge_id] = {
                 'line_num': i + 1,
-                'timestamp_str': timestamp_str,
-                'start_time': timestamp,
-                'method_num': method_num,
-                'id': knowledge_id
+                'start_time': timestamp
             }
         
         # 检测 knowledge_enhancement 结束
-        knowledge_end_match = re.search(KNOWLEDGE_END_PATTERN, line)
-        if knowledge_end_match:
-            method_num = knowledge_end_match.group(1)
-            knowledge_id = knowledge_end_match.group(2)
+        if knowledge_ended:
             key = f'knowledge_enhancement_method{method_num}'
             if key in active_knowledge and knowledge_id in active_knowledge[key]:
                 knowledge = active_knowledge[key].pop(knowledge_id)
-                duration = (timestamp - knowledge['start_time']).total_seconds()
-                
-                # 检查是否被 discard（对于 method2，discard 只可能出现在下一行）
-                has_error = False
-                if method_num == '2' and i + 1 < len(lines):
-                    next_line = lines[i + 1]
-                    discard_match = re.search(DISCARD_PATTERN, next_line)
-                    if discard_match and discard_match.group(1) == knowledge_id:
-                        has_error = True
-                
-                enhancements.append(_create_enhancement_record(
+                knowledge_record = _create_enhancement_record(
                     f'knowledge_enhancement_method{method_num}',
                     knowledge['start_time'],
                     timestamp,
                     knowledge['line_num'],
                     i + 1,
                     knowledge_id,
-                    has_error=has_error
-                ))
+                    has_error=False
+                )
+                
+                enhancements.append(knowledge_record)
+                if method_num == '2':
+                    # 是否被 discard 要看下一行，先占好位置，下一次迭代再补上 has_error
+                    pending_method2 = (knowledge_id, knowledge_record)
         
         # 检测 LLM call 开始
-        llm_call_start_match = re.search(LLM_CALL_START_PATTERN, line)
-        if llm_call_start_match:
-            llm_call_id = llm_call_start_match.group(1)
+        if llm_call_start_id:
+            llm_call_id = llm_call_start_id
             tool_id = None
             
             # 检查前一行是否是 finished
-            if i > 0 and last_finished_tool_id:
-                prev_line = lines[i - 1]
-                finished_match = re.search(TOOL_FINISHED_PATTERN, prev_line)
-                if finished_match and finished_match.group(1) == last_finished_tool_id:
+            if prev_line is not None and last_finished_tool_id:
+                finished_id = _find_bracketed_id(prev_line, _TOOL_FINISHED_PREFIX, 'finished')
+                if finished_id == last_finished_tool_id:
                     tool_id = last_finished_tool_id
                     last_finished_tool_id = None
             
             if llm_call_id not in active_llm_calls:
                 active_llm_calls[llm_call_id] = {
                     'line_num': i + 1,
-                    'timestamp_str': timestamp_str,
                     'start_time': timestamp,
-                    'type': 'llm_call',
-                    'id': llm_call_id,
                     'tool_id': tool_id
                 }
             else:
                 active_llm_calls[llm_call_id]['start_time'] = timestamp
                 active_llm_calls[llm_call_id]['line_num'] = i + 1
-                active_llm_calls[llm_call_id]['timestamp_str'] = timestamp_str
                 if tool_id:
                     active_llm_calls[llm_call_id]['tool_id'] = tool_id
         
         # 检测 LLM call 结束
-        llm_call_end_match = re.search(LLM_CALL_END_PATTERN, line)
-        if llm_call_end_match:
-            llm_call_id = llm_call_end_match.group(1)
+        if llm_call_end_id:
+            llm_call_id = llm_call_end_id
             if llm_call_id in active_llm_calls:
                 llm_call = active_llm_calls.pop(llm_call_id)
-                llm_duration = (timestamp - llm_call['start_time']).total_seconds()
+                llm_duration = (timestamp - llm_call['start_time']) / 1_000_000
                 
                 if llm_call.get('start_time'):
                     llm_record = _create_enhancement_record(
@@ -330,20 +638,20 @@ def extract_enhancement_times(log_file: str) -> List[Dict[str, Any]]:
                     tool_id = llm_call.get('tool_id')
                     if tool_id and tool_id in finished_tool_map:
                         tool_record = finished_tool_map[tool_id]
-                        total_duration = tool_record['duration_seconds'] + llm_duration
-                        enhancements.append({
-                            'type': TYPE_TOOL_COMPLETE,
-                            'tool_id': tool_id,
-                            'llm_id': llm_call_id,
-                            'start_time': tool_record['start_time'],
-                            'end_time': timestamp,
-                            'duration_seconds': total_duration,
-                            'tool_duration': tool_record['duration_seconds'],
-                            'llm_duration': llm_duration,
-                            'start_line': tool_record['start_line'],
-                            'end_line': i + 1,
-                            'node_id': tool_id
-                        })
+                        total_duration = tool_record.duration_seconds + llm_duration
+                        enhancements.append(EnhancementRecord(
+                            type=TYPE_TOOL_COMPLETE,
+                            tool_id=tool_id,
+                            llm_id=llm_call_id,
+                            start_time=tool_record.start_time,
+                            end_time=timestamp,
+                            duration_seconds=total_duration,
+                            tool_duration=tool_record.duration_seconds,
+                            llm_duration=llm_duration,
+                            start_line=tool_record.start_line,
+                            end_line=i + 1,
+                            node_id=tool_id
+                        ))
     
     # 记录未完成的 tool_enhancement（作为 skipped）
     for tool_id, tool in active_tools.items():
@@ -357,41 +665,115 @@ def extract_enhancement_times(log_file: str) -> List[Dict[str, Any]]:
             has_error=False
         ))
         # 设置持续时间为 0
-        enhancements[-1]['duration_seconds'] = 0.0
+        enhancements[-1].duration_seconds = 0.0
     
     return enhancements
 
 
-def _update_stat_entry(
-    stats: Dict[str, Dict[str, Any]],
-    key: str,
-    duration: float,
-    is_failed: bool = False
-) -> None:
+def _stat_key_for_type(enh_type: str) -> Optional[str]:
     """
-    更新统计条目
+    获取 enhancement 类型对应的统计键
     
     Args:
-        stats: 统计字典
-        key: 统计键
-        duration: 持续时间
-        is_failed: 是否失败
+        enh_type: enhancement 类型
+        
+    Returns:
+        统计键，不参与统计的类型返回 None
+    """
+    if enh_type in (TYPE_TOOL_FINISHED, TYPE_TOOL_FAILED, TYPE_TOOL_SKIPPED, TYPE_LLM_CALL):
+        return enh_type
+    # knowledge 类型按子串归类（如 method12 归入 method1）
+    if 'method1' in enh_type:
+        return TYPE_KNOWLEDGE_METHOD1
+    if 'method2' in enh_type:
+        return TYPE_KNOWLEDGE_METHOD2
+    if enh_type == TYPE_TOOL_COMPLETE:
+        return TYPE_TOOL_COMPLETE
+    return None
+
+
+def _accumulate(values: List[float]) -> float:
+    """按顺序逐个累加（与逐条 += 的结果完全一致，不受 sum() 补偿求和实现的影响）"""
+    return functools.reduce(operator.add, values, 0.0)
+
+
+# 统计信息中各类型的顺序
+_STAT_TYPES = (
+    TYPE_TOOL_FINISHED,
+    TYPE_TOOL_FAILED,
+    TYPE_TOOL_SKIPPED,
+    TYPE_TOOL_COMPLETE,
+    TYPE_LLM_CALL,
+    TYPE_KNOWLEDGE_METHOD1,
+    TYPE_KNOWLEDGE_METHOD2
+)
+
+
+class _StatisticsAccumulator:
     """
-    if key not in stats:
-        stats[key] = _create_default_stat_entry()
+    逐条累积 enhancement 记录，最后一次性计算各类型的统计信息
     
-    stat = stats[key]
-    if is_failed:
-        stat[FIELD_FAILED_COUNT] += 1
-    else:
-        stat[FIELD_COUNT] += 1
+    先按统计键收集持续时间，再用内置函数整体求和/最小/最大，避免逐条更新字典
+    """
+    __slots__ = ('_durations', '_failed_counts', '_skipped_count', '_stat_keys')
+    
+    def __init__(self) -> None:
+        self._durations: Dict[str, List[float]] = {key: [] for key in _STAT_TYPES}
+        self._failed_counts: Dict[str, int] = dict.fromkeys(_STAT_TYPES, 0)
+        self._skipped_count = 0
+        self._stat_keys: Dict[str, Optional[str]] = {}
+    
+    def add(self, enh: EnhancementRecord) -> None:
+        """累积一条记录"""
+        enh_type = enh.type
+        if enh_type not in self._stat_keys:
+            self._stat_keys[enh_type] = _stat_key_for_type(enh_type)
+        key = self._stat_keys[enh_type]
+        
+        if key is None:
+            return
+        if key == TYPE_TOOL_SKIPPED:
+            # skipped 不计时间
+            self._skipped_count += 1
+            return
+        
+        self._durations[key].append(enh.duration_seconds)
+        if key == TYPE_TOOL_FAILED or (key == TYPE_KNOWLEDGE_METHOD2 and enh.has_error):
+            self._failed_counts[key] += 1
     
-    stat[FIELD_TOTAL_TIME] += duration
-    stat[FIELD_MIN_TIME] = min(stat[FIELD_MIN_TIME], duration)
-    stat[FIELD_MAX_TIME] = max(stat[FIELD_MAX_TIME], duration)
+    def result(self) -> Dict[str, Dict[str, Any]]:
+        """
+        计算统计信息
+        
+        Returns:
+            包含各类型统计信息的字典
+        """
+        stats = {key: _create_default_stat_entry() for key in _STAT_TYPES}
+        stats[TYPE_TOOL_SKIPPED][FIELD_COUNT] = self._skipped_count
+        
+        for key, values in self._durations.items():
+            if not values:
+                continue
+            stat = stats[key]
+            stat[FIELD_FAILED_COUNT] = self._failed_counts[key]
+            stat[FIELD_COUNT] = len(values) - self._failed_counts[key]
+            stat[FIELD_TOTAL_TIME] = _accumulate(values)
+            stat[FIELD_MIN_TIME] = min(values)
+            stat[FIELD_MAX_TIME] = max(stat[FIELD_MAX_TIME], max(values))
+        
+        # 计算平均值
+        for key in stats:
+            stat = stats[key]
+            total_count = stat[FIELD_COUNT] + stat[FIELD_FAILED_COUNT]
+            if total_count > 0:
+                stat[FIELD_AVG_TIME] = stat[FIELD_TOTAL_TIME] / total_count
+                if stat[FIELD_MIN_TIME] == float('inf'):
+                    stat[FIELD_MIN_TIME] = 0.0
+        
+        return stats
 
 
-def calculate_statistics(enhancements: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+def calculate_statistics(enhancements: List[EnhancementRecord]) -> Dict[str, Dict[str, Any]]:
     """
     计算 enhancement 的统计信息
     
@@ -401,86 +783,48 @@ def calculate_statistics(enhancements: List[Dict[str, Any]]) -> Dict[str, Dict[s
     Returns:
         包含各类型统计信息的字典
     """
-    stats = {
-        TYPE_TOOL_FINISHED: _create_default_stat_entry(),
-        TYPE_TOOL_FAILED: _create_default_stat_entry(),
-        TYPE_TOOL_SKIPPED: _create_default_stat_entry(),
-        TYPE_TOOL_COMPLETE: _create_default_stat_entry(),
-        TYPE_LLM_CALL: _create_default_stat_entry(),
-        TYPE_KNOWLEDGE_METHOD1: _create_default_stat_entry(),
-        TYPE_KNOWLEDGE_METHOD2: _create_default_stat_entry()
-    }
-    
+    accumulator = _StatisticsAccumulator()
     for enh in enhancements:
-        enh_type = enh['type']
-        duration = enh['duration_seconds']
-        has_error = enh.get('has_error', False)
-        
-        if enh_type == TYPE_TOOL_FINISHED:
-            _update_stat_entry(stats, TYPE_TOOL_FINISHED, duration, False)
-        elif enh_type == TYPE_TOOL_FAILED:
-            _update_stat_entry(stats, TYPE_TOOL_FAILED, duration, True)
-        elif enh_type == TYPE_TOOL_SKIPPED:
-            stats[TYPE_TOOL_SKIPPED][FIELD_COUNT] += 1
-            # skipped 不计时间
-        elif enh_type == TYPE_LLM_CALL:
-            _update_stat_entry(stats, TYPE_LLM_CALL, duration, False)
-        elif 'method1' in enh_type:
-            _update_stat_entry(stats, TYPE_KNOWLEDGE_METHOD1, duration, False)
-        elif 'method2' in enh_type:
-            _update_stat_entry(stats, TYPE_KNOWLEDGE_METHOD2, duration, has_error)
-        elif enh_type == TYPE_TOOL_COMPLETE:
-            _update_stat_entry(stats, TYPE_TOOL_COMPLETE, duration, False)
-    
-    # 计算平均值
-    for key in stats:
-        stat = stats[key]
-        total_count = stat[FIELD_COUNT] + stat[FIELD_FAILED_COUNT]
-        if total_count > 0:
-            stat[FIELD_AVG_TIME] = stat[FIELD_TOTAL_TIME] / total_count
-            if stat[FIELD_MIN_TIME] == float('inf'):
-                stat[FIELD_MIN_TIME] = 0.0
-    
-    return stats
+        accumulator.add(enh)
+    return accumulator.result()
 
 
-def convert_to_json_record(enh: Dict[str, Any]) -> Dict[str, Any]:
+def convert_to_json_record(enh: EnhancementRecord) -> Dict[str, Any]:
     """
-    将 enhancement 记录转换为 JSON 格式（datetime 转为字符串）
+    将 enhancement 记录转换为 JSON 格式（时间戳转为字符串）
     
     Args:
-        enh: enhancement 记录字典
+        enh: enhancement 记录
         
     Returns:
         转换后的 JSON 格式记录
     """
     record = {
-        'type': enh['type'],
-        'node_id': enh.get('node_id', ''),
-        'start_time': enh['start_time'].strftime(TIMESTAMP_FORMAT),
-        'end_time': enh['end_time'].strftime(TIMESTAMP_FORMAT),
-        'duration_seconds': round(enh['duration_seconds'], DECIMAL_PLACES),
-        'start_line': enh['start_line'],
-        'end_line': enh['end_line']
+        'type': enh.type,
+        'node_id': enh.node_id,
+        'start_time': format_timestamp(enh.start_time),
+        'end_time': format_timestamp(enh.end_time),
+        'duration_seconds': round(enh.duration_seconds, DECIMAL_PLACES),
+        'start_line': enh.start_line,
+        'end_line': enh.end_line
     }
     
-    # 添加可选字段
-    optional_fields = ['has_error', 'tool_id', 'llm_id']
-    for field in optional_fields:
-        if field in enh:
-            record[field] = enh[field]
-    
-    # 处理浮点数字段
-    float_fields = ['tool_duration', 'llm_duration']
-    for field in float_fields:
-        if field in enh:
-            record[field] = round(enh[field], DECIMAL_PLACES)
+    # 添加该类型带有的可选字段
+    if enh.type == TYPE_LLM_CALL:
+        record['tool_id'] = enh.tool_id
+    elif enh.type == TYPE_TOOL_COMPLETE:
+        record['tool_id'] = enh.tool_id
+        record['llm_id'] = enh.llm_id
+        record['tool_duration'] = round(enh.tool_duration, DECIMAL_PLACES)
+        record['llm_duration'] = round(enh.llm_duration, DECIMAL_PLACES)
+    else:
+        record['has_error'] = enh.has_error
     
     return record
 
 
 def calculate_stats_info(
-    enhancement_list: List[Dict[str, Any]], 
+    enhancement_list: List[EnhancementRecord], 
     include_success_failed: bool = False
 ) -> Dict[str, Any]:
     """
@@ -497,12 +841,12 @@ def calculate_stats_info(
         return {}
     
     if include_success_failed:
-        success_list = [enh for enh in enhancement_list if not enh.get('has_error', False)]
+        success_list = [enh for enh in enhancement_list if not enh.has_error]
         failed_count = len(enhancement_list) - len(success_list)
         
         if success_list:
-            avg_time = sum(enh['duration_seconds'] for enh in success_list) / len(success_list)
-            total_time = sum(enh['duration_seconds'] for enh in success_list)
+            total_time = sum(enh.duration_seconds for enh in success_list)
+            avg_time = total_time / len(success_list)
             return {
                 '总数': len(enhancement_list),
                 '成功数': len(success_list),
@@ -519,8 +863,8 @@ def calculate_stats_info(
                 '平均时间(秒)': 0.0
             }
     else:
-        avg_time = sum(enh['duration_seconds'] for enh in enhancement_list) / len(enhancement_list)
-        total_time = sum(enh['duration_seconds'] for enh in enhancement_list)
+        total_time = sum(enh.duration_seconds for enh in enhancement_list)
+        avg_time = total_time / len(enhancement_list)
         return {
             '总数': len(enhancement_list),
             '总时间(秒)': round(total_time, DECIMAL_PLACES),
@@ -528,11 +872,27 @@ def calculate_stats_info(
         }
 
 
+def _json_dumps_bytes(data: Any) -> bytes:
+    """
+    将数据序列化为缩进2格的 UTF-8 JSON（保留非ASCII字符）
+    
+    Args:
+        data: 待序列化的数据
+        
+    Returns:
+        JSON 字节串
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
 def save_enhancement_list_to_file(
     filepath: str,
-    enhancement_list: List[Dict[str, Any]],
+    enhancement_list: List[EnhancementRecord],
     stats_info: Optional[Dict[str, Any]] = None,
-    include_success_failed: bool = False
+    include_success_failed: bool = False,
+    json_records: Optional[List[Dict[str, Any]]] = None
 ) -> None:
     """
     将 enhancement 列表保存到 JSON 文件
@@ -542,74 +902,103 @@ def save_enhancement_list_to_file(
         enhancement_list: enhancement 记录列表
         stats_info: 可选的统计信息字典，如果为 None 则自动计算
         include_success_failed: 是否在统计中包含成功/失败信息
+        json_records: 可选的已转换 JSON 记录（与 enhancement_list 一一对应），为 None 时自动转换
     """
     if stats_info is None:
         stats_info = calculate_stats_info(enhancement_list, include_success_failed)
     
-    records = [convert_to_json_record(enh) for enh in enhancement_list]
-    output_data = {'统计信息': stats_info, '数据': records}
+    if json_records is None:
+        json_records = [convert_to_json_record(enh) for enh in enhancement_list]
+    output_data = {'统计信息': stats_info, '数据': json_records}
     
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    with open(filepath, 'wb') as f:
+        f.write(_json_dumps_bytes(output_data))
+
 
+# 分类桶名称（顺序即输出文件中的分类顺序）
+_BUCKET_NAMES = (
+    'tool_finished',
+    'tool_failed',
+    'tool_skipped',
+    'tool_complete',
+    'method1',
+    'method2',
+    'method2_success',
+    'method2_discarded',
+    'knowledge',
+    'llm_call',
+    'all',
+    'all_success'
+)
 
-def _classify_enhancements(enhancements: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+
+def _bucket_names_for(enh_type: str, has_error: bool) -> Tuple[str, ...]:
     """
-    将 enhancement 列表按类型分类
+    获取一条记录所属的分类桶
+    
+    Args:
+        enh_type: enhancement 类型
+        has_error: 是否出错
+        
+    Returns:
+        分类桶名称元组
+    """
+    if enh_type == TYPE_TOOL_FINISHED:
+        return ('tool_finished',)
+    if enh_type == TYPE_TOOL_FAILED:
+        return ('tool_failed', 'all')
+    if enh_type == TYPE_TOOL_SKIPPED:
+        return ('tool_skipped', 'all')
+    if enh_type == TYPE_TOOL_COMPLETE:
+        return ('tool_complete', 'all', 'all_success')
+    if enh_type == TYPE_LLM_CALL:
+        return ('llm_call',)
+    if enh_type == TYPE_KNOWLEDGE_METHOD1:
+        if has_error:
+            return ('method1', 'knowledge', 'all')
+        return ('method1', 'knowledge', 'all', 'all_success')
+    if enh_type == TYPE_KNOWLEDGE_METHOD2:
+        if has_error:
+            return ('method2', 'knowledge', 'all', 'method2_discarded')
+        return ('method2', 'method2_success', 'knowledge', 'all', 'all_success')
+    return ()
+
+
+def _analyze_enhancements(
+    enhancements: List[EnhancementRecord]
+) -> Tuple[Dict[str, List[EnhancementRecord]], Dict[str, List[Dict[str, Any]]], Dict[str, Dict[str, Any]]]:
+    """
+    单次遍历 enhancement 列表，同时完成分类、统计和 JSON 记录转换
+    
+    每条记录只转换一次 JSON，被多个分类共享
     
     Args:
         enhancements: enhancement 记录列表
         
     Returns:
-        分类后的字典，键为类型名，值为该类型的记录列表
-    """
-    classified = {
-        'tool_finished': [],
-        'tool_failed': [],
-        'tool_skipped': [],
-        'tool_complete': [],
-        'method1': [],
-        'method2': [],
-        'method2_discarded': [],
-        'knowledge': [],
-        'llm_call': [],
-        'all': [],
-        'all_success': []
-    }
+        (分类后的记录字典, 分类后的 JSON 记录字典, 各类型统计信息) 元组
+    """
+    classified: Dict[str, List[EnhancementRecord]] = {name: [] for name in _BUCKET_NAMES}
+    classified_json: Dict[str, List[Dict[str, Any]]] = {name: [] for name in _BUCKET_NAMES}
+    accumulator = _StatisticsAccumulator()
+    bucket_names: Dict[Tuple[str, bool], Tuple[str, ...]] = {}
     
     for enh in enhancements:
-        enh_type = enh['type']
-        
-        if enh_type == TYPE_TOOL_FINISHED:
-            classified['tool_finished'].append(enh)
-        elif enh_type == TYPE_TOOL_FAILED:
-            classified['tool_failed'].append(enh)
-            classified['all'].append(enh)
-        elif enh_type == TYPE_TOOL_SKIPPED:
-            classified['tool_skipped'].append(enh)
-            classified['all'].append(enh)
-        elif enh_type == TYPE_TOOL_COMPLETE:
-            classified['tool_complete'].append(enh)
-            classified['all'].append(enh)
-            classified['all_success'].append(enh)
-        elif enh_type == TYPE_LLM_CALL:
-            classified['llm_call'].append(enh)
-        elif enh_type == TYPE_KNOWLEDGE_METHOD1:
-            classified['method1'].append(enh)
-            classified['knowledge'].append(enh)
-            classified['all'].append(enh)
-            if not enh.get('has_error', False):
-                classified['all_success'].append(enh)
-        elif enh_type == TYPE_KNOWLEDGE_METHOD2:
-            classified['method2'].append(enh)
-            classified['knowledge'].append(enh)
-            classified['all'].append(enh)
-            if enh.get('has_error', False):
-                classified['method2_discarded'].append(enh)
-            else:
-                classified['all_success'].append(enh)
+        accumulator.add(enh)
+        
+        bucket_key = (enh.type, enh.has_error)
+        if bucket_key not in bucket_names:
+            bucket_names[bucket_key] = _bucket_names_for(*bucket_key)
+        names = bucket_names[bucket_key]
+        if not names:
+            continue
+        
+        json_record = convert_to_json_record(enh)
+        for name in names:
+            classified[name].append(enh)
+            classified_json[name].append(json_record)
     
-    return classified
+    return classified, classified_json, accumulator.result()
 
 
 def _generate_output_file_path(input_dir: str, input_basename: str, suffix: str) -> str:
@@ -647,7 +1036,7 @@ def _print_statistics_table(stats: Dict[str, Dict[str, Any]]) -> None:
                   f"{stat[FIELD_MIN_TIME]:<15.2f} {stat[FIELD_MAX_TIME]:<15.2f}")
 
 
-def _print_preview(enhancements: List[Dict[str, Any]]) -> None:
+def _print_preview(enhancements: List[EnhancementRecord]) -> None:
     """
     打印前 N 个 enhancement 事件预览
     
@@ -661,10 +1050,9 @@ def _print_preview(enhancements: List[Dict[str, Any]]) -> None:
     print("-" * SEPARATOR_WIDTH)
     
     for i, enh in enumerate(enhancements[:PREVIEW_COUNT], 1):
-        start_time_str = enh['start_time'].strftime(TIMESTAMP_FORMAT_SIMPLE)
-        node_id = enh.get('node_id', 'N/A')
-        print(f"{i:<6} {str(node_id):<40} {enh['type']:<30} {start_time_str:<20} "
-              f"{enh['duration_seconds']:<15.2f} {enh['start_line']:<10}")
+        start_time_str = format_timestamp(enh.start_time, TIMESTAMP_FORMAT_SIMPLE)
+        print(f"{i:<6} {str(enh.node_id):<40} {enh.type:<30} {start_time_str:<20} "
+              f"{enh.duration_seconds:<15.2f} {enh.start_line:<10}")
 
 
 def _build_summary_statistics(stats: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
@@ -780,7 +1168,8 @@ def _build_summary_statistics(stats: Dict[str, Dict[str, Any]]) -> Dict[str, Dic
 def _save_all_output_files(
     input_dir: str,
     input_basename: str,
-    classified: Dict[str, List[Dict[str, Any]]],
+    classified: Dict[str, List[EnhancementRecord]],
+    classified_json: Dict[str, List[Dict[str, Any]]],
     stats: Dict[str, Dict[str, Any]]
 ) -> None:
     """
@@ -790,6 +1179,7 @@ def _save_all_output_files(
         input_dir: 输入目录
         input_basename: 输入文件基础名
         classified: 分类后的 enhancement 列表
+        classified_json: 分类后的 JSON 记录列表（与 classified 一一对应）
         stats: 统计信息
     """
     # 生成所有文件路径
@@ -807,62 +1197,76 @@ def _save_all_output_files(
         'all_success': _generate_output_file_path(input_dir, input_basename, '_enhancement_times_all_success.json')
     }
     
-    # 保存 tool_enhancement_complete
-    stats_info = {}
+    # 先在主线程算好每个文件的统计信息，写入任务只负责序列化和写盘
+    # tool_enhancement_complete
+    tool_complete_stats = {}
     if classified['tool_complete']:
         tool_complete_list = classified['tool_complete']
-        avg_time = sum(enh['duration_seconds'] for enh in tool_complete_list) / len(tool_complete_list)
-        total_time = sum(enh['duration_seconds'] for enh in tool_complete_list)
-        avg_tool_time = sum(enh['tool_duration'] for enh in tool_complete_list) / len(tool_complete_list)
-        avg_llm_time = sum(enh['llm_duration'] for enh in tool_complete_list) / len(tool_complete_list)
-        stats_info = {
+        # 一次遍历取出三列持续时间，再分别用 sum() 求和（结果与逐列求和完全一致）
+        durations, tool_durations, llm_durations = zip(*(
+            (enh.duration_seconds, enh.tool_duration, enh.llm_duration) for enh in tool_complete_list
+        ))
+        total_time = sum(durations)
+        avg_time = total_time / len(tool_complete_list)
+        avg_tool_time = sum(tool_durations) / len(tool_complete_list)
+        avg_llm_time = sum(llm_durations) / len(tool_complete_list)
+        tool_complete_stats = {
             '总数': len(tool_complete_list),
             '总时间(秒)': round(total_time, DECIMAL_PLACES),
             '平均时间(秒)': round(avg_time, DECIMAL_PLACES),
             'tool_enhancement平均时间(秒)': round(avg_tool_time, DECIMAL_PLACES),
             'llm_call平均时间(秒)': round(avg_llm_time, DECIMAL_PLACES)
         }
-    save_enhancement_list_to_file(file_paths['tool_complete'], classified['tool_complete'], stats_info)
-    
-    # 保存其他文件
-    save_enhancement_list_to_file(file_paths['tool_finished'], classified['tool_finished'])
-    save_enhancement_list_to_file(file_paths['tool_failed'], classified['tool_failed'])
     
-    # 保存 tool_enhancement_skipped
-    stats_info = {}
+    # tool_enhancement_skipped
+    tool_skipped_stats = {}
     if classified['tool_skipped']:
-        stats_info = {
+        tool_skipped_stats = {
             '总数': len(classified['tool_skipped']),
             '总时间(秒)': 0.0,
             '平均时间(秒)': 0.0,
             '说明': 'skipped 事件不计入时间统计'
         }
-    save_enhancement_list_to_file(file_paths['tool_skipped'], classified['tool_skipped'], stats_info)
-    
-    save_enhancement_list_to_file(file_paths['llm_call'], classified['llm_call'])
-    save_enhancement_list_to_file(file_paths['method1'], classified['method1'], include_success_failed=True)
-    
-    # 保存 method2（只保存成功的）
-    method2_success_list = [enh for enh in classified['method2'] if not enh.get('has_error', False)]
-    stats_info = calculate_stats_info(method2_success_list)
-    if stats_info:
-        stats_info['说明'] = '只包含成功的记录'
-    save_enhancement_list_to_file(file_paths['method2'], method2_success_list, stats_info)
     
-    # 保存 method2_discarded
-    stats_info = calculate_stats_info(classified['method2_discarded'])
-    if stats_info:
-        stats_info['说明'] = '全部被discard，但时间仍计入统计'
-    save_enhancement_list_to_file(file_paths['method2_discarded'], classified['method2_discarded'], stats_info)
-    
-    save_enhancement_list_to_file(file_paths['knowledge'], classified['knowledge'], include_success_failed=True)
-    save_enhancement_list_to_file(file_paths['all'], classified['all'], include_success_failed=True)
-    
-    # 保存所有成功的记录
-    stats_info = calculate_stats_info(classified['all_success'])
-    if stats_info:
-        stats_info['说明'] = '只包含成功的记录'
-    save_enhancement_list_to_file(file_paths['all_success'], classified['all_success'], stats_info)
+    # method2（只保存成功的）
+    method2_success_list = classified['method2_success']
+    method2_stats = calculate_stats_info(method2_success_list)
+    if method2_stats:
+        method2_stats['说明'] = '只包含成功的记录'
+    
+    # method2_discarded
+    method2_discarded_stats = calculate_stats_info(classified['method2_discarded'])
+    if method2_discarded_stats:
+        method2_discarded_stats['说明'] = '全部被discard，但时间仍计入统计'
+    
+    # 所有成功的记录
+    all_success_stats = calculate_stats_info(classified['all_success'])
+    if all_success_stats:
+        all_success_stats['说明'] = '只包含成功的记录'
+    
+    # (输出文件键, 数据桶, 统计信息)
+    write_tasks = [
+        ('tool_complete', 'tool_complete', tool_complete_stats),
+        ('tool_finished', 'tool_finished', calculate_stats_info(classified['tool_finished'])),
+        ('tool_failed', 'tool_failed', calculate_stats_info(classified['tool_failed'])),
+        ('tool_skipped', 'tool_skipped', tool_skipped_stats),
+        ('llm_call', 'llm_call', calculate_stats_info(classified['llm_call'])),
+        ('method1', 'method1', calculate_stats_info(classified['method1'], True)),
+        ('method2', 'method2_success', method2_stats),
+        ('method2_discarded', 'method2_discarded', method2_discarded_stats),
+        ('knowledge', 'knowledge', calculate_stats_info(classified['knowledge'], True)),
+        ('all', 'all', calculate_stats_info(classified['all'], True)),
+        ('all_success', 'all_success', all_success_stats)
+    ]
+    
+    def write_output_file(task: Tuple[str, str, Dict[str, Any]]) -> None:
+        file_key, bucket, stats_info = task
+        save_enhancement_list_to_file(file_paths[file_key], classified[bucket], stats_info,
+                                      json_records=classified_json[bucket])
+    
+    # 各文件互不相关，用线程池并发写入，让写盘与其余文件的序列化重叠
+    with ThreadPoolExecutor(max_workers=min(OUTPUT_WRITER_THREADS, len(write_tasks))) as executor:
+        list(executor.map(write_output_file, write_tasks))
     
     # 打印文件列表
     print(f"\n已生成11个JSON文件:")
@@ -879,20 +1283,33 @@ def _save_all_output_files(
     print(f"  11. {file_paths['all_success']} - 所有成功类型汇总 ({len(classified['all_success'])} 条)")
 
 
-def main() -> None:
-    """主函数：解析命令行参数并执行提取"""
-    parser = argparse.ArgumentParser(description="从 agent.log 中提取每个 enhancement 方法的使用时间")
-    parser.add_argument(
-        "log_file",
-        type=str,
-        nargs='?',
-        default='ninth/ninth_agent.log',
-        help="日志文件路径（默认: ninth/ninth_agent.log）"
-    )
-    args = parser.parse_args()
+def _extract_all(log_files: List[str]) -> List[List[EnhancementRecord]]:
+    """
+    提取多个日志文件中的 enhancement 记录，多个文件时用多进程并行解析
     
-    log_file = args.log_file
+    Args:
+        log_files: 日志文件路径列表
+        
+    Returns:
+        与 log_files 一一对应的 enhancement 记录列表
+    """
+    max_workers = min(len(log_files), os.cpu_count() or 1)
+    if max_workers <= 1:
+        return [extract_enhancement_times(log_file) for log_file in log_files]
     
+    # 每个文件的解析是独立的纯 CPU 任务，多进程可以绕开 GIL
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(extract_enhancement_times, log_files))
+
+
+def _report_log_file(log_file: str, enhancements: List[EnhancementRecord]) -> None:
+    """
+    打印单个日志文件的统计结果并保存所有输出文件
+    
+    Args:
+        log_file: 日志文件路径
+        enhancements: 从该文件提取的 enhancement 记录列表
+    """
     # 从输入文件路径提取目录和文件名
     input_abs_path = os.path.abspath(log_file)
     input_dir = os.path.dirname(input_abs_path)
@@ -902,14 +1319,10 @@ def main() -> None:
     if not input_dir:
         input_dir = os.getcwd()
     
-    print("提取 enhancement 使用时间")
-    print("=" * SEPARATOR_WIDTH)
-    
-    enhancements = extract_enhancement_times(log_file)
     print(f"\n总共提取到 {len(enhancements)} 个 enhancement 事件")
     
-    # 分类 enhancement
-    classified = _classify_enhancements(enhancements)
+    # 单次遍历完成分类、统计和 JSON 记录转换
+    classified, classified_json, stats = _analyze_enhancements(enhancements)
     
     print(f"\n分类统计:")
     print(f"  tool_enhancement_finished: {len(classified['tool_finished'])} 个")
@@ -921,8 +1334,6 @@ def main() -> None:
     print(f"  knowledge_enhancement (method1+method2): {len(classified['knowledge'])} 个")
     print(f"  总计: {len(classified['all'])} 个")
     
-    # 计算统计信息
-    stats = calculate_statistics(enhancements)
     _print_statistics_table(stats)
     _print_preview(enhancements)
     
@@ -930,14 +1341,46 @@ def main() -> None:
     stats_file = _generate_output_file_path(input_dir, input_basename, '_enhancement_statistics.json')
     stats_output = _build_summary_statistics(stats)
     
-    with open(stats_file, 'w', encoding='utf-8') as f:
-        json.dump(stats_output, f, ensure_ascii=False, indent=2)
+    with open(stats_file, 'wb') as f:
+        f.write(_json_dumps_bytes(stats_output))
     
     # 保存所有输出文件
-    _save_all_output_files(input_dir, input_basename, classified, stats)
+    _save_all_output_files(input_dir, input_basename, classified, classified_json, stats)
     
     print(f"\n统计信息已保存到 {stats_file} (JSON格式)")
 
 
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    主函数：解析命令行参数并执行提取
+    
+    Args:
+        argv: 命令行参数列表（不含程序名），为 None 时使用 sys.argv
+    """
+    parser = argparse.ArgumentParser(description="从 agent.log 中提取每个 enhancement 方法的使用时间")
+    parser.add_argument(
+        "log_files",
+        type=str,
+        nargs='*',
+        default=['ninth/ninth_agent.log'],
+        metavar="log_file",
+        help="日志文件路径，可指定多个并行处理（默认: ninth/ninth_agent.log）"
+    )
+    args = parser.parse_args(argv)
+    
+    log_files = args.log_files
+    
+    print("提取 enhancement 使用时间")
+    print("=" * SEPARATOR_WIDTH)
+    
+    all_enhancements = _extract_all(log_files)
+    
+    # 按命令行顺序依次输出，保证多个文件时的输出不会交错
+    for log_file, enhancements in zip(log_files, all_enhancements):
+        if len(log_files) > 1:
+            print(f"\n日志文件: {log_file}")
+        _report_log_file(log_file, enhancements)
+
+
 if __name__ == '__main__':
     main()
@@ -3,9 +3,20 @@ Find missing questions by comparing line numbers in result.jsonl with test.jsonl
 """
 import argparse
 import json
+import math
+import mmap
 import os
+import stat
 import sys
-from typing import Any, Dict, List, Set, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library json
+    orjson = None
 
 if sys.platform == 'win32':
     import io
@@ -18,6 +29,119 @@ QUESTION_KEY = 'question'
 ANSWER_KEY = 'answer'
 IS_MCQ_KEY = 'is_mcq'
 SOURCE_KEY = 'source'
+LINE_NUMBER_KEY = 'line_number'
+PARALLEL_MIN_BYTES = 64 << 20  # result.jsonl files smaller than this are scanned serially, avoiding process start-up cost
+
+# Maps digits to b'0' and every other byte to b'-', so a run of LONG_DIGIT_RUN
+# in the translated line means the line has 19+ consecutive digits
+DIGIT_MASK_TABLE = bytes(0x30 if 0x30 <= b <= 0x39 else 0x2D for b in range(256))
+LONG_DIGIT_RUN = b'0' * 19
+
+
+def _json_loads(line: bytes) -> Any:
+    """
+    Parse one JSON line exactly as json.loads would.
+    
+    orjson is used when available, except for lines it rejects (NaN and
+    Infinity, which json.dumps writes by default) and lines with 19 or more
+    consecutive digits, where an integer may not fit in 64 bits and orjson
+    would return a float. Without this a NaN-bearing result line would lose
+    its lineInDataset and the question would be reported as missing.
+    
+    Args:
+        line: Raw JSON line
+    
+    Returns:
+        Parsed value
+    
+    Raises:
+        json.JSONDecodeError: If the line is not valid JSON
+    """
+    if orjson is not None and LONG_DIGIT_RUN not in line.translate(DIGIT_MASK_TABLE):
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(line)
+
+
+def _has_non_finite_float(data: Any) -> bool:
+    """
+    Check whether data contains NaN or Infinity.
+    
+    Args:
+        data: Data to serialize
+    
+    Returns:
+        True if any float in data is not finite
+    """
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(map(_has_non_finite_float, data.values()))
+    if isinstance(data, (list, tuple)):
+        return any(map(_has_non_finite_float, data))
+    return False
+
+
+def _json_dumps_bytes(data: Any) -> bytes:
+    """
+    Serialize data as 2-space indented UTF-8 JSON, keeping non-ASCII characters.
+    
+    Data orjson cannot write the way json.dumps does (integers beyond 64 bits,
+    NaN/Infinity, which orjson writes as null) is serialized with json instead.
+    
+    Args:
+        data: Data to serialize
+    
+    Returns:
+        Encoded JSON document
+    """
+    if orjson is not None:
+        try:
+            dumped = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+        else:
+            if b'null' not in dumped or not _has_non_finite_float(data):
+                return dumped
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _iter_jsonl_lines(f: BinaryIO) -> Iterator[bytes]:
+    """
+    Iterate over the raw lines of a binary file with universal-newline splitting.
+    
+    The file is memory-mapped so lines are sliced straight out of the page cache;
+    empty or non-regular files (and platforms where mapping fails) are read through
+    the file object instead. Both only split on b'\n', so lines that also contain
+    b'\r' are split again to match text-mode reading of the same file.
+    
+    Args:
+        f: File opened in binary mode
+    
+    Returns:
+        Iterator of raw lines (line terminators may be kept)
+    """
+    raw_lines: Iterable[bytes] = f
+    mm: Optional[mmap.mmap] = None
+    file_stat = os.fstat(f.fileno())
+    if file_stat.st_size > 0 and stat.S_ISREG(file_stat.st_mode):
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            raw_lines = iter(mm.readline, b'')
+        except (OSError, ValueError):
+            mm = None
+    
+    try:
+        for line in raw_lines:
+            if b'\r' in line:
+                yield from line.splitlines()
+            else:
+                yield line
+    finally:
+        if mm is not None:
+            mm.close()
 
 
 def load_test_questions(test_file: str) -> Tuple[Set[int], Dict[int, Dict[str, Any]]]:
@@ -28,7 +152,8 @@ def load_test_questions(test_file: str) -> Tuple[Set[int], Dict[int, Dict[str, A
         test_file: Path to test.jsonl file
     
     Returns:
-        Tuple of (set of line numbers, dict mapping line numbers to question info)
+        Tuple of (set of line numbers, dict mapping line numbers to question info
+        in the missing_details format, including its line_number)
     
     Raises:
         FileNotFoundError: If test file does not exist
@@ -39,51 +164,128 @@ def load_test_questions(test_file: str) -> Tuple[Set[int], Dict[int, Dict[str, A
     if not os.path.exists(test_file):
         raise FileNotFoundError(f'Test file "{test_file}" not found')
     
-    with open(test_file, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, start=1):
-            if line.strip():
-                test_line_numbers.add(line_num)
+    # Raw bytes go straight to the JSON parser, avoiding a decode/re-encode per line
+    with open(test_file, 'rb') as f:
+        for line_num, line in enumerate(_iter_jsonl_lines(f), start=1):
+            if line and not line.isspace():
                 try:
-                    data = json.loads(line.strip())
-                    test_questions[line_num] = {
-                        QUESTION_KEY: data.get(QUESTION_KEY, ''),
-                        ANSWER_KEY: data.get(ANSWER_KEY, ''),
-                        IS_MCQ_KEY: data.get(IS_MCQ_KEY, False),
-                        SOURCE_KEY: data.get(SOURCE_KEY, '')
-                    }
+                    data = _json_loads(line)
                 except json.JSONDecodeError:
+                    # bytes.isspace() only knows ASCII whitespace; keep skipping Unicode-blank lines
+                    if not line.decode('utf-8', 'replace').isspace():
+                        test_line_numbers.add(line_num)
                     continue
+                test_line_numbers.add(line_num)
+                # Stored in the missing_details output schema so missing rows can be emitted as-is
+                test_questions[line_num] = {
+                    LINE_NUMBER_KEY: line_num,
+                    QUESTION_KEY: data.get(QUESTION_KEY, ''),
+                    ANSWER_KEY: data.get(ANSWER_KEY, ''),
+                    IS_MCQ_KEY: data.get(IS_MCQ_KEY, False),
+                    SOURCE_KEY: data.get(SOURCE_KEY, '')
+                }
     
     return test_line_numbers, test_questions
 
 
-def get_result_line_numbers(result_file: str) -> Set[int]:
+def _collect_result_line_numbers(lines: Iterable[bytes]) -> Set[int]:
+    """
+    Collect the positive lineInDataset values from raw result.jsonl lines.
+    
+    Args:
+        lines: Raw JSONL lines
+    
+    Returns:
+        Set of line numbers found in the lines
+    """
+    result_line_numbers: Set[int] = set()
+    for line in lines:
+        if line and not line.isspace():
+            try:
+                data = _json_loads(line)
+                line_in_dataset = data.get(LINE_IN_DATASET_KEY, 0)
+                if line_in_dataset > 0:
+                    result_line_numbers.add(line_in_dataset)
+            except json.JSONDecodeError:
+                continue
+    return result_line_numbers
+
+
+def _scan_result_chunk(result_file: str, start: int, end: int) -> Set[int]:
+    """
+    Collect line numbers from the byte range [start, end) of result.jsonl (runs in a worker process).
+    
+    Args:
+        result_file: Path to result.jsonl file
+        start: Offset of the first byte (at a line start)
+        end: Offset just past the last byte (at a line start or end of file)
+    
+    Returns:
+        Set of line numbers found in the range
+    """
+    with open(result_file, 'rb') as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+    # bytes.splitlines() splits on \n, \r and \r\n, the same as universal newlines
+    return _collect_result_line_numbers(chunk.splitlines())
+
+
+def _chunk_boundaries(result_file: str, size: int, chunks: int) -> List[int]:
+    """
+    Split a file into roughly equal byte ranges that start at line starts.
+    
+    Args:
+        result_file: Path to the file
+        size: File size in bytes
+        chunks: Desired number of ranges
+    
+    Returns:
+        Sorted offsets [0, ..., size]; consecutive pairs delimit one range
+    """
+    boundaries = [0]
+    with open(result_file, 'rb') as f:
+        for k in range(1, chunks):
+            f.seek(size * k // chunks)
+            f.readline()
+            offset = f.tell()
+            if boundaries[-1] < offset < size:
+                boundaries.append(offset)
+    boundaries.append(size)
+    return boundaries
+
+
+def get_result_line_numbers(result_file: str, jobs: int = 1) -> Set[int]:
     """
     Extract line numbers from result.jsonl file.
     
+    With more than one job, large files are split into line-aligned byte ranges
+    that are parsed in parallel worker processes; if the workers cannot be
+    started the file is parsed serially.
+    
     Args:
         result_file: Path to result.jsonl file
+        jobs: Number of worker processes for large files (1 scans serially)
     
     Returns:
         Set of line numbers found in result.jsonl
     """
-    result_line_numbers: Set[int] = set()
-    
     if not os.path.exists(result_file):
-        return result_line_numbers
+        return set()
     
-    with open(result_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                try:
-                    data = json.loads(line.strip())
-                    line_in_dataset = data.get(LINE_IN_DATASET_KEY, 0)
-                    if line_in_dataset > 0:
-                        result_line_numbers.add(line_in_dataset)
-                except json.JSONDecodeError:
-                    continue
+    size = os.path.getsize(result_file)
+    if jobs > 1 and size >= PARALLEL_MIN_BYTES:
+        boundaries = _chunk_boundaries(result_file, size, jobs)
+        try:
+            with ProcessPoolExecutor(max_workers=len(boundaries) - 1) as executor:
+                chunk_sets = list(executor.map(
+                    _scan_result_chunk, repeat(result_file), boundaries[:-1], boundaries[1:]
+                ))
+            return set().union(*chunk_sets)
+        except (OSError, BrokenProcessPool) as e:
+            print(f'Warning: parallel scan of "{result_file}" failed, scanning serially: {e}', file=sys.stderr)
     
-    return result_line_numbers
+    with open(result_file, 'rb') as f:
+        return _collect_result_line_numbers(_iter_jsonl_lines(f))
 
 
 def find_missing_questions(
@@ -118,22 +320,16 @@ def get_missing_details(
     Returns:
         List of dictionaries containing detailed question information
     """
-    details = []
-    for line_num in missing:
-        if line_num in test_questions:
-            q_info = test_questions[line_num]
-            details.append({
-                'line_number': line_num,
-                'question': q_info[QUESTION_KEY],
-                'answer': q_info[ANSWER_KEY],
-                'is_mcq': q_info[IS_MCQ_KEY],
-                'source': q_info[SOURCE_KEY]
-            })
-    return details
-
-
-def main() -> None:
-    """Main function."""
+    return [test_questions[line_num] for line_num in missing if line_num in test_questions]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Main function.
+    
+    Args:
+        argv: Command-line arguments (without program name); defaults to sys.argv
+    """
     parser = argparse.ArgumentParser(
         description='Find missing questions by comparing line numbers in result.jsonl with test.jsonl'
     )
@@ -148,8 +344,16 @@ def main() -> None:
         type=str,
         help='Path to result.jsonl file'
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of worker processes for scanning large result files (default: 1, serial)'
+    )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error('--jobs must be a positive integer')
     
     # Step 1: Load test questions
     try:
@@ -158,7 +362,7 @@ def main() -> None:
         sys.exit(f'Error: {e}')
     
     # Step 2: Process result file
-    result_line_numbers = get_result_line_numbers(args.result_file)
+    result_line_numbers = get_result_line_numbers(args.result_file, args.jobs)
     missing = find_missing_questions(test_line_numbers, result_line_numbers)
     
     # Step 3: Build output data
@@ -179,8 +383,8 @@ def main() -> None:
     result_basename = os.path.splitext(os.path.basename(args.result_file))[0]
     output_file = os.path.join(result_dir, f'{result_basename}_missing.json')
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    with open(output_file, 'wb') as f:
+        f.write(_json_dumps_bytes(output_data))
     
     print(output_file)
 
@@ -2,9 +2,17 @@
 Filter records with duration greater than specified threshold.
 """
 import argparse
+import bisect
 import json
+import math
+import operator
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library json
+    orjson = None
 
 # Constants
 DEFAULT_THRESHOLDS = [30.0, 60.0, 120.0, 180.0, 300.0]
@@ -12,9 +20,82 @@ DATA_KEY = '数据'
 STATS_KEY = '统计信息'
 DURATION_KEY = 'duration_seconds'
 
+# Translation table for spotting 19+ digit runs: digits become b'0', other bytes b'-'
+DIGIT_MASK_TABLE = bytes(0x30 if 0x30 <= b <= 0x39 else 0x2D for b in range(256))
+LONG_DIGIT_RUN = b'0' * 19
+
+
+def _json_loads(data: bytes) -> Any:
+    """
+    Parse a JSON document, with the same result as json.loads.
+    
+    orjson rejects NaN/Infinity and turns integers beyond 64 bits into floats,
+    so documents it rejects, or that contain a run of 19+ digits, are parsed
+    with json instead.
+    
+    Args:
+        data: Raw JSON document
+    
+    Returns:
+        Parsed value
+    
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON
+    """
+    if orjson is not None and LONG_DIGIT_RUN not in data.translate(DIGIT_MASK_TABLE):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def _has_non_finite_float(data: Any) -> bool:
+    """
+    Check whether data contains a NaN or infinite float.
+    
+    Args:
+        data: Data to serialize
+    
+    Returns:
+        True if it does
+    """
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(map(_has_non_finite_float, data.values()))
+    if isinstance(data, (list, tuple)):
+        return any(map(_has_non_finite_float, data))
+    return False
+
+
+def _json_dumps_bytes(data: Any) -> bytes:
+    """
+    Serialize data as 2-space indented UTF-8 JSON, keeping non-ASCII characters.
+    
+    Falls back to json when orjson cannot encode a value (integers beyond
+    64 bits) or would write NaN/Infinity as null.
+    
+    Args:
+        data: Data to serialize
+    
+    Returns:
+        Encoded JSON document
+    """
+    if orjson is not None:
+        try:
+            dumped = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+        else:
+            if b'null' not in dumped or not _has_non_finite_float(data):
+                return dumped
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
 
 def _process_single_threshold(
-    original_data: List[Dict[str, Any]],
+    sorted_data: List[Dict[str, Any]],
+    sorted_durations: List[float],
     original_stats: Dict[str, Any],
     duration_threshold: float
 ) -> Dict[str, Any]:
@@ -22,28 +103,25 @@ def _process_single_threshold(
     Process a single threshold and return the result.
     
     Args:
-        original_data: Original data list
+        sorted_data: Original data list, stably sorted by duration_seconds (descending)
+        sorted_durations: duration_seconds of each record in sorted_data
         original_stats: Original statistics
         duration_threshold: Duration threshold in seconds
     
     Returns:
         Threshold result dictionary
     """
-    original_count = len(original_data)
-    
-    # Filter records
-    filtered_data = [
-        record for record in original_data
-        if record.get(DURATION_KEY, 0) > duration_threshold
-    ]
+    original_count = len(sorted_data)
     
-    # Sort filtered data by duration_seconds (descending: high to low)
-    filtered_data.sort(key=lambda x: x.get(DURATION_KEY, 0), reverse=True)
+    # Records above the threshold form a prefix of the descending order, already sorted high to low;
+    # the cutoff is the first position whose duration is <= threshold
+    cutoff = bisect.bisect_left(sorted_durations, -duration_threshold, key=operator.neg)
+    filtered_data = sorted_data[:cutoff]
     
     # Calculate statistics
     filtered_count = len(filtered_data)
     if filtered_count > 0:
-        filtered_total_time = sum(record[DURATION_KEY] for record in filtered_data)
+        filtered_total_time = sum(sorted_durations[:cutoff])
         filtered_avg_time = filtered_total_time / filtered_count
     else:
         filtered_total_time = 0.0
@@ -91,8 +169,9 @@ def sorted_by_threshold(
     
     # Read input file
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data: Dict[str, Any] = json.load(f)
+        # Feed raw bytes to the parser; it decodes UTF-8 itself
+        with open(input_file, 'rb') as f:
+            data: Dict[str, Any] = _json_loads(f.read())
     except json.JSONDecodeError:
         # Try reading as JSONL format
         raise ValueError(
@@ -112,10 +191,18 @@ def sorted_by_threshold(
     original_stats: Dict[str, Any] = data.get(STATS_KEY, {})
     original_count = len(original_data)
     
+    # Extract durations once instead of looking them up per record
+    durations = [record[DURATION_KEY] for record in original_data]
+    
     # Calculate original statistics
-    original_total_time = sum(record[DURATION_KEY] for record in original_data)
+    original_total_time = sum(durations)
     original_avg_time = original_total_time / original_count if original_count > 0 else 0.0
     
+    # Sort once (descending, stable for ties); each threshold then only takes a prefix slice
+    order = sorted(range(original_count), key=durations.__getitem__, reverse=True)
+    sorted_data = [original_data[i] for i in order]
+    sorted_durations = [durations[i] for i in order]
+    
     # Process all thresholds (from high to low)
     threshold_results: Dict[str, Any] = {}
     sorted_thresholds = sorted(thresholds, reverse=True)
@@ -123,7 +210,7 @@ def sorted_by_threshold(
     for threshold in sorted_thresholds:
         threshold_key = f'阈值{threshold}秒'
         threshold_result = _process_single_threshold(
-            original_data, original_stats, threshold
+            sorted_data, sorted_durations, original_stats, threshold
         )
         threshold_results[threshold_key] = threshold_result
         
@@ -163,8 +250,8 @@ def sorted_by_threshold(
     }
     
     # Save output file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    with open(output_file, 'wb') as f:
+        f.write(_json_dumps_bytes(output_data))
     
     # Print final summary
     print('\n筛选完成！')
@@ -189,8 +276,13 @@ def _generate_output_path(input_file: str) -> str:
     return os.path.join(input_dir, f'{input_basename}_sorted_by_threshold.json')
 
 
-def main() -> None:
-    """Main function."""
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Main function.
+    
+    Args:
+        argv: Command-line arguments (without program name); defaults to sys.argv
+    """
     parser = argparse.ArgumentParser(
         description='Filter records with duration greater than specified thresholds'
     )
@@ -207,7 +299,7 @@ def main() -> None:
         help=f'Duration thresholds in seconds (default: {DEFAULT_THRESHOLDS})'
     )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     thresholds = args.thresholds if args.thresholds else DEFAULT_THRESHOLDS
     output_file = _generate_output_path(args.input_file)
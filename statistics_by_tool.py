@@ -2,11 +2,17 @@
 统计各个工具做了多少题，做对多少题
 """
 import json
+import math
 import os
-import re
 import argparse
 from collections import defaultdict
-from typing import Dict, List, Any, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, BinaryIO
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时回退到标准库 json
+    orjson = None
 
 # 常量定义
 ENHANCEMENT_PATH_TOOL = 'tool'
@@ -18,39 +24,152 @@ SEPARATOR_WIDTH = 80
 TOOL_NAME_WIDTH = 30
 NUMBER_WIDTH = 10
 
+# 写出统计文件时的缓冲区大小（片段先在缓冲区中累积，写满后才调用一次系统写入）
+OUTPUT_BUFFER_SIZE = 1 << 20
+LIST_WRITE_BATCH_SIZE = 1024  # 流式写出列表时每批序列化的元素个数
+
+# 数字映射为 b'0'、其余字节映射为 b'-' 的转换表，用于查找 19 位以上的连续数字
+DIGIT_MASK_TABLE = bytes(0x30 if 0x30 <= b <= 0x39 else 0x2D for b in range(256))
+LONG_DIGIT_RUN = b'0' * 19
+
+
+def _json_loads(data: bytes) -> Any:
+    """
+    解析 JSON 文件内容，结果与标准库 json.loads 相同
+    
+    orjson 拒绝 NaN/Infinity 且会把超出 64 位的整数转成 float，
+    因此 orjson 解析失败或含有 19 位以上连续数字时改用标准库 json 解析
+    
+    Args:
+        data: JSON 文件内容
+        
+    Returns:
+        解析结果
+        
+    Raises:
+        json.JSONDecodeError: 内容不是合法的 JSON
+    """
+    if orjson is not None and LONG_DIGIT_RUN not in data.translate(DIGIT_MASK_TABLE):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def _has_non_finite_float(data: Any) -> bool:
+    """
+    检查数据中是否有 NaN/Infinity（orjson 会把它们写成 null）
+    
+    Args:
+        data: 待序列化的数据
+        
+    Returns:
+        含有非有限浮点数时返回 True
+    """
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(map(_has_non_finite_float, data.values()))
+    if isinstance(data, (list, tuple)):
+        return any(map(_has_non_finite_float, data))
+    return False
 
-def _create_default_tool_stats() -> Dict[str, Any]:
-    """创建默认的工具统计字典"""
-    return {
-        'total': 0,
-        'correct': 0,
-        'incorrect': 0,
-        'accuracy': 0.0,
-        'line_numbers': [],
-        'correct_line_numbers': [],
-        'incorrect_line_numbers': []
-    }
 
+@dataclass(slots=True)
+class _ToolLineNumbers:
+    """单个工具的行号分组（使用 __slots__，比按字段名存取的字典更省内存，属性访问也更快）"""
+    line_numbers: List[Any] = field(default_factory=list)
+    correct_line_numbers: List[Any] = field(default_factory=list)
+    incorrect_line_numbers: List[Any] = field(default_factory=list)
 
-def _compress_line_number_arrays(json_str: str) -> str:
+
+def _json_dumps_bytes(data: Any) -> bytes:
     """
-    将JSON字符串中的行号数组压缩为单行格式
+    将数据序列化为缩进2格的UTF-8 JSON字节串（保留非ASCII字符）
     
     Args:
-        json_str: JSON字符串
+        data: 待序列化的数据
         
     Returns:
-        压缩后的JSON字符串
+        JSON字节串
+    """
+    if orjson is not None:
+        try:
+            dumped = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # 超出 64 位的整数等 orjson 无法写出的值
+            pass
+        else:
+            if b'null' not in dumped or not _has_non_finite_float(data):
+                return dumped
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _json_dumps_inline_array(values: List[Any]) -> bytes:
+    """
+    将行号数组序列化为 [1, 2, 3] 形式的单行JSON字节串
+    
+    Args:
+        values: 行号列表
+        
+    Returns:
+        JSON字节串
+    """
+    if orjson is not None:
+        try:
+            dumped = orjson.dumps(values)
+        except TypeError:
+            # 超出 64 位的整数等 orjson 无法写出的值
+            dumped = None
+        # 不含字符串时逗号只可能是元素分隔符，直接补上空格即可得到与 json.dumps 相同的格式；
+        # 含 null 时可能是被写成 null 的 NaN/Infinity，交给 json.dumps
+        if dumped is not None and b'"' not in dumped and b'null' not in dumped:
+            return dumped.replace(b',', b', ')
+    # 默认分隔符即为 ', '
+    return json.dumps(values, ensure_ascii=False).encode('utf-8')
+
+
+def _write_json_with_inline_line_numbers(f: BinaryIO, data: Dict[str, Any], level: int = 0) -> None:
     """
-    def compress_array(match: re.Match) -> str:
-        field_name = match.group(1)
-        array_content = match.group(2)
-        numbers = re.findall(r'\d+', array_content)
-        compressed = ', '.join(numbers)
-        return f'{field_name}[{compressed}]'
+    将字典以缩进2格的JSON格式流式写入文件，行号数组字段直接输出为单行格式
+    
+    非空列表按 LIST_WRITE_BATCH_SIZE 个元素一批序列化后写出，大列表（如 details）的序列化结果不会整体驻留内存。
     
-    pattern = r'("(?:line_numbers|correct_line_numbers|incorrect_line_numbers)"\s*:\s*)\[([\s\S]*?)\]'
-    return re.sub(pattern, compress_array, json_str)
+    Args:
+        f: 以二进制模式打开的输出文件对象
+        data: 待写入的字典
+        level: 当前嵌套层级
+    """
+    write = f.write
+    if not data:
+        write(b'{}')
+        return
+    
+    inner_indent = b'\n' + b'  ' * (level + 1)
+    separator = b'{' + inner_indent
+    for key, value in data.items():
+        write(separator)
+        write(_json_dumps_bytes(key))
+        write(b': ')
+        if key in LINE_NUMBER_FIELDS:
+            write(_json_dumps_inline_array(value))
+        elif isinstance(value, dict):
+            _write_json_with_inline_line_numbers(f, value, level + 1)
+        elif isinstance(value, list) and value:
+            # 每批序列化为 "[\n  元素,\n  元素\n]"，去掉首尾的 "[" 与 "\n]" 后即为缩进好的元素行
+            write(b'[')
+            batch_separator = b''
+            for start in range(0, len(value), LIST_WRITE_BATCH_SIZE):
+                batch = _json_dumps_bytes(value[start:start + LIST_WRITE_BATCH_SIZE])
+                write(batch_separator)
+                write(batch[1:-2].replace(b'\n', inner_indent))
+                batch_separator = b','
+            write(inner_indent + b']')
+        else:
+            write(_json_dumps_bytes(value).replace(b'\n', inner_indent))
+        separator = b',' + inner_indent
+    write(b'\n' + b'  ' * level + b'}')
 
 
 def _calculate_summary_stats(tool_stats: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
@@ -87,11 +206,13 @@ def statistics_by_tool(json_file: str) -> Dict[str, Dict[str, Any]]:
     Returns:
         工具统计信息字典，键为工具名称，值为统计信息
     """
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(json_file, 'rb') as f:
+        data = _json_loads(f.read())
     
     results = data.get('results', [])
-    tool_stats: Dict[str, Dict[str, Any]] = defaultdict(_create_default_tool_stats)
+    
+    # 按工具分组收集行号，计数在分组完成后由列表长度得出，循环内不再逐项累加计数器
+    tool_groups: Dict[str, _ToolLineNumbers] = defaultdict(_ToolLineNumbers)
     
     for result in results:
         if result.get('enhancement_path') != ENHANCEMENT_PATH_TOOL:
@@ -105,28 +226,33 @@ def statistics_by_tool(json_file: str) -> Dict[str, Dict[str, Any]]:
         line_in_dataset = result.get('lineInDataset', 0)
         
         # 统计每个工具（可能有多个相同工具，使用集合去重）
-        unique_tools = set(tools_used)
-        for tool in unique_tools:
-            stats = tool_stats[tool]
-            stats['total'] += 1
-            stats['line_numbers'].append(line_in_dataset)
-            
+        for tool in set(tools_used):
+            groups = tool_groups[tool]
+            groups.line_numbers.append(line_in_dataset)
             if is_correct:
-                stats['correct'] += 1
-                stats['correct_line_numbers'].append(line_in_dataset)
+                groups.correct_line_numbers.append(line_in_dataset)
             else:
-                stats['incorrect'] += 1
-                stats['incorrect_line_numbers'].append(line_in_dataset)
-    
-    # 计算正确率并排序行号列表
-    for tool, stats in tool_stats.items():
-        if stats['total'] > 0:
-            stats['accuracy'] = stats['correct'] / stats['total']
-            stats['line_numbers'] = sorted(stats['line_numbers'])
-            stats['correct_line_numbers'] = sorted(stats['correct_line_numbers'])
-            stats['incorrect_line_numbers'] = sorted(stats['incorrect_line_numbers'])
+                groups.incorrect_line_numbers.append(line_in_dataset)
+    
+    # 汇总各组：计算正确率并原地排序行号列表（结果通常已按行号顺序排列，此时排序只需线性时间）
+    tool_stats: Dict[str, Dict[str, Any]] = {}
+    for tool, groups in tool_groups.items():
+        line_numbers = groups.line_numbers
+        correct_line_numbers = groups.correct_line_numbers
+        incorrect_line_numbers = groups.incorrect_line_numbers
+        for field_line_numbers in (line_numbers, correct_line_numbers, incorrect_line_numbers):
+            field_line_numbers.sort()
+        tool_stats[tool] = {
+            'total': len(line_numbers),
+            'correct': len(correct_line_numbers),
+            'incorrect': len(incorrect_line_numbers),
+            'accuracy': len(correct_line_numbers) / len(line_numbers),
+            'line_numbers': line_numbers,
+            'correct_line_numbers': correct_line_numbers,
+            'incorrect_line_numbers': incorrect_line_numbers
+        }
     
-    return dict(tool_stats)
+    return tool_stats
 
 
 def print_statistics(tool_stats: Dict[str, Dict[str, Any]]) -> None:
@@ -206,11 +332,9 @@ def save_statistics_to_json(
             'incorrect_line_numbers': stats['incorrect_line_numbers']
         }
     
-    # 写入文件并压缩行号数组
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json_str = json.dumps(output_data, ensure_ascii=False, indent=2)
-        json_str = _compress_line_number_arrays(json_str)
-        f.write(json_str)
+    # 写入文件（行号数组直接输出为单行格式）
+    with open(output_file, 'wb', buffering=OUTPUT_BUFFER_SIZE) as f:
+        _write_json_with_inline_line_numbers(f, output_data)
     
     print(f"\n详细统计已保存到: {output_file}")
 
@@ -225,8 +349,8 @@ def statistics_knowledge_questions(json_file: str) -> Dict[str, Any]:
     Returns:
         知识增强题目统计信息字典，包含总数、正确数、错误数、正确率、行号列表和详细信息
     """
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(json_file, 'rb') as f:
+        data = _json_loads(f.read())
     
     results = data.get('results', [])
     
@@ -239,7 +363,7 @@ def statistics_knowledge_questions(json_file: str) -> Dict[str, Any]:
     # 按行号排序
     knowledge_results.sort(key=lambda x: x.get('lineInDataset', 0))
     
-    # 提取所有行号
+    # 提取所有行号（knowledge_results 已按行号排序，提取出的列表无需再排序）
     line_numbers = [r.get('lineInDataset') for r in knowledge_results]
     correct_line_numbers = [
         r.get('lineInDataset') for r in knowledge_results 
@@ -260,9 +384,9 @@ def statistics_knowledge_questions(json_file: str) -> Dict[str, Any]:
         'correct': correct,
         'incorrect': incorrect,
         'accuracy': accuracy,
-        'line_numbers': sorted(line_numbers),
-        'correct_line_numbers': sorted(correct_line_numbers),
-        'incorrect_line_numbers': sorted(incorrect_line_numbers),
+        'line_numbers': line_numbers,
+        'correct_line_numbers': correct_line_numbers,
+        'incorrect_line_numbers': incorrect_line_numbers,
         'details': knowledge_results
     }
 
@@ -317,11 +441,9 @@ def save_knowledge_statistics_to_json(
         'details': knowledge_stats['details']
     }
     
-    # 写入文件并压缩行号数组
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json_str = json.dumps(output_data, ensure_ascii=False, indent=2)
-        json_str = _compress_line_number_arrays(json_str)
-        f.write(json_str)
+    # 写入文件（行号数组直接输出为单行格式）
+    with open(output_file, 'wb', buffering=OUTPUT_BUFFER_SIZE) as f:
+        _write_json_with_inline_line_numbers(f, output_data)
     
     print(f"\n详细数据已保存到: {output_file}")
 
@@ -344,8 +466,13 @@ def _generate_output_file_path(input_file: str, suffix: str) -> str:
     return os.path.join(input_dir, f"{base_name}{suffix}")
 
 
-def main() -> None:
-    """主函数：解析命令行参数并执行统计"""
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    主函数：解析命令行参数并执行统计
+    
+    Args:
+        argv: 命令行参数列表（不含程序名），为 None 时使用 sys.argv
+    """
     parser = argparse.ArgumentParser(description="按工具统计准确率数据")
     parser.add_argument(
         "input_file",
@@ -354,7 +481,7 @@ def main() -> None:
         default="ninth/ninth_accuracy_by_path.json",
         help="输入的 accuracy_by_path.json 文件路径（默认: ninth/ninth_accuracy_by_path.json）"
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     input_file = args.input_file
     